@@ -1,5 +1,6 @@
 
 # $Id: cdezing.pxd 465 2016-02-16 11:02:36Z kny48981 $
+cimport numpy as np
  
 cdef extern from "./options.h":
    ctypedef struct Options:
@@ -22,4 +23,9 @@ cdef extern from "./timestamp.h":
 
 cdef extern from "./dezing_functions.h":
    void runDezing(Options * ctrlp, unsigned int  thisbatch,unsigned char * inbuf, unsigned char * outbuf )
-
+   ctypedef struct DezingCtx:
+      float outlier_mu
+      unsigned int npad
+      unsigned char mode
+      unsigned short int nthreads
+   int dezingBlock(const DezingCtx * ctx, size_t nframes, size_t sizey, size_t sizex, const np.uint16_t * inbuf, np.uint16_t * outbuf) nogil
@@ -113,6 +113,49 @@ def cleanup(): #,bytes summary):
 
 
 
+cdef class DezingContext:
+   """ Holds the dezinger settings, so several contexts can exist at once and
+   run may be called concurrently from different threads (the GIL is
+   released).
+
+   :param outlier_mu: threshold for detecting outliers.
+   :param npad: number of padding frames at each end of a block (>= 2, the
+      neighbourhood is two frames either side).
+   :param mode: output mode, 0=normal 5=zinger strength 6=zinger yes/no.
+   :param nthreads: threads used by each run, 0 to use all the processors.
+   """
+   cdef cdezing.DezingCtx ctx
+
+   def __cinit__(self, outlier_mu, npad, mode=0, nthreads=0):
+      if npad < 2:
+         raise ValueError("The dezinger requires at least 2 padding frames.")
+      self.ctx.outlier_mu = outlier_mu
+      self.ctx.npad = npad
+      self.ctx.mode = mode
+      self.ctx.nthreads = nthreads
+
+   def run(self, np.uint16_t[:, :, ::1] inarray, np.uint16_t[:, :, ::1] outarray):
+      """ Dezing a padded block of frames of shape (N, y, x) into the
+      preallocated outarray of the same shape. The padding frames are copied
+      from the input. """
+      cdef int retval
+      if outarray.shape[0] != inarray.shape[0] or \
+            outarray.shape[1] != inarray.shape[1] or \
+            outarray.shape[2] != inarray.shape[2]:
+         raise ValueError("The input and output arrays differ in shape")
+      if inarray.shape[0] < 2*self.ctx.npad:
+         raise ValueError("The block has fewer frames than the padding")
+      if inarray.shape[0]*inarray.shape[1]*inarray.shape[2] == 0:
+         return
+      with nogil:
+         retval = cdezing.dezingBlock(&self.ctx, inarray.shape[0],
+                                      inarray.shape[1], inarray.shape[2],
+                                      &inarray[0, 0, 0], &outarray[0, 0, 0])
+      if retval != 0:
+         raise RuntimeError("dezingBlock failed with code %i" % retval)
+
+
+
 def test_run(width=2550,length=2500,batchsize=100):
    #cdef np.ndarray[np.uint16_t,ndim=3] inarray =np.ones((width,length,batchsize),dtype=np.uint16)
    #cdef np.ndarray[np.uint16_t,ndim=3] outarray =np.empty((width,length,batchsize),dtype=np.uint16)
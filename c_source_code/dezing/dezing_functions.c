@@ -16,6 +16,7 @@
 #include <pthread.h>
 #include "timestamp.h"
 #include "options.h"
+#include "dezing_functions.h"
 
 #ifndef PI
 #define PI (3.14159265)
@@ -72,6 +73,7 @@ typedef struct threadlimit_struct{
 
 
 static void * threaddezing (void * datap) ;
+static float dezingvalue(const u_int16_t * inputs, int size, float outlier_mu, unsigned char mode);
 
 
 static Filtdata g_filtdata;
@@ -493,6 +495,11 @@ ctrlp->returnflag=0;
    //
 /* the dezing function */
 static float getfix(u_int16_t * inputs, int size){
+   return(dezingvalue(inputs,size,g_filtdata.outlier_mu,vflag));
+}
+
+/* the dezing function without reference to the global state */
+static float dezingvalue(const u_int16_t * inputs, int size, float outlier_mu, unsigned char mode){
    float sumsq;
    float mean;
    float sum;
@@ -522,17 +529,17 @@ static float getfix(u_int16_t * inputs, int size){
 
    /* vflag 5 mode will return the test value scaled to be meaningful in  ushort */
 
-   if (vflag == 5 ) return (testval * 1000);
+   if (mode == 5 ) return (testval * 1000);
 
    /* vflag 6 mode will just indicate the replaced pixels */
-   if (testval > g_filtdata.outlier_mu){
+   if (testval > outlier_mu){
       /* if the test is bad, then */
       /* form the mean of remaining pixels except this one */
-      if (vflag == 6 ) return(50000);
+      if (mode == 6 ) return(50000);
       return(mean);
 
    }else{ /* return the original value */
-      if (vflag == 6) return(0);
+      if (mode == 6) return(0);
       return(inputs[2]);
    }
 
@@ -624,3 +631,135 @@ static void * threaddezing (void * in_struct) {
 
 }
 
+
+////////////////////////////////////////////////////////////////////////////////
+// Reentrant interface: all the state is held by the caller
+////////////////////////////////////////////////////////////////////////////////
+
+typedef struct dezingjob_struct{
+   const DezingCtx * ctx;
+   const u_int16_t * input16;
+   u_int16_t * result16;
+   size_t size;
+   size_t start;
+   size_t end;
+}Dezingjob;
+
+static void * dezingslices (void * in_struct) {
+   /* dezing the slices start to end (exclusive) of a job */
+   const Dezingjob * job = (const Dezingjob *)(in_struct);
+   const static int thisnum=5; /* the number of neighbours in the neighbourhood */
+   const size_t size = job->size;
+   u_int16_t thisnb[thisnum]; /* array of neighbours */
+   const u_int16_t * centre;
+   u_int16_t * result;
+   size_t k,idx;
+   int nbj;
+
+   for (k=job->start;k<job->end;k++){
+      centre = job->input16 + k * size;
+      result = job->result16 + k * size;
+      for (idx=0;idx<size;idx++){
+         for(nbj=-2;nbj<=+2;nbj++){ /*neighborhood loop */
+            thisnb[nbj+2] = centre[idx + nbj * (long int)(size)];
+         }
+         result[idx] = (u_int16_t)(dezingvalue(thisnb,thisnum,job->ctx->outlier_mu,job->ctx->mode));
+      }
+   }
+   return(NULL);
+}
+
+int dezingBlock(const DezingCtx * ctx, size_t nframes, size_t sizey, size_t sizex, const u_int16_t * inbuf, u_int16_t * outbuf){
+/*
+  const DezingCtx * ctx: the dezinger settings, only read so may be shared between threads
+  size_t nframes: the number of frames in the block, including npad frames of padding at each end
+  const u_int16_t * inbuf: the (nframes, sizey, sizex) input block
+  u_int16_t * outbuf: an (nframes, sizey, sizex) output block, ALREADY allocated. The padding
+     frames are copied from the input.
+
+  Does no logging, so it may be called without the python GIL. Returns 0 on success.
+*/
+  const size_t size = sizex * sizey;
+  const size_t npad = ctx->npad;
+  size_t nslices,chunksize,extra,istart;
+  long int nthreads;
+  char * envstring;
+  unsigned int i;
+  int errflag=0;
+  pthread_t * thread;
+  unsigned char * started;
+  Dezingjob * jobs;
+
+  if (npad < 2 || nframes < 2 * npad){
+     return(1);
+  }
+
+  /* the padding is not corrected */
+  memcpy(outbuf, inbuf, npad * size * sizeof(u_int16_t));
+  memcpy(outbuf + (nframes - npad) * size, inbuf + (nframes - npad) * size, npad * size * sizeof(u_int16_t));
+
+  nslices = nframes - 2 * npad;
+  if (nslices == 0){
+     return(0);
+  }
+
+  /* as runDezing: use the processors from the queue environment or else all of them */
+  nthreads = ctx->nthreads;
+  if (nthreads == 0){
+     envstring=getenv("NSLOTS");
+     nthreads = (envstring != NULL) ? atol(envstring) : sysconf( _SC_NPROCESSORS_ONLN );
+  }
+  if (nthreads < 1){
+     nthreads = 1;
+  }
+  if ((size_t)(nthreads) > nslices){
+     nthreads = nslices;
+  }
+
+  jobs=(Dezingjob *)calloc(nthreads,sizeof(Dezingjob));
+  thread=(pthread_t *)calloc(nthreads,sizeof(pthread_t));
+  started=(unsigned char *)calloc(nthreads,sizeof(unsigned char));
+  if (jobs == NULL || thread == NULL || started == NULL){
+     free(jobs);
+     free(thread);
+     free(started);
+     return(2);
+  }
+
+  /* the first few chunks have an extra slice */
+  chunksize = nslices / nthreads;
+  extra = nslices - chunksize * nthreads;
+  istart = npad;
+  for (i=0;i<nthreads;i++){
+     jobs[i].ctx = ctx;
+     jobs[i].input16 = inbuf;
+     jobs[i].result16 = outbuf;
+     jobs[i].size = size;
+     jobs[i].start = istart;
+     jobs[i].end = istart + chunksize + (i < extra ? 1 : 0);
+     istart = jobs[i].end;
+  }
+
+  if (nthreads == 1){
+     dezingslices((void *)(jobs));
+  }else{
+     for (i=0;i<nthreads;i++){
+        if (pthread_create(thread+i,NULL,dezingslices,(void *)(jobs+i)) == 0){
+           started[i]=1;
+        }else{
+           /* run the job in this thread instead */
+           dezingslices((void *)(jobs+i));
+        }
+     }
+     for (i=0;i<nthreads;i++){
+        if (started[i] && pthread_join(thread[i],NULL) != 0){
+           errflag=4;
+        }
+     }
+  }
+
+  free(jobs);
+  free(thread);
+  free(started);
+  return(errflag);
+}
@@ -1,2 +1,12 @@
 
 extern void runDezing(Options * ctrlp, u_int32_t  thisbatch,u_int8_t * inbuf, u_int8_t * outbuf );
+
+/* reentrant interface: the settings are held by the caller */
+typedef struct DezingCtx_str{
+   float outlier_mu;
+   unsigned int npad;
+   unsigned char mode;
+   unsigned short int nthreads;
+}DezingCtx;
+
+extern int dezingBlock(const DezingCtx * ctx, size_t nframes, size_t sizey, size_t sizex, const u_int16_t * inbuf, u_int16_t * outbuf);
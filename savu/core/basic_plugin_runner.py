@@ -22,6 +22,7 @@
 import logging
 
 import savu.core.utils as cu
+import savu.core.trace as trace
 import savu.plugins.utils as pu
 from savu.data.experiment_collection import Experiment
 
@@ -74,6 +75,7 @@ class BasicPluginRunner(object):
         for data in self.exp.index['in_data'].values():
             self._transport_terminate_dataset(data)
 
+        trace._finish(self.exp.meta_data.get('out_path'))
         cu.user_message("***********************")
         cu.user_message("* Processing Complete *")
         cu.user_message("***********************")
@@ -82,6 +84,10 @@ class BasicPluginRunner(object):
         return self.exp
 
     def __run_plugin(self, plugin_dict):
+        with trace.span(plugin_dict['name'], 'plugin'):
+            self.__run_plugin_instance(plugin_dict)
+
+    def __run_plugin_instance(self, plugin_dict):
         plugin = self._transport_load_plugin(self.exp, plugin_dict)
         self.exp.plugin = plugin
         plugin._main_setup(self.exp, plugin_dict['data'])
@@ -0,0 +1,73 @@
+# Copyright 2014 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. module:: frame_queue
+   :platform: Unix
+   :synopsis: A queue of transfer blocks shared by the processes running a \
+   plugin, for dynamic distribution of frames.
+
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+
+"""
+
+import numpy as np
+from mpi4py import MPI
+
+
+class FrameQueue(object):
+    """ Hands out the indices of transfer blocks to processes as they become
+    free.  The index of the next block is held in an MPI window on the first
+    process of the communicator and is incremented atomically, so no process
+    has to service requests from the others.
+
+    Creating and closing the queue are collective over the communicator.
+
+    :param Comm comm: The communicator of the processes sharing the blocks.
+    :param int start: The index of the first block to hand out.
+    :param int stop: The number of blocks.
+    """
+
+    def __init__(self, comm, start, stop):
+        self.comm = comm
+        self.stop = stop
+        size = np.dtype(np.int64).itemsize
+        self.win = MPI.Win.Allocate(
+            size if comm.rank == 0 else 0, size, comm=comm)
+        if comm.rank == 0:
+            self.win.Lock(0, MPI.LOCK_EXCLUSIVE)
+            np.frombuffer(self.win.tomemory(), dtype=np.int64)[0] = start
+            self.win.Unlock(0)
+        self.comm.Barrier()
+
+    def _next(self):
+        """ Get the index of the next block, or None if there are none left.
+        """
+        one = np.ones(1, dtype=np.int64)
+        idx = np.zeros(1, dtype=np.int64)
+        self.win.Lock(0, MPI.LOCK_SHARED)
+        self.win.Fetch_and_op(one, idx, 0, 0, MPI.SUM)
+        self.win.Unlock(0)
+        return int(idx[0]) if idx[0] < self.stop else None
+
+    def __iter__(self):
+        idx = self._next()
+        while idx is not None:
+            yield idx
+            idx = self._next()
+
+    def _close(self):
+        if self.win is not None:
+            self.win.Free()
+            self.win = None
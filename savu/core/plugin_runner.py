@@ -19,11 +19,14 @@
 .. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
 """
 
+import h5py
 import logging
 import numpy as np
 
 import savu.core.utils as cu
+import savu.core.trace as trace
 import savu.plugins.utils as pu
+from savu.core.result_cache import ResultCache
 from savu.data.experiment_collection import Experiment
 
 
@@ -62,7 +65,15 @@ class PluginRunner(object):
         self._transport_pre_plugin_list_run()
 
         cp = self.exp.checkpoint
-        for i in range(cp.get_checkpoint_plugin(), n_plugins):
+        start = cp.get_checkpoint_plugin()
+        # results are not cached when restarting from a checkpoint
+        cache = None if self.exp.meta_data.get('checkpoint') else \
+            ResultCache(self.exp)
+        if cache and cache._is_enabled():
+            start = cache._restore(self)
+            cp.set_completed_plugins(start)
+
+        for i in range(start, n_plugins):
             self.exp._set_experiment_for_current_plugin(i)
             self.__run_plugin(exp_coll['plugin_dict'][i])
             # end the plugin run if savu has been killed
@@ -74,6 +85,8 @@ class PluginRunner(object):
                 break
             self.exp._barrier(msg='PluginRunner: No kill signal... continue.')
             cp.output_plugin_checkpoint()
+            if cache and cache._is_enabled():
+                cache._store(i)
 
         #  ********* transport function ***********
         logging.info('Running transport_post_plugin_list_run')
@@ -83,6 +96,7 @@ class PluginRunner(object):
         for data in self.exp.index['in_data'].values():
             self._transport_terminate_dataset(data)
 
+        trace._finish(self.exp.meta_data.get('out_path'))
         self.__output_final_message()
 
         if self.exp.meta_data.get('email'):
@@ -100,6 +114,10 @@ class PluginRunner(object):
         cu.user_message("*"*stars)
 
     def __run_plugin(self, plugin_dict):
+        with trace.span(plugin_dict['name'], 'plugin'):
+            self.__run_plugin_instance(plugin_dict)
+
+    def __run_plugin_instance(self, plugin_dict):
         plugin = self._transport_load_plugin(self.exp, plugin_dict)
 
         #  ********* transport function ***********
@@ -158,6 +176,7 @@ class PluginRunner(object):
         plist = plugin_list.plugin_list
         for i in range(n_loaders):
             pu.plugin_loader(self.exp, plugin_list.plugin_list[i])
+        loaded = self.exp.index['in_data'].values()
 
         if setnxs:
             self.exp._set_nxs_filename()
@@ -172,6 +191,11 @@ class PluginRunner(object):
             self.exp._merge_out_data_to_in()
             count += 1
 
+        # the loaders open the files again for the processing
+        for data in loaded:
+            if isinstance(data.backing_file, h5py.File) and data.backing_file:
+                data.backing_file.close()
+
     def __check_gpu(self):
         """ Check if the process list contains GPU processes and determine if
         GPUs exists. Add GPU processes to the processes list if required."""
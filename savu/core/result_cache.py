@@ -0,0 +1,353 @@
+# Copyright 2014 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+.. module:: result_cache
+   :platform: Unix
+   :synopsis: A content-addressed cache of plugin results, allowing a \
+   process list to reuse the intermediate datasets of an earlier run.
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+"""
+
+import os
+import sys
+import json
+import time
+import fcntl
+import shutil
+import hashlib
+import inspect
+import logging
+from contextlib import contextmanager
+
+import h5py
+from mpi4py import MPI
+
+import savu.core.utils as cu
+import savu.plugins.utils as pu
+from savu.version import __version__
+
+
+def get_source_hash(plugin_id):
+    """ Hash the source of the modules that define a plugin class and the
+    classes it inherits from (e.g. the base plugin and driver).
+
+    :param str plugin_id: The module path of the plugin.
+    :returns: The hex digest of the hash.
+    :rtype: str
+    """
+    clazz = pu.load_class(plugin_id)
+    modules = set(sys.modules[c.__module__] for c in inspect.getmro(clazz))
+    sha = hashlib.sha1()
+    for module in sorted(modules, key=lambda m: m.__name__):
+        if not hasattr(module, '__file__'):
+            continue  # a builtin module
+        source = os.path.splitext(module.__file__)[0] + '.py'
+        # compiled extension modules have no python source
+        source = source if os.path.exists(source) else module.__file__
+        with open(source, 'rb') as f:
+            sha.update(module.__name__)
+            sha.update(f.read())
+    return sha.hexdigest()
+
+
+class ResultCache(object):
+    """ Stores the datasets that are live after each plugin in a cache
+    folder, keyed on a hash of the input file and the chain of plugins (id,
+    parameters and source code) that produced them.  A later run of a process
+    list with the same input and the same leading plugins reloads the
+    datasets of the longest cached prefix and starts processing after it.
+
+    Cache entries are removed, least recently used first, when the cache
+    grows beyond its size limit.  Only datasets backed by a hdf5 file can be
+    cached.
+    """
+
+    def __init__(self, exp):
+        self._exp = exp
+        options = self._exp.meta_data.get_dictionary()
+        self._folder = options.get('cache')
+        size = options.get('cache_size')
+        self._max_size = size*1e9 if size is not None else None
+        self._keys = []
+        self._entries = {}
+
+    def _is_enabled(self):
+        return self._folder is not None
+
+    def _is_nexus_process(self):
+        """ The cache is read and written by the process that populates the
+        nexus file. """
+        return self._exp.meta_data.get('process') == \
+            len(self._exp.meta_data.get('processes'))-1
+
+    def _set_keys(self):
+        """ Calculate the cache key of each processing plugin. """
+        plugin_list = self._exp.meta_data.plugin_list
+        n_loaders = plugin_list._get_n_loaders()
+        exp_coll = self._exp._get_experiment_collection()
+
+        sha = hashlib.sha1(__version__)
+        sha.update(self.__get_file_identity())
+        for plugin_dict in plugin_list.plugin_list[:n_loaders]:
+            sha.update(self.__get_plugin_identity(plugin_dict))
+
+        self._keys = []
+        for plugin_dict in exp_coll['plugin_dict']:
+            sha.update(self.__get_plugin_identity(plugin_dict))
+            self._keys.append(sha.hexdigest())
+
+    def __get_file_identity(self):
+        path = os.path.abspath(self._exp.meta_data.get('data_file'))
+        stat = os.stat(path)
+        return json.dumps([path, stat.st_size, stat.st_mtime])
+
+    def __get_plugin_identity(self, plugin_dict):
+        return json.dumps([plugin_dict['id'], plugin_dict['data'],
+                           get_source_hash(plugin_dict['id'])],
+                          sort_keys=True, default=str)
+
+    @contextmanager
+    def __lock(self):
+        """ Serialise access to the cache folder between Savu runs. """
+        with open(os.path.join(self._folder, '.lock'), 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _restore(self, transport):
+        """ Reload the datasets of the longest cached chain of plugins,
+        leaving at least one plugin to run.
+
+        :param transport: The transport mechanism.
+        :returns: The number of plugins that do not need to be run.
+        :rtype: int
+        """
+        self._set_keys()
+        if self._is_nexus_process() and not os.path.exists(self._folder):
+            os.makedirs(self._folder)
+
+        comm = MPI.COMM_WORLD
+        root = len(self._exp.meta_data.get('processes'))-1
+        manifest = None
+        if self._is_nexus_process():
+            with self.__lock():
+                manifest = self.__find_entry()
+                if manifest:
+                    self.__add_entry_to_output(manifest)
+        manifest = comm.bcast(manifest, root=root)
+        if not manifest:
+            return 0
+
+        self.__close_skipped_plugins(transport, manifest['n'])
+        self._exp._barrier(msg='ResultCache: cached datasets restored.')
+        self.__load_data(manifest)
+        cu.user_message("Reusing the cached results of the first %d plugins"
+                        % manifest['n'])
+        return manifest['n']
+
+    def __find_entry(self):
+        for n in range(len(self._keys)-1, 0, -1):
+            path = os.path.join(self._folder, self._keys[n-1])
+            if os.path.exists(os.path.join(path, 'manifest.json')):
+                with open(os.path.join(path, 'manifest.json'), 'r') as f:
+                    manifest = json.load(f)
+                # mark the entry as recently used
+                os.utime(os.path.join(path, 'manifest.json'), None)
+                manifest['path'] = path
+                return manifest
+        return None
+
+    def __get_skipped_files(self, n):
+        """ The output files that were created for the plugins that will not
+        be run. """
+        filenames = set()
+        for i in range(n):
+            self._exp._set_experiment_for_current_plugin(i)
+            for data in self._exp.index['out_data'].values():
+                if isinstance(data.backing_file, h5py.File):
+                    filenames.add(data.backing_file.filename)
+        self._exp.index['out_data'] = {}
+        return filenames
+
+    def __close_skipped_plugins(self, transport, n):
+        for i in range(n):
+            self._exp._set_experiment_for_current_plugin(i)
+            for data in self._exp.index['out_data'].values():
+                transport._transport_terminate_dataset(data)
+        self._exp.index['out_data'] = {}
+
+    def __add_entry_to_output(self, manifest):
+        """ Replace the output files of the skipped plugins with links to the
+        cached files and add their entries to the nexus file. """
+        for fname in self.__get_skipped_files(manifest['n']):
+            if os.path.exists(fname):
+                os.remove(fname)
+
+        mData = self._exp.meta_data.get
+        cache_nxs = os.path.join(manifest['path'], 'nexus.h5')
+        with h5py.File(cache_nxs, 'r') as cache, \
+                h5py.File(mData('nxs_filename'), 'a') as nxs_file:
+            for name, entry in manifest['datasets'].iteritems():
+                group = cache[entry]
+                link = group.get('data', getlink=True)
+                fname = os.path.basename(link.filename)
+                if os.path.isabs(link.filename):
+                    target = os.path.join(mData('inter_path'), fname)
+                else:
+                    target = os.path.join(mData('out_path'), fname)
+                if not os.path.exists(target):
+                    self.__link_file(
+                        os.path.join(manifest['path'], fname), target)
+
+                parent = os.path.dirname(entry)
+                if parent not in nxs_file:
+                    nxs_file.create_group(parent)
+                    nxs_file[parent].attrs['NX_class'] = 'NXcollection'
+                if entry in nxs_file:
+                    del nxs_file[entry]
+                cache.copy(group, nxs_file[parent])
+                del nxs_file[entry]['data']
+                fname = target if os.path.isabs(link.filename) else fname
+                nxs_file[entry]['data'] = h5py.ExternalLink(fname, link.path)
+
+    def __load_data(self, manifest):
+        """ Reload the cached datasets from the nexus file. """
+        temp = self._exp.meta_data.get('data_file')
+        self._exp.meta_data.set(
+            'data_file', self._exp.meta_data.get('nxs_filename'))
+        pid = 'savu.plugins.loaders.savu_nexus_loader'
+        pu.plugin_loader(self._exp, {'id': pid, 'data': {}})
+        self._exp.meta_data.set('data_file', temp)
+
+        for name in self._exp.index['in_data'].keys():
+            if name not in manifest['live']:
+                del self._exp.index['in_data'][name]
+        for name, entry in manifest['datasets'].iteritems():
+            self._entries[name] = entry
+
+    def _store(self, count):
+        """ Add the datasets that are live after a plugin to the cache.
+
+        :param int count: The number of the plugin that has completed.
+        """
+        self.__update_entries(count)
+        if not self._is_nexus_process():
+            return
+
+        live = self._exp.index['in_data'].keys()
+        datasets = dict((n, e) for n, e in self._entries.iteritems()
+                        if n in live)
+        files = self.__get_cached_files(datasets)
+        if files is None:
+            logging.debug("ResultCache: plugin %d datasets are not cacheable",
+                          count)
+            return
+
+        key = self._keys[count]
+        with self.__lock():
+            path = os.path.join(self._folder, key)
+            if os.path.exists(path):
+                os.utime(os.path.join(path, 'manifest.json'), None)
+                return
+            tmp = os.path.join(self._folder, '.tmp-%s-%d' % (key, os.getpid()))
+            self.__write_entry(tmp, count, live, datasets, files)
+            os.rename(tmp, path)
+            self.__evict(key)
+
+    def __update_entries(self, count):
+        """ Record the nexus entries of the datasets created by a plugin. """
+        mData = self._exp.meta_data.get
+        exp_coll = self._exp._get_experiment_collection()
+        for name, data in exp_coll['datasets'][count].iteritems():
+            if data.remove:
+                continue
+            link_type = mData(['link_type', name])
+            if link_type == 'final_result':
+                entry = '/entry/final_result_' + name
+            else:
+                entry = '/entry/%s/%s' % \
+                    (link_type, mData(['group_name', name]))
+            self._entries[name] = entry
+
+    def __get_cached_files(self, datasets):
+        """ Find the hdf5 files backing the datasets, or None if any dataset
+        is not backed by a file. """
+        nxs_filename = self._exp.meta_data.get('nxs_filename')
+        files = {}
+        with h5py.File(nxs_filename, 'r') as nxs_file:
+            for entry in datasets.values():
+                if entry not in nxs_file:
+                    return None
+                link = nxs_file[entry].get('data', getlink=True)
+                if not isinstance(link, h5py.ExternalLink):
+                    return None
+                fname = os.path.join(os.path.dirname(nxs_filename),
+                                     link.filename)
+                if not os.path.exists(fname):
+                    return None
+                files[os.path.basename(fname)] = fname
+        return files
+
+    def __write_entry(self, path, count, live, datasets, files):
+        os.makedirs(path)
+        for fname, source in files.iteritems():
+            self.__link_file(source, os.path.join(path, fname))
+
+        nxs_filename = self._exp.meta_data.get('nxs_filename')
+        with h5py.File(nxs_filename, 'r') as nxs_file, \
+                h5py.File(os.path.join(path, 'nexus.h5'), 'w') as cache:
+            for entry in datasets.values():
+                parent = cache.require_group(os.path.dirname(entry))
+                nxs_file.copy(nxs_file[entry], parent)
+
+        manifest = {'n': count+1, 'live': live, 'datasets': datasets,
+                    'time': time.time()}
+        with open(os.path.join(path, 'manifest.json'), 'w') as f:
+            json.dump(manifest, f)
+
+    def __link_file(self, source, target):
+        """ Hard link a file, or copy it if the link is not possible. """
+        try:
+            os.link(source, target)
+        except OSError:
+            shutil.copy2(source, target)
+
+    def __evict(self, keep):
+        """ Remove the least recently used cache entries until the cache is
+        within its size limit. """
+        if self._max_size is None:
+            return
+
+        entries = []
+        for key in os.listdir(self._folder):
+            manifest = os.path.join(self._folder, key, 'manifest.json')
+            if key != keep and os.path.exists(manifest):
+                entries.append((os.path.getmtime(manifest), key))
+
+        for _, key in sorted(entries):
+            if self.__get_size() <= self._max_size:
+                break
+            logging.debug("ResultCache: removing cache entry %s", key)
+            shutil.rmtree(os.path.join(self._folder, key))
+
+    def __get_size(self):
+        """ The size of the cache, counting hard linked files once. """
+        inodes = {}
+        for root, _, files in os.walk(self._folder):
+            for fname in files:
+                stat = os.stat(os.path.join(root, fname))
+                inodes[(stat.st_dev, stat.st_ino)] = stat.st_size
+        return sum(inodes.values())
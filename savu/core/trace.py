@@ -0,0 +1,163 @@
+# Copyright 2014 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+.. module:: trace
+   :platform: Unix
+   :synopsis: Structured trace of the framework, recorded per process as \
+   spans and written in the Chrome trace-event format.
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+"""
+
+import os
+import json
+import time
+import shutil
+import socket
+import threading
+import collections
+
+from mpi4py import MPI
+
+MAX_EVENTS = 1000000
+
+_tracer = None
+
+
+class Tracer(object):
+    """ Records the spans of a single process in a ring buffer, so a long
+    run keeps only the most recent events.
+
+    :param int rank: The process number.
+    :param float start: The time (in seconds since the epoch) of time zero, \
+        shared by all processes.
+    :param int max_events: The size of the ring buffer.
+    """
+
+    def __init__(self, rank, start, max_events=MAX_EVENTS):
+        self.rank = rank
+        self.start = start
+        self.events = collections.deque(maxlen=max_events)
+        self.n_events = 0
+        self._threads = {}
+        self._lock = threading.Lock()
+
+    def _add(self, name, cat, t0, t1, args):
+        ident = threading.current_thread().ident
+        tid = self._threads.get(ident)
+        if tid is None:
+            with self._lock:
+                tid = self._threads.setdefault(ident, len(self._threads))
+        event = {'name': name, 'cat': cat, 'ph': 'X', 'pid': self.rank,
+                 'tid': tid, 'ts': int((t0 - self.start)*1e6),
+                 'dur': int((t1 - t0)*1e6)}
+        if args:
+            event['args'] = args
+        self.events.append(event)
+        self.n_events += 1
+
+    def _get_metadata(self):
+        name = '%s process %d' % (socket.gethostname(), self.rank)
+        meta = [{'name': 'process_name', 'ph': 'M', 'pid': self.rank,
+                 'args': {'name': name}},
+                {'name': 'process_sort_index', 'ph': 'M', 'pid': self.rank,
+                 'args': {'sort_index': self.rank}}]
+        for tid in self._threads.values():
+            meta.append({'name': 'thread_name', 'ph': 'M', 'pid': self.rank,
+                         'tid': tid, 'args': {'name': 'thread %d' % tid}})
+        dropped = self.n_events - len(self.events)
+        if dropped:
+            meta[0]['args']['dropped_events'] = dropped
+        return meta
+
+
+class _Span(object):
+    def __init__(self, name, cat, args):
+        self.name = name
+        self.cat = cat
+        self.args = args
+
+    def set(self, **kwargs):
+        """ Add arguments, e.g. a byte count, to the span. """
+        self.args.update(kwargs)
+
+    def __enter__(self):
+        self.t0 = time.time()
+        return self
+
+    def __exit__(self, *args):
+        if _tracer is not None:
+            _tracer._add(self.name, self.cat, self.t0, time.time(), self.args)
+
+
+class _NullSpan(object):
+    def set(self, **kwargs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+
+_null_span = _NullSpan()
+
+
+def span(name, cat, **kwargs):
+    """ A context manager recording a span of time, if tracing is on.
+
+    :param str name: The name of the span.
+    :param str cat: The category (e.g. transport, driver, mpi, hdf5).
+    :keyword kwargs: Arguments to attach to the span.
+    """
+    return _Span(name, cat, kwargs) if _tracer is not None else _null_span
+
+
+def _start(rank, comm=MPI.COMM_WORLD, max_events=MAX_EVENTS):
+    """ Start tracing this process.  Collective over the communicator, which
+    agrees the time zero of the trace. """
+    global _tracer
+    start = comm.bcast(time.time(), root=0)
+    _tracer = Tracer(rank, start, max_events=max_events)
+
+
+def _finish(out_path, comm=MPI.COMM_WORLD):
+    """ Write the trace of each process and merge them into
+    out_path/trace.json, which can be opened in chrome://tracing or
+    converted to html with savu_profile.  Collective over the communicator.
+    """
+    global _tracer
+    if _tracer is None:
+        return
+    tracer, _tracer = _tracer, None
+
+    folder = os.path.join(out_path, 'trace')
+    if comm.rank == 0 and not os.path.exists(folder):
+        os.makedirs(folder)
+    comm.barrier()
+    with open(os.path.join(folder, 'process%d.json' % tracer.rank), 'w') as f:
+        json.dump(tracer._get_metadata() + list(tracer.events), f,
+                  separators=(',', ':'))
+    comm.barrier()
+
+    if comm.rank == 0:
+        events = []
+        for fname in sorted(os.listdir(folder)):
+            with open(os.path.join(folder, fname), 'r') as f:
+                events.extend(json.load(f))
+        with open(os.path.join(out_path, 'trace.json'), 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f,
+                      separators=(',', ':'))
+        shutil.rmtree(folder)
+    comm.barrier()
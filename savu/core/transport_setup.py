@@ -26,6 +26,7 @@ import os
 
 from mpi4py import MPI
 import savu.core.utils as cu
+import savu.core.trace as trace
 
 
 class MPI_setup(object):
@@ -47,6 +48,8 @@ class MPI_setup(object):
             options["mpi"] = True
             self.__mpi_setup(options)
 
+        if options.get('trace'):
+            trace._start(options['process'])
         logging.debug(options)
 
     def __mpi_setup(self, options):
@@ -146,3 +149,20 @@ class MPI_setup(object):
                 logger.warn("Unable to add syslog logging for server %s on"
                             " port %i", options['syslog_server'],
                             options['syslog_port'])
+
+
+def get_host_communicators(comm=MPI.COMM_WORLD):
+    """ Group the processes by host, as in MPI_setup.
+
+    :returns: A communicator for the processes on this host, and a \
+        communicator between the first process on each host (None for the \
+        other processes).
+    """
+    hosts = comm.allgather(socket.gethostname())
+    uniq_hosts = sorted(set(hosts))
+    host_comm = comm.Split(uniq_hosts.index(hosts[comm.rank]), comm.rank)
+    first = 0 if host_comm.rank == 0 else MPI.UNDEFINED
+    leader_comm = comm.Split(first, comm.rank)
+    if leader_comm == MPI.COMM_NULL:
+        leader_comm = None
+    return host_comm, leader_comm
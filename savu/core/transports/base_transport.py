@@ -24,15 +24,22 @@
 
 import os
 import time
+import logging
 import copy
 import h5py
 import numpy as np
+from mpi4py import MPI
 
 import savu.core.utils as cu
+import savu.core.trace as trace
 import savu.plugins.utils as pu
+from savu.core.frame_queue import FrameQueue
 from savu.data.data_structures.data_types.base_type import BaseType
+from savu.plugins.driver.frame_threads import FrameThreads
 
 NX_CLASS = 'NX_class'
+# dynamic distribution has no benefit with fewer processes than this
+MIN_DYNAMIC_PROCESSES = 2
 
 
 class BaseTransport(object):
@@ -99,7 +106,9 @@ class BaseTransport(object):
 
     def process_setup(self, plugin):
         pDict = {}
-        pDict['in_data'], pDict['out_data'] = plugin.get_datasets()
+        pDict['in_data'], out_data = plugin.get_datasets()
+        pDict['out_data'] = \
+            [d for d in out_data if d._get_plugin_data()._is_processed()]
         pDict['in_sl'] = self._get_all_slice_lists(pDict['in_data'], 'in')
         pDict['out_sl'] = self._get_all_slice_lists(pDict['out_data'], 'out')
         pDict['nIn'] = range(len(pDict['in_data']))
@@ -121,30 +130,113 @@ class BaseTransport(object):
 
         :param plugin plugin: The current plugin instance.
         """
+        tuning = plugin._get_parameter_tuning()
+        distribution = self.__get_frame_distribution(plugin, tuning)
+        # the slice lists of this plugin are found for the distribution
+        plugin._set_frame_distribution(distribution)
+        try:
+            return self.__process(plugin, tuning, distribution)
+        finally:
+            plugin._set_frame_distribution('static')
+
+    def __process(self, plugin, tuning, distribution):
         pDict, result, nTrans = self._initialise(plugin)
         cp, sProc, sTrans = self.__get_checkpoint_params(plugin)
+        if tuning:
+            result = [result] + [[np.empty_like(r) for r in result] for n in
+                                 range(1, tuning.nInstances)]
+        threads = None if tuning else self.__get_frame_threads(plugin)
+
+        queue = None
+        if distribution == 'dynamic':
+            queue, sProc = self.__get_frame_queue(plugin, sTrans, nTrans), 0
 
         count = 0  # temporary solution
         prange = range(sProc, pDict['nProc'])
         kill = False
-        for count in range(sTrans, nTrans):
-            end = True if count == nTrans-1 else False
-            self._log_completion_status(count, nTrans, plugin.name)
-
-            # get the transfer data
-            transfer_data = self._transfer_all_data(count)
-
-            # loop over the process data
-            result, kill = self._process_loop(
-                    plugin, prange, transfer_data, count, pDict, result, cp)
+        try:
+            for count in queue if queue else range(sTrans, nTrans):
+                end = True if count == nTrans-1 else False
+                if queue:
+                    # the frame counter indexes the global frame index
+                    plugin._set_process_frames_counter(count*pDict['nProc'])
+                self._log_completion_status(count, nTrans, plugin.name)
+
+                # get the transfer data
+                transfer_data = self._transfer_all_data(count)
+
+                # loop over the process data
+                with trace.span('process', 'transport', block=count):
+                    if tuning:
+                        result, kill = self._tuning_process_loop(
+                            plugin, prange, transfer_data, count, pDict,
+                            result, cp)
+                    elif threads:
+                        result, kill = self._threaded_process_loop(
+                            plugin, prange, transfer_data, count, pDict,
+                            result, cp, threads)
+                    else:
+                        result, kill = self._process_loop(
+                            plugin, prange, transfer_data, count, pDict,
+                            result, cp)
+
+                if tuning:
+                    for n in range(tuning.nInstances):
+                        self._return_all_data(
+                            count, result[n], end, tuning=tuning, instance=n)
+                else:
+                    self._return_all_data(count, result, end)
 
-            self._return_all_data(count, result, end)
-            if kill:
-                return 1
+                if kill:
+                    return 1
+        finally:
+            if threads:
+                threads._close()
+            if queue:
+                queue._close()
 
         if not kill:
             cu.user_message("%s - 100%% complete" % (plugin.name))
 
+    def __get_frame_distribution(self, plugin, tuning):
+        """ Frames are split equally between the processes ('static'),
+        unless the system parameters request that blocks of frames are handed
+        out to processes as they become free ('dynamic').  Dynamic
+        distribution is not used for parameter tuning in a single pass. """
+        sys_params = self.exp.meta_data.get('system_params')
+        distribution = sys_params.get('frame_distribution', 'static')
+        if distribution not in ['static', 'dynamic']:
+            raise Exception("Unknown frame distribution '%s': choose from "
+                            "'static' and 'dynamic'." % distribution)
+        if distribution == 'static' or tuning or \
+                os.environ['savu_mode'] == 'basic':
+            return 'static'
+        comm = plugin.get_communicator()
+        return 'dynamic' if comm is not None and \
+            comm.size >= MIN_DYNAMIC_PROCESSES else 'static'
+
+    def __get_frame_queue(self, plugin, sTrans, nTrans):
+        """ Create the queue of transfer blocks.  After a checkpoint each
+        process restarts from the earliest block recorded by any process,
+        since the blocks handed out to the others may be incomplete. """
+        comm = plugin.get_communicator()
+        start = comm.allreduce(int(sTrans), op=MPI.MIN)
+        return FrameQueue(comm, start, nTrans)
+
+    def __get_frame_threads(self, plugin):
+        """ Create a thread pool for the frames processed by this plugin if
+        more than one thread per process is requested and the plugin is
+        thread safe. """
+        sys_params = self.exp.meta_data.get('system_params')
+        nThreads = int(sys_params.get('threads_per_process', 1))
+        if nThreads < 2 or self.pDict['nProc'] < 2:
+            return None
+        if not plugin.is_thread_safe():
+            logging.info("%s is not thread safe: processing frames serially",
+                         plugin.name)
+            return None
+        return FrameThreads(plugin, min(nThreads, self.pDict['nProc']))
+
     def _process_loop(self, plugin, prange, tdata, count, pDict, result, cp):
         kill_signal = False
         for i in prange:
@@ -160,6 +252,51 @@ class BaseTransport(object):
                 result[j][out_sl] = res[j]
         return result, kill_signal
 
+    def _threaded_process_loop(self, plugin, prange, tdata, count, pDict,
+                               result, cp, threads):
+        """ As _process_loop, but the frames are processed concurrently by a
+        pool of threads.  Each frame is written to its own region of the
+        result, so the output does not depend on the order of completion. """
+        def process(i):
+            data = self._get_input_data(plugin, tdata, i, count)
+            res = self._get_output_data(plugin.plugin_process_frames(data), i)
+            for j in pDict['nOut']:
+                out_sl = pDict['out_sl']['process'][i][j]
+                result[j][out_sl] = res[j]
+
+        # only check for a checkpoint between batches of frames
+        step = threads.nThreads if cp else max(len(prange), 1)
+        for b in range(0, len(prange), step):
+            batch = prange[b:b+step]
+            if cp and cp.is_time_to_checkpoint(self, count, batch[0]):
+                # kill signal sent so stop the processing
+                return result, True
+            threads._map(process, batch)
+        return result, False
+
+    def _tuning_process_loop(self, plugin, prange, tdata, count, pDict,
+                             result, cp):
+        """ Process each frame for every parameter tuning instance of the
+        plugin, so the data is only transferred from file once. """
+        tuning = plugin._get_parameter_tuning()
+        last = tuning.nInstances - 1
+        for i in prange:
+            if cp and cp.is_time_to_checkpoint(self, count, i):
+                # kill signal sent so stop the processing
+                return result, True
+            data = self._get_input_data(plugin, tdata, i, count)
+            for n in range(tuning.nInstances):
+                tuning._set_instance(n)
+                # a plugin may alter its input data in place
+                in_data = data if n == last else [d.copy() for d in data]
+                res = self._get_output_data(
+                        plugin.plugin_process_frames(in_data), i)
+
+                for j in pDict['nOut']:
+                    out_sl = pDict['out_sl']['process'][i][j]
+                    result[n][j][out_sl] = res[j]
+        return result, False
+
     def __get_checkpoint_params(self, plugin):
         cp = self.exp.checkpoint
         if cp:
@@ -231,9 +368,11 @@ class BaseTransport(object):
             slice_list = [slice(None)]*len(pDict['nIn'])
 
         section = []
-        for idx in range(len(data_list)):
-            section.append(data_list[idx]._get_transport_data().
-                           _get_padded_data(slice_list[idx]))
+        with trace.span('read', 'transport', block=count) as span:
+            for idx in range(len(data_list)):
+                section.append(data_list[idx]._get_transport_data().
+                               _get_padded_data(slice_list[idx]))
+            span.set(bytes=sum(s.nbytes for s in section))
         return section
 
     def _get_input_data(self, plugin, trans_data, nproc, ntrans):
@@ -259,12 +398,15 @@ class BaseTransport(object):
             result[j] = self.pDict['expand'][j](result[j])[unpad_sl[j]]
         return result
 
-    def _return_all_data(self, count, result, end):
+    def _return_all_data(self, count, result, end, tuning=None, instance=0):
         """ Transfer plugin results for current frame to backing files.
 
         :param int count: The current frame index.
         :param list(np.ndarray) result: plugin results
         :param bool end: True if this is the last entry in the slice list.
+        :param ParameterTuning tuning: Parameter tuning instances, if they \
+            are all processed in a single pass.
+        :param int instance: The current parameter tuning instance.
         """
         pDict = self.pDict
         data_list = pDict['out_data']
@@ -273,17 +415,22 @@ class BaseTransport(object):
         if 'transfer' in pDict['out_sl'].keys():
             slice_list = \
                 [pDict['out_sl']['transfer'][i][count] for i in pDict['nOut']]
+            if tuning:
+                slice_list = [tuning._get_instance_slice_list(
+                    slice_list[i], i, instance) for i in pDict['nOut']]
 
         result = [result] if type(result) is not list else result
 
-        for idx in range(len(data_list)):
-            if slice_list:
-                if end:
-                    result[idx] = self._remove_excess_data(
-                            data_list[idx], result[idx], slice_list[idx])
-                data_list[idx].data[slice_list[idx]] = result[idx]
-            else:
-                data_list[idx].data = result[idx]
+        with trace.span('write', 'transport', block=count) as span:
+            for idx in range(len(data_list)):
+                if slice_list:
+                    if end:
+                        result[idx] = self._remove_excess_data(
+                                data_list[idx], result[idx], slice_list[idx])
+                    data_list[idx].data[slice_list[idx]] = result[idx]
+                else:
+                    data_list[idx].data = result[idx]
+            span.set(bytes=sum(r.nbytes for r in result))
 
     def _set_global_frame_index(self, plugin, frame_list, nProc):
         """ Convert the transfer global frame index to a process global frame
@@ -383,14 +530,16 @@ class BaseTransport(object):
 
         count = 0
         for key in out_data_dict.keys():
-            out_data = out_data_dict[key]
-            filename = self.exp.meta_data.get(["filename", key])
-
-            out_data.backing_file = self.hdf5._open_backing_h5(filename, 'a')
-            out_data.group_name, out_data.group = self.hdf5._create_entries(
-                out_data, key, current_and_next[count])
+            self._setup_h5_file(out_data_dict[key], key,
+                                current_and_next[count])
             count += 1
 
+    def _setup_h5_file(self, out_data, key, current_and_next):
+        filename = self.exp.meta_data.get(["filename", key])
+        out_data.backing_file = self.hdf5._open_backing_h5(filename, 'a')
+        out_data.group_name, out_data.group = self.hdf5._create_entries(
+            out_data, key, current_and_next)
+
     def _set_file_details(self, files):
         self.exp.meta_data.set('link_type', files['link_type'])
         self.exp.meta_data.set('link_type', {})
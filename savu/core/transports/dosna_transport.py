@@ -22,14 +22,20 @@
 """
 
 import logging
+from mpi4py import MPI
 
-from savu.core.transport_setup import MPI_setup
+from savu.core.transport_setup import MPI_setup, get_host_communicators
 from savu.core.transports.base_transport import BaseTransport
 from savu.core.transports.hdf5_transport import Hdf5Transport
 from savu.data.chunking import Chunking
+from savu.data.local_object_store import LocalConnection, LOCAL_BACKENDS
 from savu.plugins.savers.utils.hdf5_utils import Hdf5Utils
 
-import dosna as dn
+try:
+    import dosna as dn
+except ImportError:
+    # only the local backends are available
+    dn = None
 
 log = logging.getLogger(__name__)
 
@@ -62,7 +68,8 @@ class DosnaTransport(BaseTransport):
         engine = options.get("dosna_engine") or DEFAULT_ENGINE
         dosna_connection_name = options.get("dosna_connection") \
             or DEFAULT_CONNECTION
-        dosna_connection_options = options.get("dosna_connection_options")
+        dosna_connection_options = \
+            options.get("dosna_connection_options") or []
 
         dosna_options = {}
 
@@ -70,14 +77,32 @@ class DosnaTransport(BaseTransport):
                              for item in dosna_connection_options))
         log.debug("DosNa is using backend %s engine %s and options %s",
                   backend, engine, dosna_options)
-        dn.use(engine, backend)
-        self.dosna_connection = dn.Connection(dosna_connection_name,
-                                              **dosna_options)
+        if backend in LOCAL_BACKENDS:
+            self.__check_local_backend(backend, options)
+            dosna_options.setdefault('path', options['inter_path'])
+            self.dosna_connection = LocalConnection(
+                dosna_connection_name, backend=backend, **dosna_options)
+        else:
+            if dn is None:
+                raise ImportError("DosNa is required for the %s backend."
+                                  % backend)
+            dn.use(engine, backend)
+            self.dosna_connection = dn.Connection(dosna_connection_name,
+                                                  **dosna_options)
         self.dosna_connection.connect()
         # initially reading from a hdf5 file so Hdf5TransportData will be used
         # for all datasets created in a loader
         options['transport'] = 'hdf5'
 
+    def __check_local_backend(self, backend, options):
+        if backend == 'memory' and options['mpi']:
+            raise Exception("The DosNa memory backend is only available to a "
+                            "single process.")
+        host_comm, leader_comm = get_host_communicators()
+        if host_comm.size != MPI.COMM_WORLD.size:
+            raise Exception("The DosNa local backend requires all processes "
+                            "to run on a single host.")
+
     def _transport_update_plugin_list(self):
         plugin_list = self.exp.meta_data.plugin_list
         saver_idx = plugin_list._get_savers_index()
@@ -117,7 +142,8 @@ class DosnaTransport(BaseTransport):
         self.dosna_connection = None
 
     def _transport_terminate_dataset(self, data):
-        if self.exp.meta_data.get('transport') == "hdf5":
+        if self.exp.meta_data.get('transport') == "hdf5" and \
+                data.backing_file:
             self.hdf5._close_file(data)
 
     @staticmethod
@@ -173,6 +199,11 @@ class DosnaTransport(BaseTransport):
             self.__set_hdf5_transport()
 
     def _transport_post_plugin(self):
+        if isinstance(self.dosna_connection, LocalConnection):
+            # make the chunks written by this process visible to the others
+            self.dosna_connection.flush()
+            self.exp._barrier(msg="DosnaTransport flush local chunks.")
+
         if self.count == self.n_plugins - 2:
             self.exp.meta_data.set('transport', 'hdf5')
 
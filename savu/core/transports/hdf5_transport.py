@@ -75,15 +75,20 @@ class Hdf5Transport(BaseTransport):
     def _transport_post_plugin(self):
         for data in self.exp.index['out_data'].values():
             if not data.remove:
-                msg = self.__class__.__name__ + "_transport_post_plugin."
-                self.exp._barrier(msg=msg)
-                if self.exp.meta_data.get('process') == \
-                        len(self.exp.meta_data.get('processes'))-1:
-                    self._populate_nexus_file(data)
-                    self.hdf5._link_datafile_to_nexus_file(data)
-                self.exp._barrier(msg=msg)
-                # reopen file as read-only
-                self.hdf5._reopen_file(data, 'r')
+                self._finalise_dataset(data)
+
+    def _finalise_dataset(self, data):
+        """ Link a completed output dataset to the nexus file and make it
+        read-only, ready to be passed to the next plugin. """
+        msg = self.__class__.__name__ + "_transport_post_plugin."
+        self.exp._barrier(msg=msg)
+        if self.exp.meta_data.get('process') == \
+                len(self.exp.meta_data.get('processes'))-1:
+            self._populate_nexus_file(data)
+            self.hdf5._link_datafile_to_nexus_file(data)
+        self.exp._barrier(msg=msg)
+        # reopen file as read-only
+        self.hdf5._reopen_file(data, 'r')
 
     def _transport_terminate_dataset(self, data):
         self.hdf5._close_file(data)
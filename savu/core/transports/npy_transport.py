@@ -0,0 +1,99 @@
+# Copyright 2015 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+.. module:: npy_transport
+   :platform: Unix
+   :synopsis: Passes intermediate datasets between plugins in memory-mapped \
+       .npy files, only writing final results to hdf5 files.
+
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+
+"""
+
+import os
+import logging
+import numpy as np
+from mpi4py import MPI
+
+from savu.core.transport_setup import get_host_communicators
+from savu.core.transports.hdf5_transport import Hdf5Transport
+
+
+class NpyTransport(Hdf5Transport):
+    """ As the hdf5 transport, but datasets that are only passed on to a
+    later plugin (link type 'intermediate') are stored in flat, memory-mapped
+    .npy files in the intermediate folder.  There is no chunking and no
+    file locking, so this suits a single host with fast local disks.
+    Intermediate datasets do not appear in the nexus file and their files
+    are deleted once the dataset is no longer required.
+    """
+
+    def _transport_initialise(self, options):
+        super(NpyTransport, self)._transport_initialise(options)
+        if options.get('checkpoint'):
+            raise Exception("Checkpointing is not available with the npy "
+                            "transport.")
+        host_comm, leader_comm = get_host_communicators()
+        if host_comm.size != MPI.COMM_WORLD.size:
+            raise Exception("The npy transport requires all processes to "
+                            "run on a single host.")
+
+    def _setup_h5_file(self, out_data, key, current_and_next):
+        if self.exp.meta_data.get(['link_type', key]) != 'intermediate':
+            super(NpyTransport, self)._setup_h5_file(
+                out_data, key, current_and_next)
+            return
+
+        filename = os.path.splitext(
+            self.exp.meta_data.get(["filename", key]))[0] + '.npy'
+        shape = out_data.get_shape()
+        if self.exp.meta_data.get('process') == 0:
+            np.lib.format.open_memmap(
+                filename, mode='w+', dtype=out_data.dtype, shape=shape)
+        self.exp._barrier(msg=self.__class__.__name__ + "_setup_h5_file")
+        logging.debug("Opening the memory-mapped file %s", filename)
+        out_data.backing_file = None
+        out_data.data = np.load(filename, mmap_mode='r+')
+        out_data._set_transport_data('npy')
+
+    def _finalise_dataset(self, data):
+        if isinstance(data.data, np.memmap):
+            data.data.flush()
+            self.exp._barrier(msg=self.__class__.__name__ + "_finalise")
+            # reopen file as read-only
+            data.data = np.load(data.data.filename, mmap_mode='r')
+        else:
+            super(NpyTransport, self)._finalise_dataset(data)
+
+    def _transport_terminate_dataset(self, data):
+        if isinstance(data.data, np.memmap):
+            filename = data.data.filename
+            data.data = None
+            self.exp._barrier(msg=self.__class__.__name__ + "_terminate")
+            if self.exp.meta_data.get('process') == 0 and \
+                    os.path.exists(filename):
+                os.remove(filename)
+        else:
+            super(NpyTransport, self)._transport_terminate_dataset(data)
+
+    def _transport_checkpoint(self):
+        pass
+
+    def _transport_cleanup(self, i):
+        """ Any remaining cleanup after kill signal sent """
+        n_plugins = len(self.exp_coll['datasets'])
+        for i in range(i, n_plugins):
+            self.exp._set_experiment_for_current_plugin(i)
+            for data in self.exp.index['out_data'].values():
+                self._transport_terminate_dataset(data)
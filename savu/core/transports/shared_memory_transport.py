@@ -0,0 +1,90 @@
+# Copyright 2015 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+.. module:: shared_memory_transport
+   :platform: Unix
+   :synopsis: Passes intermediate datasets between plugins in shared memory, \
+       only writing final results to hdf5 files.
+
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+
+"""
+
+from savu.core.transport_setup import get_host_communicators
+from savu.core.transports.hdf5_transport import Hdf5Transport
+from savu.data.data_structures.data_types.shared_memory import SharedMemory
+
+
+class SharedMemoryTransport(Hdf5Transport):
+    """ As the hdf5 transport, but datasets that are only passed on to a
+    later plugin (link type 'intermediate') are held in an MPI shared memory
+    window on each host instead of an hdf5 file.  A change of pattern
+    between plugins is then a read from memory, with the frames written on
+    other hosts exchanged over MPI when the plugin completes.  Only final
+    results are written to disk, so intermediate datasets do not appear in
+    the nexus file and checkpointing is unavailable.
+
+    Each host holds a full copy of every intermediate dataset, so this
+    transport suits datasets that fit in the memory of a single host.
+    """
+
+    def __init__(self):
+        super(SharedMemoryTransport, self).__init__()
+        self.host_comm = None
+        self.leader_comm = None
+
+    def _transport_initialise(self, options):
+        super(SharedMemoryTransport, self)._transport_initialise(options)
+        if options.get('checkpoint'):
+            raise Exception("Checkpointing is not available with the "
+                            "shared_memory transport.")
+        self.host_comm, self.leader_comm = get_host_communicators()
+
+    def _setup_h5_file(self, out_data, key, current_and_next):
+        if self.exp.meta_data.get(['link_type', key]) == 'intermediate':
+            out_data.backing_file = None
+            out_data.data = SharedMemory(out_data.get_shape(), out_data.dtype)
+        else:
+            super(SharedMemoryTransport, self)._setup_h5_file(
+                out_data, key, current_and_next)
+
+    def _transport_pre_plugin(self):
+        super(SharedMemoryTransport, self)._transport_pre_plugin()
+        for data in self.exp.index['out_data'].values():
+            if isinstance(data.data, SharedMemory):
+                data.data._allocate(self.host_comm)
+
+    def _finalise_dataset(self, data):
+        if isinstance(data.data, SharedMemory):
+            data.data._synchronise(self.leader_comm)
+        else:
+            super(SharedMemoryTransport, self)._finalise_dataset(data)
+
+    def _transport_terminate_dataset(self, data):
+        if isinstance(data.data, SharedMemory):
+            data.data._free()
+        else:
+            super(SharedMemoryTransport, self)._transport_terminate_dataset(
+                data)
+
+    def _transport_checkpoint(self):
+        pass
+
+    def _transport_cleanup(self, i):
+        """ Any remaining cleanup after kill signal sent """
+        n_plugins = len(self.exp_coll['datasets'])
+        for i in range(i, n_plugins):
+            self.exp._set_experiment_for_current_plugin(i)
+            for data in self.exp.index['out_data'].values():
+                self._transport_terminate_dataset(data)
@@ -0,0 +1,115 @@
+# Copyright 2014 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. module:: live_h5
+   :platform: Unix
+   :synopsis: A module for reading a hdf5 dataset that is still being written \
+       (SWMR), waiting for frames to arrive before they are read.
+
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+
+"""
+
+import time
+import logging
+import numpy as np
+
+from savu.data.data_structures.data_types.base_type import BaseType
+
+
+class LiveHdf5(BaseType):
+    """ This class wraps a hdf5 dataset that grows along one axis during
+    acquisition.  It has the final shape of the dataset and any read blocks
+    until all the frames it requires have been written.
+
+    :param h5py.Dataset dataset: A dataset opened in SWMR read mode.
+    :param int axis: The dimension that grows as frames are written.
+    :param int nframes: The total number of frames that will be written.
+    :param float timeout: Seconds to wait for a new frame before failing.
+    :param h5py.Dataset counter: An optional dataset holding the number of \
+        frames written so far (the last entry is used). If this is None the \
+        dataset shape is polled instead.
+    """
+
+    poll_interval = 0.1
+
+    def __init__(self, dataset, axis, nframes, timeout=600, counter=None):
+        self.dataset = dataset
+        self.axis = axis
+        self.nframes = nframes
+        self.timeout = timeout
+        self.counter = counter
+        super(LiveHdf5, self).__init__()
+
+        shape = list(dataset.shape)
+        shape[axis] = nframes
+        self.shape = tuple(shape)
+        self.dtype = dataset.dtype
+        self.available = 0
+
+    def clone_data_args(self, args, kwargs, extras):
+        args = ['dataset', 'axis', 'nframes']
+        kwargs['timeout'] = 'timeout'
+        kwargs['counter'] = 'counter'
+        return args, kwargs, extras
+
+    def __getitem__(self, idx):
+        self._wait_for_frames(self._get_frames_required(idx))
+        return self.dataset[idx]
+
+    def get_shape(self):
+        return self.shape
+
+    def _get_frames_required(self, idx):
+        """ The number of frames that must exist before idx can be read. """
+        idx = idx if isinstance(idx, tuple) else (idx,)
+        if any(i is Ellipsis for i in idx) or self.axis >= len(idx):
+            return self.nframes
+
+        index = idx[self.axis]
+        if isinstance(index, slice):
+            frames = np.arange(*index.indices(self.nframes))
+        elif isinstance(index, (int, np.integer)):
+            frames = np.array([index % self.nframes])
+        else:
+            frames = np.asarray(index)
+            if frames.dtype == bool:
+                frames = np.nonzero(frames)[0]
+        return frames.max() + 1 if frames.size else 0
+
+    def _frames_written(self):
+        if self.counter is not None:
+            self.counter.refresh()
+            count = self.counter[()] if not self.counter.shape else \
+                self.counter[-1] if self.counter.shape[0] else 0
+            return min(int(count), self.nframes)
+        self.dataset.refresh()
+        return min(self.dataset.shape[self.axis], self.nframes)
+
+    def _wait_for_frames(self, required):
+        """ Block until the first 'required' frames have been written. """
+        start = time.time()
+        while self.available < required:
+            self.available = self._frames_written()
+            if self.available >= required:
+                break
+            if time.time() - start > self.timeout:
+                raise Exception(
+                    "Timed out after %s seconds waiting for frame %s of %s "
+                    "(%s available)." % (self.timeout, required,
+                                         self.nframes, self.available))
+            logging.debug("Waiting for frame %s of %s (%s available)",
+                          required, self.nframes, self.available)
+            time.sleep(self.poll_interval)
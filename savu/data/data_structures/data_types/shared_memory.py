@@ -0,0 +1,147 @@
+# Copyright 2014 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. module:: shared_memory
+   :platform: Unix
+   :synopsis: A dataset held in an MPI shared memory window, with a copy on \
+       each host.
+
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+
+"""
+
+import numpy as np
+from mpi4py import MPI
+
+from savu.data.data_structures.data_types.base_type import BaseType
+
+
+class SharedMemory(BaseType):
+    """ A dataset that is never written to disk.  All processes on a host
+    read and write the same array, in a shared memory window allocated by
+    the first process on the host.  Once every process has written its
+    frames, _synchronise() sends the frames written on each host to the
+    others, so that every host holds the complete dataset.
+
+    Every host therefore holds a full copy of the dataset in memory, and
+    each frame crosses the network once for every other host.  The host
+    needs enough memory for all the shared memory datasets that exist at
+    the same time.
+
+    The array is only available between _allocate() and _free(), which are
+    collective over the host communicator.
+    """
+
+    # maximum number of bytes in a single broadcast between hosts
+    exchange_bytes = 2**27
+
+    def __init__(self, shape, dtype):
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        super(SharedMemory, self).__init__()
+        self.data = None
+        self.win = None
+        self.comm = None
+        self.written = []
+
+    def clone_data_args(self, args, kwargs, extras):
+        args = ['shape', 'dtype']
+        return args, kwargs, extras
+
+    def __getitem__(self, idx):
+        idx = tuple(idx) if isinstance(idx, list) else idx
+        return np.array(self.data[idx])
+
+    def __setitem__(self, idx, value):
+        idx = tuple(idx) if isinstance(idx, list) else idx
+        self.data[idx] = value
+        # the regions written by this process are sent to the other hosts
+        self.written.append(idx)
+
+    def get_shape(self):
+        return self.shape
+
+    def _allocate(self, comm, zero=False):
+        """ Allocate the shared array.
+
+        :param Intracomm comm: Communicator for the processes on this host.
+        :param bool zero: Set the array to zero.
+        """
+        nbytes = int(np.prod(self.shape))*self.dtype.itemsize
+        size = max(nbytes, 1) if comm.rank == 0 else 0
+        self.comm = comm
+        self.written = []
+        self.win = MPI.Win.Allocate_shared(
+            size, self.dtype.itemsize, comm=comm)
+        buf, itemsize = self.win.Shared_query(0)
+        self.data = np.ndarray(self.shape, dtype=self.dtype, buffer=buf)
+        if zero and comm.rank == 0:
+            self.data.fill(0)
+        self.win.Fence()
+
+    def _synchronise(self, leaders=None):
+        """ Wait for all processes on the host to finish writing and, if
+        there is more than one host, exchange the regions written on each
+        host.  Only written regions are sent, so nothing is sent for frames
+        that were not processed.
+
+        :param Intracomm leaders: Communicator between the first process on \
+            each host, or None on other processes.
+        """
+        self.win.Fence()
+        written = self.comm.gather(self.written, root=0)
+        self.written = []
+        if leaders is not None and leaders.size > 1:
+            regions = [r for w in written for r in w]
+            for host, host_regions in enumerate(leaders.allgather(regions)):
+                for batch in self.__get_batches(host_regions):
+                    self.__broadcast(leaders, host, batch)
+        self.win.Fence()
+
+    def __get_batches(self, regions):
+        """ Group regions into batches of at most exchange_bytes, unless a
+        single region is larger. """
+        batch, nbytes = [], 0
+        for region in regions:
+            size = self.data[region].nbytes
+            if batch and nbytes + size > self.exchange_bytes:
+                yield batch
+                batch, nbytes = [], 0
+            batch.append(region)
+            nbytes += size
+        if batch:
+            yield batch
+
+    def __broadcast(self, leaders, root, regions):
+        sizes = [self.data[r].size for r in regions]
+        if leaders.rank == root:
+            buf = np.concatenate([self.data[r].ravel() for r in regions])
+        else:
+            buf = np.empty(sum(sizes), dtype=self.dtype)
+        leaders.Bcast([buf.view(np.uint8), MPI.BYTE], root=root)
+        if leaders.rank != root:
+            start = 0
+            for region, size in zip(regions, sizes):
+                self.data[region] = buf[start:start + size].reshape(
+                    self.data[region].shape)
+                start += size
+
+    def _free(self):
+        """ Release the shared array. """
+        if self.win is not None:
+            self.data = None
+            self.win.Free()
+            self.win = None
+            self.comm = None
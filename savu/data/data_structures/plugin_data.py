@@ -57,6 +57,7 @@ class PluginData(object):
         self.no_squeeze = False
         self.pre_tuning_shape = None
         self._frame_limit = None
+        self._processed = True
 
     def _get_preview(self):
         return self._preview
@@ -263,6 +264,16 @@ class PluginData(object):
         self.data_obj.set_shape(tuple(shape))
         self.__set_shape()
 
+    def set_unprocessed(self):
+        """ The dataset is not passed to process_frames.  The plugin
+        populates it directly (e.g. in post_process) with a result that
+        depends on all the frames.
+        """
+        self._processed = False
+
+    def _is_processed(self):
+        return self._processed
+
     def _get_fixed_dimensions(self):
         """ Get the fixed data directions and their indices
 
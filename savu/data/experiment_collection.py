@@ -27,6 +27,7 @@ import h5py
 import logging
 from mpi4py import MPI
 
+import savu.core.trace as trace
 import savu.plugins.utils as pu
 from savu.data.meta_data import MetaData
 from savu.data.plugin_list import PluginList
@@ -296,7 +297,8 @@ class Experiment(object):
         if self.meta_data.get('mpi') is True:
             logging.debug("Barrier %d: %d processes expected: %s",
                           self._barrier_count, communicator.size, msg)
-            comm_dict['comm'].barrier()
+            with trace.span('barrier', 'mpi', msg=msg):
+                comm_dict['comm'].barrier()
         self._barrier_count += 1
 
     def log(self, log_tag, log_level=logging.DEBUG):
@@ -0,0 +1,391 @@
+# Copyright 2014 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. module:: local_object_store
+   :platform: Unix
+   :synopsis: A local stand-in for a DosNa connection, storing chunked \
+       datasets in memory or as a directory of chunk files.
+
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+
+"""
+
+import os
+import fcntl
+import shutil
+import itertools
+import collections
+import numpy as np
+
+LOCAL_BACKENDS = ['memory', 'local']
+
+
+class LocalConnection(object):
+    """ A connection with the create_dataset/del_dataset interface of a DosNa
+    connection.  The 'memory' backend keeps the chunks in a dictionary and
+    is only visible to the current process.  The 'local' backend stores
+    each chunk as a raw binary file in a directory, which may be shared by
+    all processes on a host.
+
+    Chunks are read and written through a least recently used cache,
+    shared by all datasets of the connection.  Call flush() when other
+    processes need to see the data written by this process.
+
+    :param str name: The name of the connection.
+    :param str backend: 'memory' or 'local'.
+    :param str path: The directory for the 'local' backend.
+    :param float cache_size: The size of the chunk cache in MB.
+    """
+
+    def __init__(self, name, backend='local', path=None, cache_size=256):
+        if backend not in LOCAL_BACKENDS:
+            raise ValueError("Unknown local backend %s" % backend)
+        self.name = name
+        self.store = _MemoryStore() if backend == 'memory' else \
+            _DirectoryStore(os.path.join(path or os.getcwd(), name))
+        self.cache = ChunkCache(self.store, float(cache_size)*1e6)
+        self.datasets = {}
+        self.connected = False
+
+    def connect(self):
+        self.store.connect()
+        self.connected = True
+
+    def disconnect(self):
+        self.flush()
+        self.connected = False
+
+    def create_dataset(self, name, shape, dtype, chunk_size=None):
+        shape = tuple(int(s) for s in shape)
+        if chunk_size is None:
+            chunk_size = (1,) + shape[1:]
+        chunk_size = tuple(int(min(c, s)) if s else 1
+                           for c, s in zip(chunk_size, shape))
+        self.store.create(name)
+        dataset = LocalDataset(name, shape, dtype, chunk_size, self.cache)
+        self.datasets[name] = dataset
+        return dataset
+
+    def get_dataset(self, name):
+        return self.datasets[name]
+
+    def has_dataset(self, name):
+        return name in self.datasets
+
+    def del_dataset(self, name):
+        self.cache.discard(name)
+        self.datasets.pop(name, None)
+        self.store.delete(name)
+
+    def flush(self):
+        """ Write all modified chunks and empty the cache, so that chunks
+        written by other processes are read again. """
+        self.cache.flush()
+        self.cache.clear()
+
+
+class LocalDataset(object):
+    """ A chunked n-dimensional dataset, indexed as a numpy array with
+    integers and slices.  All chunks touched by a read or write are fetched
+    from the store in a single batch.
+    """
+
+    def __init__(self, name, shape, dtype, chunk_size, cache):
+        self.name = name
+        self.shape = shape
+        self.dtype = np.dtype(dtype)
+        self.chunk_size = chunk_size
+        self.ndim = len(shape)
+        self.cache = cache
+
+    def __getitem__(self, index):
+        box, steps, squeeze = self.__normalise(index)
+        out = np.empty([b.stop - b.start for b in box], dtype=self.dtype)
+        chunks = self.__chunks_in_box(box)
+        for idx, data in zip(chunks, self.cache.get(self, chunks)):
+            sl_out, sl_chunk = self.__intersection(idx, box)
+            out[sl_out] = data[sl_chunk]
+        out = out[tuple(slice(None, None, s) for s in steps)]
+        return out.reshape([n for i, n in enumerate(out.shape)
+                            if i not in squeeze])
+
+    def __setitem__(self, index, value):
+        box, steps, squeeze = self.__normalise(index)
+        if any(s != 1 for s in steps):
+            raise ValueError("Strided writes are not supported.")
+        shape = [b.stop - b.start for b in box]
+        selected = [n for i, n in enumerate(shape) if i not in squeeze]
+        value = np.broadcast_to(np.asarray(value, dtype=self.dtype),
+                                selected).reshape(shape)
+
+        chunks = self.__chunks_in_box(box)
+        updates = []
+        for idx in chunks:
+            sl_value, sl_chunk = self.__intersection(idx, box)
+            updates.append((idx, sl_chunk, value[sl_value]))
+        self.cache.put(self, updates)
+
+    def _get_chunk_shape(self, idx):
+        """ The shape of a chunk, which is smaller at the end of a dimension
+        that is not a multiple of the chunk size. """
+        return tuple(min(c, s - i*c) for i, c, s in
+                     zip(idx, self.chunk_size, self.shape))
+
+    def __normalise(self, index):
+        if not isinstance(index, (tuple, list)):
+            index = (index,)
+        index = list(index)
+        if Ellipsis in index:
+            i = index.index(Ellipsis)
+            index[i:i+1] = [slice(None)]*(self.ndim - len(index) + 1)
+        index += [slice(None)]*(self.ndim - len(index))
+
+        box, steps, squeeze = [], [], []
+        for dim, (sl, n) in enumerate(zip(index, self.shape)):
+            if isinstance(sl, slice):
+                start, stop, step = sl.indices(n)
+                if step < 1:
+                    raise ValueError("Negative steps are not supported.")
+                stop = max(start, stop)
+                last = start + ((stop - start - 1)//step)*step \
+                    if stop > start else start - 1
+                box.append(slice(start, last + 1))
+                steps.append(step)
+            else:
+                sl = int(sl) + n if int(sl) < 0 else int(sl)
+                if not 0 <= sl < n:
+                    raise IndexError("Index %i is out of bounds." % sl)
+                box.append(slice(sl, sl + 1))
+                steps.append(1)
+                squeeze.append(dim)
+        return box, steps, squeeze
+
+    def __chunks_in_box(self, box):
+        ranges = [range(b.start//c, (b.stop - 1)//c + 1) if b.stop > b.start
+                  else [] for b, c in zip(box, self.chunk_size)]
+        return list(itertools.product(*ranges))
+
+    def __intersection(self, idx, box):
+        """ The slices of the selection and of the chunk that overlap. """
+        sl_box, sl_chunk = [], []
+        for i, c, b in zip(idx, self.chunk_size, box):
+            start, stop = max(i*c, b.start), min((i + 1)*c, b.stop)
+            sl_box.append(slice(start - b.start, stop - b.start))
+            sl_chunk.append(slice(start - i*c, stop - i*c))
+        return tuple(sl_box), tuple(sl_chunk)
+
+
+class ChunkCache(object):
+    """ A least recently used cache of chunks, limited to max_bytes.
+    Written chunks are kept with a mask of the modified elements, so only
+    those elements are merged into the stored chunk when it is written.
+    """
+
+    def __init__(self, store, max_bytes):
+        self.store = store
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        # (dataset name, chunk index) -> [dataset, chunk, mask or None,
+        # True if the chunk has been read from the store]
+        self.chunks = collections.OrderedDict()
+
+    def get(self, dataset, idx_list):
+        """ Return the chunks, fetching those not in the cache in one batch.
+        """
+        keys = [(dataset.name, idx) for idx in idx_list]
+        missing = [idx for idx, key in zip(idx_list, keys)
+                   if key not in self.chunks or not self.chunks[key][3]]
+        if missing:
+            fetched = self.store.get_chunks(dataset, missing)
+            for idx, data in zip(missing, fetched):
+                key = (dataset.name, idx)
+                if key in self.chunks:
+                    # keep the elements written since the chunk was cached
+                    entry = self.chunks[key]
+                    if entry[2] is not None:
+                        data[entry[2]] = entry[1][entry[2]]
+                    entry[1], entry[3] = data, True
+                else:
+                    self.__add(key, [dataset, data, None, True])
+
+        chunks = []
+        for key in keys:
+            entry = self.chunks.pop(key)
+            self.chunks[key] = entry
+            chunks.append(entry[1])
+        self.__evict(protect=set(keys))
+        return chunks
+
+    def put(self, dataset, updates):
+        """ Write (chunk index, chunk slice, data) updates into the cached
+        chunks.  Chunks that are not cached are created empty, as only the
+        modified elements are written to the store. """
+        for idx, sl, data in updates:
+            key = (dataset.name, idx)
+            if key not in self.chunks:
+                shape = dataset._get_chunk_shape(idx)
+                self.__add(key, [dataset, np.zeros(shape, dataset.dtype),
+                                 None, False])
+            entry = self.chunks.pop(key)
+            self.chunks[key] = entry
+            if entry[2] is None:
+                entry[2] = np.zeros(entry[1].shape, dtype=bool)
+                self.nbytes += entry[2].nbytes
+            entry[1][sl] = data
+            entry[2][sl] = True
+        self.__evict(protect=set((dataset.name, u[0]) for u in updates))
+
+    def flush(self):
+        """ Write all modified chunks to the store. """
+        self.__write([key for key, entry in self.chunks.iteritems()
+                      if entry[2] is not None])
+
+    def clear(self):
+        self.chunks.clear()
+        self.nbytes = 0
+
+    def discard(self, name):
+        """ Drop the chunks of a dataset without writing them. """
+        for key in [k for k in self.chunks.keys() if k[0] == name]:
+            self.__remove(key)
+
+    def __add(self, key, entry):
+        self.chunks[key] = entry
+        self.nbytes += self.__size(entry)
+
+    def __remove(self, key):
+        self.nbytes -= self.__size(self.chunks.pop(key))
+
+    def __size(self, entry):
+        return entry[1].nbytes + (entry[2].nbytes if entry[2] is not None
+                                  else 0)
+
+    def __evict(self, protect=()):
+        """ Remove the least recently used chunks while the cache is over
+        budget, writing any modified chunks in one batch. """
+        evict = []
+        size = self.nbytes
+        for key, entry in self.chunks.iteritems():
+            if size <= self.max_bytes:
+                break
+            if key not in protect:
+                evict.append(key)
+                size -= self.__size(entry)
+        self.__write([key for key in evict if self.chunks[key][2] is not None])
+        for key in evict:
+            self.__remove(key)
+
+    def __write(self, keys):
+        if not keys:
+            return
+        datasets = collections.OrderedDict()
+        for key in keys:
+            dataset, data, mask, loaded = self.chunks[key]
+            datasets.setdefault(dataset.name, (dataset, []))[1].append(
+                (key[1], data, mask))
+        for dataset, chunks in datasets.values():
+            self.store.put_chunks(dataset, chunks)
+        for key in keys:
+            entry = self.chunks[key]
+            self.nbytes -= entry[2].nbytes
+            entry[2] = None
+
+
+class _MemoryStore(object):
+    """ Chunks held in a dictionary, visible to this process only. """
+
+    def __init__(self):
+        self.data = {}
+
+    def connect(self):
+        pass
+
+    def create(self, name):
+        self.data[name] = {}
+
+    def delete(self, name):
+        self.data.pop(name, None)
+
+    def get_chunks(self, dataset, idx_list):
+        chunks = self.data[dataset.name]
+        return [chunks[idx].copy() if idx in chunks else
+                np.zeros(dataset._get_chunk_shape(idx), dtype=dataset.dtype)
+                for idx in idx_list]
+
+    def put_chunks(self, dataset, chunks):
+        stored = self.data[dataset.name]
+        for idx, data, mask in chunks:
+            if idx not in stored:
+                stored[idx] = np.zeros(data.shape, dtype=dataset.dtype)
+            stored[idx][mask] = data[mask]
+
+
+class _DirectoryStore(object):
+    """ Each chunk is a raw binary file in a directory per dataset.  Partial
+    chunks are merged into the file under a lock, so processes on the same
+    host may write to different parts of a chunk. """
+
+    def __init__(self, path):
+        self.path = path
+
+    def connect(self):
+        if not os.path.exists(self.path):
+            try:
+                os.makedirs(self.path)
+            except OSError:
+                # created by another process
+                pass
+
+    def create(self, name):
+        path = os.path.join(self.path, name)
+        if not os.path.exists(path):
+            try:
+                os.makedirs(path)
+            except OSError:
+                pass
+
+    def delete(self, name):
+        shutil.rmtree(os.path.join(self.path, name), ignore_errors=True)
+
+    def get_chunks(self, dataset, idx_list):
+        return [self.__read(dataset, idx) for idx in idx_list]
+
+    def put_chunks(self, dataset, chunks):
+        for idx, data, mask in chunks:
+            fname = self.__filename(dataset, idx)
+            tmp = '%s.%i' % (fname, os.getpid())
+            # a full chunk is also written under the lock, so it cannot be
+            # overwritten by a merge that read the chunk before it
+            with open(fname + '.lock', 'a') as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                if mask.all():
+                    stored = data
+                else:
+                    stored = self.__read(dataset, idx)
+                    stored[mask] = data[mask]
+                stored.tofile(tmp)
+                os.rename(tmp, fname)
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def __filename(self, dataset, idx):
+        return os.path.join(self.path, dataset.name,
+                            '_'.join(str(i) for i in idx))
+
+    def __read(self, dataset, idx):
+        shape = dataset._get_chunk_shape(idx)
+        fname = self.__filename(dataset, idx)
+        if not os.path.exists(fname):
+            return np.zeros(shape, dtype=dataset.dtype)
+        return np.fromfile(fname, dtype=dataset.dtype).reshape(shape)
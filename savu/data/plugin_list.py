@@ -36,6 +36,7 @@ import numpy as np
 from collections import defaultdict
 
 import savu.plugins.utils as pu
+import savu.plugins.plugin_index as pi
 from savu.data.meta_data import MetaData
 import savu.data.framework_citations as fc
 import savu.plugins.loaders.utils.yaml_utils as yu
@@ -214,9 +215,7 @@ class PluginList(object):
             count += 1
 
     def _get_docstring_info(self, plugin):
-        plugin_inst = pu.plugins[plugin]()
-        plugin_inst._populate_default_parameters()
-        return plugin_inst.docstring_info
+        return pi.get_plugin_info(plugin).docstring_info
 
     def _byteify(self, input):
         if isinstance(input, dict):
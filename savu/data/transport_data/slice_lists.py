@@ -193,6 +193,11 @@ class SliceLists(object):
         processes = self.data.exp.meta_data.get("processes")
         process = self.data.exp.meta_data.get("process")
         frame_idx = np.arange(len(slice_list))
+        plugin = self.data._get_plugin_data()._plugin
+        if plugin and plugin._get_frame_distribution() == 'dynamic' and \
+                process < len(processes):
+            # blocks are handed out as processes become free
+            return slice_list, frame_idx
         try:
             frames = np.array_split(frame_idx, len(processes))[process]
             slice_list = slice_list[frames[0]:frames[-1]+1]
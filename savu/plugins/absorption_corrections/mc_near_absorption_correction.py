@@ -80,35 +80,49 @@ class McNearAbsorptionCorrection(BaseAbsorptionCorrection):
 
     def process_frames(self, data):
         xrf = data[0]
-        stxm_orig = data[1]
+        stxm = data[1]
         logging.debug('the xrf shape is %s' % str(xrf.shape))
-        logging.debug('the stxm shape is %s' % str(stxm_orig.shape))
-        # take the log here, we assume it is monitor corrected already
-        stxm = stxm_orig
+        logging.debug('the stxm shape is %s' % str(stxm.shape))
         # now correct for the rotation offset
-        absorption = np.roll(stxm,int(self.npix_displacement), axis=0)
-        num_channels = self.get_num_channels()
-        corrected_xrf = np.zeros_like(xrf)
-        for i in range(num_channels):
-            fluo_sino = xrf[:,:,i]
-            corrected_xrf[:,:,i], corr_fac = self.correct_sino(self.atten_ratio[i], fluo_sino, absorption)
-            logging.debug('For channel %s, min correction: %s, max correction: %s' % (str(i),
-                                                                                      str(np.min(corr_fac)),
-                                                                                      str(np.max(corr_fac))))
+        absorption = np.roll(stxm, int(self.npix_displacement), axis=0)
+        # correct the sinograms of all the channels at once
+        corrected_xrf, corr_fac = \
+            self.correct_sino(self.atten_ratio, xrf, absorption)
+        logging.debug('The min correction per channel is: %s, the max is: %s'
+                      % (str(np.min(corr_fac, axis=(0, 1))),
+                         str(np.max(corr_fac, axis=(0, 1)))))
         return corrected_xrf
 
-    def correct_sino(self,Ti_ratio, FFI0_Ti, absorption):
-        trans_ave_array = np.ndarray(shape=FFI0_Ti.shape, dtype=np.float64)
-        for n in range(len(absorption)): #columns, axis=0
-            row = absorption[n]
-            trans_ave_array[n] = row
-            for m in range(1, len(row), 1): #row, axis=1
-                trans_ave_array[n][m] = np.average(row[0:m]) #average of all absorption between pixel 0 and pixel - removes t so should be mu only
-           
-        trans_ave_array = np.nan_to_num(trans_ave_array)
-        exponent_Ti = self.get_exponent_Ti_mu(Ti_ratio, absorption, trans_ave_array)
-        FFI0_corrected_Ti = np.multiply(FFI0_Ti, exponent_Ti)
-        return FFI0_corrected_Ti, exponent_Ti
+    def correct_sino(self, atten_ratio, xrf, absorption):
+        """ Correct xrf sinograms for self-absorption.
+
+        :param atten_ratio: The attenuation ratio, or a list of ratios with \
+            one for each sinogram in the last dimension of xrf.
+        :param ndarray xrf: A sinogram, or a stack of sinograms in the last \
+            dimension.
+        :param ndarray absorption: The absorption sinogram.
+        :returns: The corrected sinograms and the correction factors.
+        """
+        trans_ave_array = self.get_trans_ave(absorption)
+        if xrf.ndim > absorption.ndim:
+            # broadcast the absorption over the stack of sinograms
+            absorption = absorption[..., np.newaxis]
+            trans_ave_array = trans_ave_array[..., np.newaxis]
+        exponent = self.get_exponent_Ti_mu(
+            np.asarray(atten_ratio), absorption, trans_ave_array)
+        corrected = np.multiply(xrf, exponent).astype(xrf.dtype, copy=False)
+        return corrected, exponent
+
+    def get_trans_ave(self, absorption):
+        """ The average of all absorption in each row between the first pixel
+        and each pixel (exclusive), which removes t so should be mu only.
+        """
+        trans_ave_array = np.empty(absorption.shape, dtype=np.float64)
+        trans_ave_array[:, 0] = absorption[:, 0]
+        trans_ave_array[:, 1:] = \
+            np.cumsum(absorption[:, :-1], axis=1, dtype=np.float64) / \
+            np.arange(1, absorption.shape[1])
+        return np.nan_to_num(trans_ave_array)
 
     def get_exponent_Ti_mu(self, Ti_ratio, absorption, trans_ave_array):
         FF_Ti_xray_mu = np.multiply(trans_ave_array, Ti_ratio)
@@ -24,11 +24,11 @@
 
 import logging
 import numpy as np
-from scipy.ndimage.interpolation import shift as sci_shift
 
 from savu.plugins.utils import register_plugin
 from savu.plugins.filters.base_filter import BaseFilter
 from savu.plugins.driver.cpu_plugin import CpuPlugin
+from savu.plugins.alignment.utils.shift_utils import shift_rows
 
 
 @register_plugin
@@ -48,20 +48,22 @@ class ProjectionVerticalAlignment(BaseFilter, CpuPlugin):
         data = self.get_in_datasets()[0]
         self.shift = data.meta_data.get('proj_align_shift')
         self.slice_dir = data._get_plugin_data().get_slice_dimension()
-        self.sl = [slice(None)]*3
         self.det_y = self.get_plugin_in_datasets()[0].\
             get_data_dimension_by_axis_label('detector_y')
 
     def process_frames(self, data):
-        data = data[0]
-        output = np.empty_like(data)
-        nFrames = data.shape[self.slice_dir]
+        # (projection, first frame axis, second frame axis) view of the block
+        frames = np.rollaxis(data[0], self.slice_dir)
         sl = self.slice_list[self.slice_dir]
         entries = np.arange(sl.start, sl.stop, sl.step)
+        nFrames, length, nCols = frames.shape
 
-        for i in range(nFrames):
-            self.sl[self.slice_dir] = i
-            output[self.sl] = \
-                sci_shift(data[self.sl], (self.shift[entries[i]][0], 0), cval=np.nan)
+        # shift every column of every projection along the first frame axis
+        columns = frames.transpose(0, 2, 1).reshape(nFrames*nCols, length)
+        shifts = np.repeat(np.asarray(self.shift)[entries, 0], nCols)
+        shifted = shift_rows(columns, shifts, cval=np.nan)
 
+        output = np.empty_like(data[0])
+        np.rollaxis(output, self.slice_dir)[...] = \
+            shifted.reshape(nFrames, nCols, length).transpose(0, 2, 1)
         return output
@@ -23,14 +23,13 @@
 """
 
 import logging
-from scipy import ndimage
-from scipy.optimize import curve_fit
 import numpy as np
 
 from savu.plugins.utils import register_plugin
 from savu.plugins.filters.base_filter import BaseFilter
 from savu.data.plugin_list import CitationInformation
 from savu.plugins.driver.cpu_plugin import CpuPlugin
+from savu.plugins.alignment.utils.shift_utils import shift_rows
 
 
 @register_plugin
@@ -41,8 +40,6 @@ class SinogramAlignment(BaseFilter, CpuPlugin):
     each centre of mass and the sine function is then used to align each row.
 
     :param threshold: e.g. a.b will set all values above a to b. Default: None.
-    :param p0: Initial guess for the parameters of \
-        scipy.optimize.curve_fit. Default: (1, 1, 1).
     :param type: Either centre_of_mass or shift, with the latter requiring\
         ProjectionVerticalAlignment prior to this \
         plugin. Default: 'centre_of_mass'.
@@ -60,83 +57,50 @@ class SinogramAlignment(BaseFilter, CpuPlugin):
                 'proj_align_shift')[:, 1]
         self.com_x = \
             self.get_in_datasets()[0].meta_data.get('rotation_angle')
-        data = self.get_in_datasets()[0]
-        self.sl = [slice(None)]*len(data.get_shape())
         self.slice_dir = self.get_plugin_in_datasets()[0].get_slice_dimension()
-
-#    def filter_frames(self, data):
-#        """
-#        Should be overloaded by filter classes extending this one
-#
-#        :param data: The data to filter
-#        :type data: ndarray
-#        :returns:  The filtered image
-#        """
-#        nFrames = data[0].shape[self.slice_dir]
-#        result = np.empty_like(data[0])
-#        for i in range(nFrames):
-#            self.sl[self.slice_dir] = i
-#            sino = data[0][self.sl]
-#            if self.parameters['threshold']:
-#                a, b = self.parameters['threshold'].split('.')
-#                sino[sino > a] = b
-#            com_y = self.com_y if self.com_y is not None else self._com_y(sino)
-#            shifted = self._shift(sino, self.com_x, com_y)
-#            result[self.sl] = \
-#                shifted.reshape(shifted.shape[0], shifted.shape[1])
-#        return data
+        # the sine model a*sin(theta - b) + c is linear in sin(theta),
+        # cos(theta) and 1, so it is fitted by linear least squares
+        theta = np.deg2rad(self.com_x)
+        self.model = np.array([np.sin(theta), np.cos(theta),
+                               np.ones(len(theta))]).T
 
     def process_frames(self, data):
         """
-        Should be overloaded by filter classes extending this one
+        Align the rows of all the sinograms in the block at once.
 
         :param data: The data to filter
         :type data: ndarray
         :returns:  The filtered image
         """
-        nFrames = data[0].shape[self.slice_dir]
+        # (sinogram, rotation angle, detector x) view of the block
+        sinos = np.rollaxis(data[0], self.slice_dir)
+        if self.parameters['threshold']:
+            a, b = self.parameters['threshold'].split('.')
+            sinos[sinos > float(a)] = float(b)
+        com_y = self._com_y(sinos) if self.com_y is None else \
+            np.tile(self.com_y, (sinos.shape[0], 1))
+        shifts = self._get_shifts(com_y)
+
         result = np.empty_like(data[0])
-        for i in range(nFrames):
-            self.sl[self.slice_dir] = i
-            sino = data[0][self.sl]
-            if self.parameters['threshold']:
-                a, b = self.parameters['threshold'].split('.')
-                sino[sino > a] = b
-            com_y = self.com_y if self.com_y is not None else self._com_y(sino)
-            shifted = self._shift(sino, self.com_x, com_y)
-            result[self.sl] = \
-                shifted.reshape(shifted.shape[0], shifted.shape[1])
+        n_rows = sinos.shape[0]*sinos.shape[1]
+        np.rollaxis(result, self.slice_dir)[...] = shift_rows(
+            sinos.reshape(n_rows, -1), shifts.ravel(), mode='nearest'
+            ).reshape(sinos.shape)
         return result
 
-    def _sinfunc(self, data, a, b, c):
-        return (a*np.sin(np.deg2rad(data-b)))+c
-
-    def _shift(self, sinogram, com_x, com_y):
-        fitpars, covmat = \
-            curve_fit(self._sinfunc, com_x, com_y, p0=self.parameters['p0'])
-        variances = covmat.diagonal()
-        std_devs = np.sqrt(variances)
-        #residual = com_y - self._sinfunc(com_x, *fitpars)
-        residual = self._sinfunc(com_x, *fitpars) - com_y
-        centre_of_rotation_shift = residual
-        np.array_split(sinogram, sinogram.shape[0], axis=0)
-        n = 0
-        shifted_sinogram = []
-        for row in sinogram:
-            shifted_sinogram_row = \
-                ndimage.interpolation.shift(row, [centre_of_rotation_shift[n]],
-                                            mode='nearest')
-            shifted_sinogram.append(shifted_sinogram_row)
-            n += 1
-            output = np.vstack(shifted_sinogram)
-        return output
-
-    def _com_y(self, sinogram):
-        com_y = []
-        for row in sinogram:
-            com = ndimage.measurements.center_of_mass(row)
-            com_y.append(com[0])
-        return com_y
+    def _get_shifts(self, com_y):
+        """ The residual between the sine fit to each sinogram's centres of
+        mass and the centres of mass.
+
+        :param ndarray com_y: The centres of mass, one row per sinogram.
+        """
+        coeffs = np.linalg.lstsq(self.model, com_y.T, rcond=-1)[0]
+        return np.dot(self.model, coeffs).T - com_y
+
+    def _com_y(self, sinos):
+        """ The centre of mass of each row of each sinogram. """
+        x = np.arange(sinos.shape[-1], dtype=np.float64)
+        return np.dot(sinos, x)/sinos.sum(axis=-1, dtype=np.float64)
 
     def get_plugin_pattern(self):
         return 'SINOGRAM'
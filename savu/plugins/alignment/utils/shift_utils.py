@@ -0,0 +1,64 @@
+# Copyright 2014 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. module:: shift_utils
+   :platform: Unix
+   :synopsis: Sub-pixel shifts of many rows at once, each by its own amount.
+
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+
+"""
+
+import numpy as np
+from scipy import ndimage
+
+
+def shift_rows(rows, shifts, mode='constant', cval=0.0):
+    """ Shift each row of a 2D array along its length, as
+    scipy.ndimage.shift does with a cubic spline, in a single
+    map_coordinates call.
+
+    The rows are padded by one row at each end, so every row is interior to
+    the spline along the first axis and is sampled there exactly.  The spline
+    prefilter along that axis would spread non-finite values between rows,
+    so any row containing them is shifted on its own.
+
+    :param ndarray rows: The rows to shift, with shape (n_rows, length).
+    :param ndarray shifts: The shift of each row.
+    :param str mode: How points outside the row are filled (see \
+        scipy.ndimage.map_coordinates).
+    :param float cval: The fill value in 'constant' mode.
+    :returns: The shifted rows, with the dtype of the input.
+    """
+    shifts = np.asarray(shifts, dtype=np.float64)
+    result = np.empty_like(rows)
+    finite = np.isfinite(rows).all(axis=1)
+    if finite.all():
+        result[...] = _shift_rows(rows, shifts, mode, cval)
+    elif finite.any():
+        result[finite] = _shift_rows(rows[finite], shifts[finite], mode, cval)
+    for i in np.where(~finite)[0]:
+        result[i] = ndimage.shift(rows[i], shifts[i], mode=mode, cval=cval)
+    return result
+
+
+def _shift_rows(rows, shifts, mode, cval):
+    padded = np.pad(rows, ((1, 1), (0, 0)), mode='edge')
+    n_rows, length = rows.shape
+    coords = np.empty((2, n_rows, length))
+    coords[0] = np.arange(1, n_rows + 1)[:, np.newaxis]
+    coords[1] = np.arange(length) - shifts[:, np.newaxis]
+    return ndimage.map_coordinates(padded, coords, output=rows.dtype,
+                                   order=3, mode=mode, cval=cval)
@@ -24,6 +24,7 @@
 from savu.plugins.plugin import Plugin
 from savu.plugins.utils import register_plugin
 from savu.plugins.driver.cpu_plugin import CpuPlugin
+from savu.plugins.basic_operations.expression_engine import ExpressionEngine
 
 
 @register_plugin
@@ -31,7 +32,9 @@ class BasicOperations(Plugin, CpuPlugin):
     """ A class that performs basic mathematical operations on datasets.
     How should the information be passed to the plugin?
 
-    :param operations: Operations to perform. Default: [].
+    :param operations: Operations to perform, one for each output dataset, \
+        e.g. ['tomo1 + tomo2'].  Arithmetic operators and numpy ufuncs such \
+        as np.sqrt are allowed. Default: [].
     :param pattern: Pattern associated with the \
         datasets. Default: 'PROJECTION'.
     """
@@ -40,13 +43,12 @@ class BasicOperations(Plugin, CpuPlugin):
         super(BasicOperations, self).__init__("BasicOperations")
 
     def pre_process(self):
-        self.operations = self._amend_ops(self._set_data_mappings())
-        self.out_data = self._set_out_data_names()
+        in_names = [d.get_name() for d in self.get_in_datasets()]
+        self.engine = ExpressionEngine(self.parameters['operations'],
+                                       in_names, self._set_out_data_names())
 
     def process_frames(self, data):
-        for i in range(len(self.operations)):
-            exec(self.out_data[i] + "=" + self.operations[i])
-        return [eval(out) for out in self.out_data]
+        return self.engine.evaluate(data)
 
     def setup(self):
         """
@@ -78,26 +80,10 @@ class BasicOperations(Plugin, CpuPlugin):
     def get_max_frames(self):
         return 'multiple'
 
-    def _set_data_mappings(self):
-        mapping_dict = {}
-        in_datasets = self.get_in_datasets()
-        for i in range(len(in_datasets)):
-            mapping_dict[in_datasets[i].get_name()] = 'data[' + str(i) + ']'
-        return mapping_dict
-
     def _set_out_data_names(self):
         out_datasets = self.get_out_datasets()
         return [out_datasets[i].get_name() for i in range(len(out_datasets))]
 
-    def _amend_ops(self, mappings_dict):
-        operations = self.parameters['operations']
-        new_ops = []
-        for op in operations:
-            for key, value in mappings_dict.iteritems():
-                op = op.replace(key, value)
-            new_ops.append(op)
-        return new_ops
-
     def _get_associated_datasets(self):
         operations = self.parameters['operations']
         in_datasets = self.get_in_datasets()
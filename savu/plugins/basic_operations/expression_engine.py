@@ -0,0 +1,275 @@
+# Copyright 2014 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. module:: expression_engine
+   :platform: Unix
+   :synopsis: Compiles element-wise operations on datasets into a program of \
+   numpy ufuncs, evaluated in chunks with preallocated buffers.
+
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+
+"""
+
+import ast
+import numpy as np
+
+# the number of elements of each array evaluated at once
+CHUNK_SIZE = 2**16
+
+BINARY_OPERATORS = {ast.Add: np.add, ast.Sub: np.subtract,
+                    ast.Mult: np.multiply, ast.Div: np.divide,
+                    ast.FloorDiv: np.floor_divide, ast.Mod: np.remainder,
+                    ast.Pow: np.power}
+
+# the exponents (with their types) for which numpy's ** takes a fast path
+POWERS = {(int, 2): np.square, (float, 0.5): np.sqrt}
+
+FUNCTIONS = ['absolute', 'fabs', 'sign', 'negative', 'sqrt', 'square',
+             'exp', 'expm1', 'log', 'log10', 'log2', 'log1p', 'sin', 'cos',
+             'tan', 'arcsin', 'arccos', 'arctan', 'arctan2', 'sinh', 'cosh',
+             'tanh', 'hypot', 'floor', 'ceil', 'rint', 'power', 'minimum',
+             'maximum', 'fmin', 'fmax']
+UFUNCS = dict((name, getattr(np, name)) for name in FUNCTIONS)
+UFUNCS['abs'] = np.absolute
+
+NUMPY_MODULES = ['np', 'numpy']
+
+
+class ExpressionEngine(object):
+    """ Parses a list of operations on named datasets, e.g. \
+    ['tomo1 + tomo2', 'np.sqrt(result)'], into a single program of numpy \
+    ufuncs.  Only arithmetic operators, numbers and the ufuncs in FUNCTIONS \
+    are allowed.  Sub-expressions that appear more than once are evaluated \
+    once, and an operation may use the result of an earlier one by name.
+
+    :param list operations: The operation to create each output.
+    :param list in_names: The names of the input datasets, in order.
+    :param list out_names: The names of the outputs, in order.
+    :param int chunk_size: The number of elements evaluated at once.
+    """
+
+    def __init__(self, operations, in_names, out_names,
+                 chunk_size=CHUNK_SIZE):
+        if len(operations) != len(out_names):
+            raise ValueError("There are %d operations for %d output datasets"
+                             % (len(operations), len(out_names)))
+        self.chunk_size = chunk_size
+        # a repeated input name refers to the last of those datasets
+        self.inputs = dict((name, i) for i, name in enumerate(in_names))
+        # each instruction is (ufunc, argument references)
+        self.program = []
+        self.outputs = []
+        self._instructions = {}
+        self._plans = {}
+
+        names = {}
+        for op, out in zip(operations, out_names):
+            try:
+                tree = ast.parse(op.strip(), mode='eval')
+            except SyntaxError:
+                raise ValueError("Unable to parse the operation '%s'" % op)
+            names[out] = self.__compile(tree.body, names, op)
+            self.outputs.append(names[out])
+
+    def __compile(self, node, names, op):
+        """ Add the instructions to evaluate an ast node and return a \
+        reference to the result: ('in', index), ('const', value) or \
+        ('reg', instruction number). """
+        if isinstance(node, ast.Num):
+            return ('const', node.n)
+        if isinstance(node, ast.Name):
+            if node.id in self.inputs:
+                return ('in', self.inputs[node.id])
+            if node.id in names:
+                return names[node.id]
+            raise ValueError("Unknown dataset '%s' in the operation '%s'"
+                             % (node.id, op))
+        if isinstance(node, ast.BinOp) and \
+                type(node.op) in BINARY_OPERATORS:
+            args = [self.__compile(n, names, op)
+                    for n in [node.left, node.right]]
+            # the fast paths numpy takes for the ** operator
+            power = self.__get_key(args[1])[1:]
+            if isinstance(node.op, ast.Pow) and power in POWERS:
+                return self.__add(POWERS[power], args[:1])
+            return self.__add(BINARY_OPERATORS[type(node.op)], args)
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+            return self.__add(np.negative,
+                              [self.__compile(node.operand, names, op)])
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.UAdd):
+            return self.__compile(node.operand, names, op)
+        if isinstance(node, ast.Call):
+            ufunc = self.__get_ufunc(node.func, op)
+            if node.keywords or getattr(node, 'starargs', None) or \
+                    getattr(node, 'kwargs', None):
+                raise ValueError("Only positional arguments are allowed in "
+                                 "the operation '%s'" % op)
+            if len(node.args) != ufunc.nin:
+                raise ValueError("%s takes %d arguments in the operation '%s'"
+                                 % (ufunc.__name__, ufunc.nin, op))
+            return self.__add(
+                ufunc, [self.__compile(n, names, op) for n in node.args])
+        raise ValueError("%s is not allowed in the operation '%s'"
+                         % (type(node).__name__, op))
+
+    def __get_ufunc(self, func, op):
+        name = None
+        if isinstance(func, ast.Name):
+            name = func.id
+        elif isinstance(func, ast.Attribute) and \
+                isinstance(func.value, ast.Name) and \
+                func.value.id in NUMPY_MODULES:
+            name = func.attr
+        if name not in UFUNCS:
+            raise ValueError("Unknown function in the operation '%s'.  Choose "
+                             "from %s" % (op, ', '.join(sorted(UFUNCS))))
+        return UFUNCS[name]
+
+    def __add(self, ufunc, args):
+        """ Add an instruction, unless it is already in the program, and
+        return a reference to its result.  Instructions with constant
+        arguments are evaluated now. """
+        if all(a[0] == 'const' for a in args):
+            return ('const', ufunc(*[a[1] for a in args]))
+        key = (ufunc.__name__, tuple(self.__get_key(a) for a in args))
+        if key not in self._instructions:
+            self.program.append((ufunc, args))
+            self._instructions[key] = ('reg', len(self.program)-1)
+        return self._instructions[key]
+
+    def __get_key(self, ref):
+        """ A key for a reference that tells apart constants that compare
+        equal but have different types, such as 2 and 2.0. """
+        return (ref[0], type(ref[1]), ref[1]) if ref[0] == 'const' else ref
+
+    def _get_plan(self, dtypes):
+        """ Find where each instruction writes its result: directly into an
+        output array, or into a temporary buffer that is reused once the
+        result is no longer needed. """
+        key = tuple(dtypes)
+        if key in self._plans:
+            return self._plans[key]
+
+        # the data type of each result, from a single element of each input
+        probe = [np.ones(1, dtype=d) for d in dtypes]
+        values = []
+        with np.errstate(all='ignore'):
+            for ufunc, args in self.program:
+                values.append(ufunc(*[self.__get(a, probe, values)
+                                      for a in args]))
+            out_dtypes = [np.asarray(self.__get(r, probe, values)).dtype
+                          for r in self.outputs]
+
+        last_use = {}
+        for i, (ufunc, args) in enumerate(self.program):
+            for a in args:
+                if a[0] == 'reg':
+                    last_use[a[1]] = i
+
+        # an instruction writes straight into the first output it produces,
+        # and any other outputs are copied at the end
+        storage, copies = {}, []
+        for j, ref in enumerate(self.outputs):
+            if ref[0] == 'reg' and ref[1] not in storage:
+                storage[ref[1]] = ('out', j)
+            else:
+                copies.append((j, ref))
+                if ref[0] == 'reg':
+                    last_use[ref[1]] = len(self.program)
+
+        buffers, free = [], []
+        for i, (ufunc, args) in enumerate(self.program):
+            for a in set(args):
+                if a[0] == 'reg' and last_use[a[1]] == i and \
+                        storage[a[1]][0] == 'tmp':
+                    free.append(storage[a[1]][1])
+            if i in storage:
+                continue
+            dtype = values[i].dtype
+            matches = [b for b in free if buffers[b] == dtype]
+            if matches:
+                free.remove(matches[0])
+                storage[i] = ('tmp', matches[0])
+            else:
+                buffers.append(dtype)
+                storage[i] = ('tmp', len(buffers)-1)
+            if i not in last_use:
+                free.append(storage[i][1])
+
+        used = sorted(set(a[1] for ufunc, args in self.program for a in args
+                          if a[0] == 'in') |
+                      set(r[1] for r in self.outputs if r[0] == 'in'))
+        plan = {'storage': storage, 'copies': copies, 'buffers': buffers,
+                'out_dtypes': out_dtypes, 'inputs': used}
+        self._plans[key] = plan
+        return plan
+
+    def __get(self, ref, inputs, values):
+        if ref[0] == 'in':
+            return inputs[ref[1]]
+        if ref[0] == 'const':
+            return ref[1]
+        return values[ref[1]]
+
+    def evaluate(self, data):
+        """ Evaluate all the operations in one pass over the data.
+
+        :param list data: A numpy array for each input dataset.
+        :returns: A numpy array for each output.
+        :rtype: list(np.ndarray)
+        """
+        plan = self._get_plan([d.dtype for d in data])
+        shapes = set(data[i].shape for i in plan['inputs'])
+        if len(shapes) != 1:
+            return self.__evaluate_broadcast(data)
+        shape = shapes.pop()
+
+        results = [np.empty(shape, dtype=d) for d in plan['out_dtypes']]
+        flat_in = [d.reshape(-1) if i in plan['inputs'] else None
+                   for i, d in enumerate(data)]
+        flat_out = [r.reshape(-1) for r in results]
+        size = int(np.prod(shape))
+        # chunks keep the temporary buffers in cache, so are only needed if
+        # there are any
+        chunk = max(1, min(self.chunk_size, size) if plan['buffers'] else size)
+        buffers = [np.empty(chunk, dtype=d) for d in plan['buffers']]
+
+        for start in range(0, size, chunk):
+            sl = slice(start, min(start + chunk, size))
+            n = sl.stop - sl.start
+            inputs = [f[sl] if f is not None else None for f in flat_in]
+            outputs = [f[sl] for f in flat_out]
+            temps = [b[:n] for b in buffers]
+            self.__run(plan, inputs, outputs, temps)
+        return results
+
+    def __run(self, plan, inputs, outputs, temps):
+        values = [None]*len(self.program)
+        for i, (ufunc, args) in enumerate(self.program):
+            where, index = plan['storage'][i]
+            out = outputs[index] if where == 'out' else temps[index]
+            values[i] = ufunc(*[self.__get(a, inputs, values) for a in args],
+                              out=out)
+        for j, ref in plan['copies']:
+            np.copyto(outputs[j], self.__get(ref, inputs, values),
+                      casting='unsafe')
+
+    def __evaluate_broadcast(self, data):
+        """ Evaluate the operations on inputs of different shapes, with
+        numpy broadcasting and no preallocated buffers. """
+        values = []
+        for ufunc, args in self.program:
+            values.append(ufunc(*[self.__get(a, data, values) for a in args]))
+        return [np.array(self.__get(r, data, values)) for r in self.outputs]
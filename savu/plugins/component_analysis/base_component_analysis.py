@@ -25,36 +25,48 @@ from savu.plugins.plugin import Plugin
 from savu.plugins.driver.cpu_plugin import CpuPlugin
 import sys
 import numpy as np
+import scipy.linalg
+from mpi4py import MPI
 
 
 class BaseComponentAnalysis(Plugin, CpuPlugin):
     """
     A base plugin for doing component analysis. This sorts out the main \
-    features of a component analysis
+    features of a component analysis.  The components are found from the \
+    covariance of the spectra, accumulated in blocks by each process and \
+    summed over all processes, before the spectra are projected onto them.
 
     :param in_datasets: A list of the dataset(s) to process. Default: [].
     :param out_datasets: A list of the dataset(s) to \
         process. Default: ['scores', 'eigenvectors'].
     :param number_of_components: The number expected components. Default: 3.
-    :param chunk: The chunk to work on. Default: 'SINOGRAM'.
     :param whiten: To subtract the mean or not. Default: 1.
     """
 
     def __init__(self, name):
         super(BaseComponentAnalysis, self).__init__(name)
+        self.mean = None
+        self.components = None
+        self.projection = None
 
     def get_max_frames(self):
-        return self.spectra_length[0]
+        return 'multiple'
 
     def get_plugin_pattern(self):
-        return self.parameters['chunk']
+        return 'SPECTRUM'
 
     def setup(self):
         self.exp.log(self.name + " Setting up the component analysis")
         # set up the output dataset that is created by the plugin
         in_dataset, out_dataset = self.get_datasets()
-        self.spectra_length = (in_dataset[0].get_shape()[-1],)
-        other_dims = in_dataset[0].get_shape()[:-1]
+        shape = in_dataset[0].get_shape()
+        if 'SPECTRUM' not in in_dataset[0].get_data_patterns():
+            spectrum = {'core_dims': (len(shape)-1,),
+                        'slice_dims': tuple(range(len(shape)-1))}
+            in_dataset[0].add_pattern("SPECTRUM", **spectrum)
+
+        self.spectra_length = (shape[-1],)
+        other_dims = shape[:-1]
         num_comps = self.parameters['number_of_components']
         self.images_shape = other_dims + (num_comps,)
         components_shape = (num_comps,) + self.spectra_length
@@ -73,15 +85,25 @@ class BaseComponentAnalysis(Plugin, CpuPlugin):
 
         in_pData, out_pData = self.get_plugin_datasets()
         plugin_pattern = self.get_plugin_pattern()
-#         dirs = range(len(out_dataset[0].get_shape()))
-#         vxz = {'core_dims': (0,1), 'slice_dims': (2,)}
-#         in_dataset[0].add_pattern("VOLUME_XZ", **vxz)
         in_pData[0].plugin_data_setup(plugin_pattern, self.get_max_frames())
-        out_pData[0].plugin_data_setup(plugin_pattern, num_comps)
+        out_pData[0].plugin_data_setup(plugin_pattern, self.get_max_frames())
         out_pData[1].plugin_data_setup("SPECTRUM", num_comps)
+        # the components depend on all the spectra, so are written once
+        out_pData[1].set_unprocessed()
 
         self.exp.log(self.name + " End")
 
+    def process_frames(self, data):
+        spectra = self.remove_nan_inf(data[0]) - self.mean
+        return [np.dot(spectra, self.projection.T)]
+
+    def post_process(self):
+        eigenvectors = self.get_out_datasets()[1]
+        if eigenvectors.data is None:
+            eigenvectors.data = self.components
+        elif self.get_communicator().rank == 0:
+            eigenvectors.data[...] = self.components
+
     def nInput_datasets(self):
         return 1
 
@@ -97,3 +119,78 @@ class BaseComponentAnalysis(Plugin, CpuPlugin):
         data[np.isnan(data)]=0
         data = np.nan_to_num(data)
         return data
+
+    def _get_spectra(self):
+        """ Read this process's share of the spectra from the input dataset,
+        in blocks of the first dimension.
+
+        :returns: A generator of arrays of shape (spectra, channels)
+        """
+        in_data = self.get_in_datasets()[0]
+        shape = in_data.get_shape()
+        starts, stops, steps, _ = \
+            in_data.get_preview().get_starts_stops_steps()
+        if starts is None:
+            starts, steps = [0]*len(shape), [1]*len(shape)
+
+        comm = self.get_communicator()
+        rows = np.array_split(np.arange(shape[0]), comm.size)[comm.rank]
+        mft = in_data._get_plugin_data()._get_max_frames_transfer()
+        nRows = max(1, int(mft/np.prod(shape[1:-1])))
+
+        sl = [slice(starts[d], starts[d] + shape[d]*steps[d], steps[d])
+              for d in range(len(shape))]
+        for i in range(0, len(rows), nRows):
+            first, last = rows[i], rows[min(i+nRows, len(rows))-1]
+            sl[0] = slice(starts[0] + first*steps[0],
+                          starts[0] + (last+1)*steps[0], steps[0])
+            block = np.asarray(in_data.data[tuple(sl)], dtype=np.float64)
+            yield self.remove_nan_inf(block.reshape(-1, shape[-1]))
+
+    def _get_covariance(self):
+        """ The first pass over the data.  The mean and scatter matrix of the
+        spectra are accumulated block by block and combined over all
+        processes.
+
+        :returns: The number of spectra, their mean and scatter matrix
+        :rtype: int, np.ndarray, np.ndarray
+        """
+        nChannels = self.spectra_length[0]
+        n, mean, scatter = 0, np.zeros(nChannels), \
+            np.zeros((nChannels, nChannels))
+        for block in self._get_spectra():
+            bmean = block.mean(axis=0)
+            diff = block - bmean
+            n, mean, scatter = self.__combine(
+                n, mean, scatter, len(block), bmean, np.dot(diff.T, diff))
+
+        comm = self.get_communicator()
+        total = comm.allreduce(n, op=MPI.SUM)
+        gmean = mean*n
+        comm.Allreduce(MPI.IN_PLACE, gmean, op=MPI.SUM)
+        gmean /= total
+        # the spread of the process means about the global mean
+        scatter += n*np.outer(mean - gmean, mean - gmean)
+        comm.Allreduce(MPI.IN_PLACE, scatter, op=MPI.SUM)
+        return total, gmean, scatter
+
+    def __combine(self, n1, mean1, scatter1, n2, mean2, scatter2):
+        """ Combine the mean and scatter matrices of two sets of spectra. """
+        n = n1 + n2
+        delta = mean2 - mean1
+        mean = mean1 + delta*n2/float(n)
+        scatter = scatter1 + scatter2 + np.outer(delta, delta)*n1*n2/float(n)
+        return n, mean, scatter
+
+    def _get_principal_axes(self, scatter):
+        """ Get the largest eigenvalues of a scatter matrix, in descending
+        order, and their eigenvectors (one per row).  The sign of each
+        eigenvector is chosen to make its largest element positive. """
+        nChannels = scatter.shape[0]
+        num_comps = self.parameters['number_of_components']
+        values, vectors = scipy.linalg.eigh(
+            scatter, eigvals=(nChannels - num_comps, nChannels - 1))
+        values, vectors = values[::-1], vectors[:, ::-1].T
+        idx = np.argmax(np.abs(vectors), axis=1)
+        vectors *= np.sign(vectors[range(num_comps), idx])[:, np.newaxis]
+        return values, vectors
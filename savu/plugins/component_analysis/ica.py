@@ -21,10 +21,10 @@
 
 """
 import logging
+from mpi4py import MPI
 from savu.plugins.utils import register_plugin
 from savu.plugins.component_analysis.base_component_analysis \
     import BaseComponentAnalysis
-from sklearn.decomposition import FastICA
 import numpy as np
 
 
@@ -39,28 +39,56 @@ class Ica(BaseComponentAnalysis):
     def __init__(self):
         super(Ica, self).__init__("Ica")
 
-    def process_frames(self, data):
-        logging.debug("I am starting the old componenty vous")
-        data = data[0]
-        #print 'The length of the data is'+str(data.shape)
-        sh = data.shape
-        newshape = (np.prod(sh[:-1]), sh[-1])
-        #print "The shape of the data is:"+str(data.shape) + str(newshape)
-        data = np.reshape(data, (newshape))
-        # data will already be shaped correctly
-        logging.debug("Making the matrix")
-        ica = FastICA(n_components=self.parameters['number_of_components'],
-                      algorithm='parallel',
-                      whiten=self.parameters['whiten'],
-                      w_init=self.parameters['w_init'],
-                      random_state=self.parameters['random_state'])
-        logging.debug("Performing the fit")
-        data = self.remove_nan_inf(data)  #otherwise the fit flags up an error for obvious reasons
-#         print "I'm here"
-        S_ = ica.fit_transform(data)
-#         print "S_Shape is:"+str(S_.shape)
-#         print "self.images_shape:"+str(self.images_shape)
-        scores = np.reshape(S_, (self.images_shape))
-        eigenspectra = ica.components_
-        logging.debug("mange-tout")
-        return [scores, eigenspectra]
+    def pre_process(self):
+        logging.debug("Starting the ICA")
+        if not self.parameters['whiten']:
+            logging.warn("%s always whitens the data", self.name)
+        n, self.mean, scatter = self._get_covariance()
+        variance, axes = self._get_principal_axes(scatter/n)
+        whitening = axes/np.sqrt(variance)[:, np.newaxis]
+
+        # a second pass: only the whitened spectra are held in memory
+        whitened = [np.dot(whitening, (spectra - self.mean).T)
+                    for spectra in self._get_spectra()]
+        whitened = np.hstack(whitened) if whitened else \
+            np.zeros((len(whitening), 0))
+        unmixing = self.__fast_ica(whitened, n)
+        self.components = np.dot(unmixing, whitening)
+        self.projection = self.components
+
+    def __fast_ica(self, X, n, max_iter=200, tol=1e-4):
+        """ The parallel FastICA algorithm, with the logcosh function, where
+        the sums over the whitened spectra are combined over all processes.
+
+        :param np.ndarray X: This process's whitened spectra, one per column.
+        :param int n: The total number of spectra.
+        :returns: The unmixing matrix.
+        """
+        comm = self.get_communicator()
+        nComps = len(X)
+        w_init = self.parameters['w_init']
+        if w_init is None:
+            state = np.random.RandomState(self.parameters['random_state'])
+            w_init = state.normal(size=(nComps, nComps))
+        W = self.__sym_decorrelation(np.asarray(w_init, dtype=np.float64))
+
+        for i in range(max_iter):
+            gwtx = np.tanh(np.dot(W, X))
+            sums = np.hstack([np.dot(gwtx, X.T),
+                              (1 - gwtx**2).sum(axis=1)[:, np.newaxis]])
+            comm.Allreduce(MPI.IN_PLACE, sums, op=MPI.SUM)
+            W1 = self.__sym_decorrelation(
+                sums[:, :nComps]/n - sums[:, nComps:]/n*W)
+            lim = max(abs(abs(np.diag(np.dot(W1, W.T))) - 1))
+            W = W1
+            if lim < tol:
+                break
+        else:
+            logging.warn("%s did not converge in %d iterations", self.name,
+                         max_iter)
+        return W
+
+    def __sym_decorrelation(self, W):
+        """ Symmetric decorrelation: W <- (W W^T)^{-1/2} W """
+        s, u = np.linalg.eigh(np.dot(W, W.T))
+        return np.dot(np.dot(u*(1./np.sqrt(s)), u.T), W)
@@ -13,9 +13,9 @@
 # limitations under the License.
 
 """
-.. module:: ica
+.. module:: pca
    :platform: Unix
-   :synopsis: A plugin to fit peaks
+   :synopsis: A plugin to perform principal component analysis
 
 .. moduleauthor:: Aaron Parsons <scientificsoftware@diamond.ac.uk>
 
@@ -24,37 +24,25 @@ import logging
 from savu.plugins.utils import register_plugin
 from savu.plugins.component_analysis.base_component_analysis \
     import BaseComponentAnalysis
-from sklearn.decomposition import PCA
 import numpy as np
 
 
 @register_plugin
 class Pca(BaseComponentAnalysis):
     """
-    This plugin performs independent component analysis on XRD/XRF spectra.
+    This plugin performs principal component analysis on XRD/XRF spectra.
     """
 
     def __init__(self):
         super(Pca, self).__init__("Pca")
 
-    def process_frames(self, data):
+    def pre_process(self):
         logging.debug("Starting the PCA")
-        data = data[0]
-        sh = data.shape
-        newshape = (np.prod(sh[:-1]), sh[-1])
-        data = np.reshape(data, (newshape))
-        # data will already be shaped correctly
-        logging.debug("Making the matrix")
-        pca = PCA(n_components=self.parameters['number_of_components'],
-                      whiten=self.parameters['whiten'])
-        logging.debug("Performing the fit")
-        data = self.remove_nan_inf(data)  #otherwise the fit flags up an error for obvious reasons
-#         print "I'm here"
-        S_ = pca.fit_transform(data)
-
-#         print "S_Shape is:"+str(S_.shape)
-#         print "self.images_shape:"+str(self.images_shape)
-        loading = np.reshape(S_, (self.images_shape))
-        scores = pca.components_
-        logging.debug("mange-tout")
-        return [loading, scores]
+        n, self.mean, scatter = self._get_covariance()
+        variance, self.components = \
+            self._get_principal_axes(scatter/max(n - 1, 1))
+        self.projection = self.components
+        if self.parameters['whiten']:
+            # scale the scores to unit variance
+            self.projection = \
+                self.components/np.sqrt(variance)[:, np.newaxis]
@@ -24,7 +24,7 @@ from savu.plugins.filters.base_filter import BaseFilter
 from savu.plugins.driver.cpu_plugin import CpuPlugin
 from savu.plugins.utils import register_plugin
 
-from skimage.transform import rotate
+from savu.plugins.corrections.utils.remap_utils import Remap
 import numpy as np
 
 
@@ -56,11 +56,21 @@ class CameraRotCorrection(BaseFilter, CpuPlugin):
         super(CameraRotCorrection, self).__init__("CameraRotCorrection")
 
     def pre_process(self):
-        pass
-            
+        in_pData = self.get_plugin_in_datasets()[0]
+        self.slice_dir = in_pData.get_slice_dimension()
+        frame_shape = [n for i, n in enumerate(in_pData.get_shape())
+                       if i != self.slice_dir]
+        # the same rotation is applied to every frame, so is calculated once
+        self.remap = Remap.rotation(frame_shape, self.angle, self.centre)
+        self.frame_slice = tuple([slice(None)] + self.new_slice)
+
     def process_frames(self, data):
-        return rotate(data[0].astype(np.float64), self.angle, center=\
-        self.centre)[self.new_slice]
+        frames = np.rollaxis(data[0], self.slice_dir, 0)
+        result = self.remap(frames, clip=True)[self.frame_slice]
+        return np.rollaxis(result, 0, self.slice_dir + 1)
+
+    def is_thread_safe(self):
+        return True
 
     def post_process(self):
         pass
@@ -68,7 +78,7 @@ class CameraRotCorrection(BaseFilter, CpuPlugin):
     def setup(self):
         in_dataset, out_dataset = self.get_datasets()
         in_pData, out_pData = self.get_plugin_datasets()
-        in_pData[0].plugin_data_setup('PROJECTION', 'single')
+        in_pData[0].plugin_data_setup('PROJECTION', 'multiple')
         det_y = in_dataset[0].get_data_dimension_by_axis_label('detector_y')
         det_x = in_dataset[0].get_data_dimension_by_axis_label('detector_x')
 
@@ -125,5 +135,5 @@ class CameraRotCorrection(BaseFilter, CpuPlugin):
         out_dataset[0].create_dataset(patterns=in_dataset[0],
                                       axis_labels=in_dataset[0],
                                       shape=tuple(self.shape))
-        out_pData[0].plugin_data_setup('PROJECTION', 'single')
+        out_pData[0].plugin_data_setup('PROJECTION', 'multiple')
 
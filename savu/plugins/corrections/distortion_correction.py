@@ -27,7 +27,7 @@ from savu.plugins.filters.base_filter import BaseFilter
 from savu.plugins.driver.cpu_plugin import CpuPlugin
 from savu.plugins.utils import register_plugin
 from savu.data.plugin_list import CitationInformation
-import unwarp
+from savu.plugins.corrections.utils.remap_utils import Remap
 
 
 @register_plugin
@@ -48,6 +48,7 @@ class DistortionCorrection(BaseFilter, CpuPlugin):
 
     def __init__(self):
         super(DistortionCorrection, self).__init__("DistortionCorrection")
+        self.remap = None
 
     def pre_process(self):
         in_pData = self.get_plugin_in_datasets()[0]
@@ -73,12 +74,11 @@ class DistortionCorrection(BaseFilter, CpuPlugin):
         centre[0] -= shift[det_x]
         centre[1] -= shift[det_y]
 
-        # pass two empty arrays of frame chunk size
-        unwarp.setcoeff(*self.parameters['polynomial_coeffs'])
-        unwarp.setctr(*centre)
-        plugin_data_shape = in_pData.get_shape()
-        temp_array = np.empty(plugin_data_shape, dtype=np.float32)
-        unwarp.setup(temp_array, temp_array)
+        # the interpolation table is calculated once and only read by
+        # process_frames, so frames may be processed concurrently
+        frame_shape = in_pData.get_shape()[1:]
+        self.remap = Remap.radial(frame_shape, tuple(centre),
+                                  self.parameters['polynomial_coeffs'])
 
         self.new_slice = [slice(None)] * 3
         orig_shape = self.get_in_datasets()[0].get_shape()
@@ -87,12 +87,15 @@ class DistortionCorrection(BaseFilter, CpuPlugin):
                 slice(self.crop, orig_shape[ddir] - self.crop)
 
     def process_frames(self, data):
-        result = np.empty_like(data[0])
-        unwarp.run(data[0], result)
+        result = self.get_thread_buffer('remap', data[0].shape)
+        self.remap(data[0], out=result)
         return result[self.new_slice]
 
     def post_process(self):
-        unwarp.cleanup()
+        self.remap = None
+
+    def is_thread_safe(self):
+        return True
 
     def setup(self):
         # set up the output dataset that is created by the plugin
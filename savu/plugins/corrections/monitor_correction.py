@@ -46,17 +46,26 @@ class MonitorCorrection(Plugin, CpuPlugin):
         logging.debug("correcting data")
         super(MonitorCorrection, self).__init__("MonitorCorrection")
 
+    def pre_process(self):
+        self.nom_scale = float(self.parameters['nominator_scale'])
+        self.denom_scale = float(self.parameters['denominator_scale'])
+        self.nom_off = float(self.parameters['nominator_offset'])
+        self.denom_off = float(self.parameters['denominator_offset'])
+
     def process_frames(self, data):
-        monitor = data[1]
-        to_be_corrected = data[0]
-        nom_scale = self.parameters['nominator_scale']
-        denom_scale = self.parameters['denominator_scale']
-        nom_off = self.parameters['nominator_offset']
-        denom_off = self.parameters['denominator_offset']
-        monitor = monitor * denom_scale + denom_off
-        to_be_corrected = to_be_corrected * nom_scale + nom_off
-        out = to_be_corrected / monitor
-        return out
+        out = data[0] * self.nom_scale
+        out += self.nom_off
+        monitor = data[1] * self.denom_scale
+        monitor += self.denom_off
+        # the monitor may broadcast against the data, so only divide in place
+        # when the shape of the result is unchanged
+        if monitor.shape == out.shape:
+            out /= monitor
+            return out
+        return out / monitor
+
+    def is_thread_safe(self):
+        return True
 
     def setup(self):
         in_datasets, out_datasets = self.get_datasets()
@@ -25,7 +25,8 @@ from savu.plugins.utils import register_plugin
 
 import scipy.ndimage.interpolation as sip
 import numpy as np
-import skimage.transform as sktf
+
+from savu.plugins.corrections.utils.remap_utils import Remap
 
 
 
@@ -53,8 +54,8 @@ class SubpixelShift(BaseFilter, CpuPlugin):
         get_data_dimension_by_axis_label('detector_x')
 
         out_dataset[0].create_dataset(in_dataset[0])
-        in_pData[0].plugin_data_setup('SINOGRAM', 'single')
-        out_pData[0].plugin_data_setup('SINOGRAM', 'single')
+        in_pData[0].plugin_data_setup('SINOGRAM', 'multiple')
+        out_pData[0].plugin_data_setup('SINOGRAM', 'multiple')
         if self.parameters['transform_module'] == 'skimage':
             self.process_frames = self.process_frames_skimage
         elif self.parameters['transform_module'] == 'scipy':
@@ -63,6 +64,10 @@ class SubpixelShift(BaseFilter, CpuPlugin):
             raise Exception('Transform module not supported.')
 
     def pre_process(self):
+        in_pData = self.get_plugin_in_datasets()[0]
+        self.slice_dir = in_pData.get_slice_dimension()
+        frame_shape = [n for i, n in enumerate(in_pData.get_shape())
+                       if i != self.slice_dir]
         self.xshift = float(self.parameters['x_shift'])
         if self.parameters['transform_module'] == 'skimage':
             self.xshift *= -1
@@ -73,17 +78,25 @@ class SubpixelShift(BaseFilter, CpuPlugin):
                 self.pad_slice = slice(self.det_x+\
                 int(np.floor(self.xshift)), self.det_x)
                 self.pad_col =self.det_x+int(np.floor(self.xshift)) -1
-            self.tf = sktf.SimilarityTransform(scale = 1, rotation = 0, \
-            translation = (self.xshift, 0))
-    
+            # the same shift is applied to every frame, so is calculated once
+            self.remap = Remap.translation(frame_shape, (self.xshift, 0))
+
     def process_frames_scipy(self, data):
-        return sip.shift(data[0], (self.xshift, 0), mode='nearest', order=3)
+        frames = np.rollaxis(data[0], self.slice_dir, 0)
+        tmpdata = np.array([sip.shift(frame, (self.xshift, 0),
+                                      mode='nearest', order=3)
+                            for frame in frames])
+        return np.rollaxis(tmpdata, 0, self.slice_dir + 1)
 
     def process_frames_skimage(self, data):
-        tmpdata = sktf.warp(data[0].astype(np.float64), self.tf)\
-        .astype(np.float32)
-        tmpdata[:,self.pad_slice] = tmpdata[:, self.pad_col][:,np.newaxis]
-        return tmpdata
+        frames = np.rollaxis(data[0], self.slice_dir, 0)
+        tmpdata = self.remap(frames, clip=True)
+        tmpdata[..., self.pad_slice] = \
+            tmpdata[..., self.pad_col][..., np.newaxis]
+        return np.rollaxis(tmpdata, 0, self.slice_dir + 1)
+
+    def is_thread_safe(self):
+        return True
 
     def post_process(self):
         pass
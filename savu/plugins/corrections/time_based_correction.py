@@ -42,21 +42,19 @@ class TimeBasedCorrection(BaseCorrection, CpuPlugin):
         super(TimeBasedCorrection, self).__init__(name)
 
     def pre_process(self):
-        self.count = 0
         inData = self.get_in_datasets()[0]
         pData = self.get_plugin_in_datasets()[0]
         self.mfp = inData._get_plugin_data()._get_max_frames_process()
         self.proj_dim = \
             inData.get_data_dimension_by_axis_label('rotation_angle')
         self.slice_dir = pData.get_slice_dimension()
-        nDims = len(pData.get_shape())
-        self.sslice = [slice(None)]*nDims
 
         self.image_key = inData.data.get_image_key()
         changes = np.where(np.diff(self.image_key) != 0)[0] + 1
         self.split_key = np.split(self.image_key, changes)
         self.split_idx = np.split(np.arange(len(self.image_key)), changes)
         self.data_key = inData.data.get_index(0)
+        self.reps_at = int(np.ceil(len(self.data_key)/float(self.mfp)))
 
         self.dark, self.dark_idx = self.calc_average(inData.data.dark(), 2)
         self.flat, self.flat_idx = self.calc_average(inData.data.flat(), 1)
@@ -64,6 +62,17 @@ class TimeBasedCorrection(BaseCorrection, CpuPlugin):
         inData.meta_data.set('multiple_dark', self.dark)
         inData.meta_data.set('multiple_flat', self.flat)
 
+        # the (before, after) groups and weights of every projection
+        self.dark_stack = np.array(self.dark)
+        self.flat_stack = np.array(self.flat)
+        projections = np.arange(len(self.data_key))
+        self.dark_frames, dist = \
+            self.find_nearest_frames(self.dark_idx, projections)
+        self.dark_dist = dist.astype(self.dark_stack.dtype)
+        self.flat_frames, dist = \
+            self.find_nearest_frames(self.flat_idx, projections)
+        self.flat_dist = dist.astype(self.flat_stack.dtype)
+
     def calc_average(self, data, key):
         im_key = np.where(self.image_key == key)[0]
         splits = np.where(np.diff(im_key) > 1)[0]+1
@@ -74,55 +83,73 @@ class TimeBasedCorrection(BaseCorrection, CpuPlugin):
         return mean_data, list_idx
 
     def process_frames(self, data):
-        proj = data[0]
-        frame = self.get_global_frame_index()[self.count]
-        flat = self.calculate_flat_field(
-                *self.find_nearest_frames(self.flat_idx, frame))
-        dark = self.calculate_dark_field(
-                *self.find_nearest_frames(self.dark_idx, frame))
+        proj = np.rollaxis(data[0], self.proj_dim, 0)
+        idx = self.get_projection_index(len(proj))
+        flat = self.get_flat_field(proj, idx)
+        dark = self.calculate_dark_field(self.dark_frames[idx],
+                                         self.dark_dist[idx])
 
         if self.parameters['in_range']:
             proj = self.in_range(proj, flat)
 
-        self.count += 1
-        return np.nan_to_num((proj-dark)/(flat-dark))
+        result = np.nan_to_num((proj-dark)/(flat-dark))
+        return np.rollaxis(result, 0, self.proj_dim+1)
+
+    def get_projection_index(self, nFrames):
+        """ The projection index of each frame in the current block. """
+        sl = self.get_current_slice_list()[0][self.slice_dir]
+        count = self.get_process_frames_counter()
+        current_idx = self.get_global_frame_index()[count]
+        start = (current_idx % self.reps_at)*self.mfp
+        end = start + len(np.arange(sl.start, sl.stop, sl.step))
+        # the final block is padded to the full number of frames
+        return np.pad(np.arange(start, end), (0, nFrames - (end - start)),
+                      'edge')
+
+    def get_flat_field(self, proj, idx):
+        """ The flat field of each frame in the block of projections. """
+        return self.calculate_flat_field(self.flat_frames[idx],
+                                         self.flat_dist[idx])
 
     def in_range(self, data, flat):
-        data[data > flat] = flat[data > flat]
-        return data
+        return np.minimum(data, flat)
 
     def find_nearest_frames(self, idx_list, value):
-        """ Find the index of the two entries that 'value' lies between in \
-            'idx_list' and calculate the distance between each of them.
+        """ Find the index of the two entries that each projection in \
+            'value' lies between in 'idx_list' and calculate the distance \
+            between each of them.
+
+        :returns: The (before, after) entries and distances, as arrays of \
+            shape (len(value), 2).
         """
         global_val = self.data_key[value]
-        # find which list (index) global_val belongs to
-        list_idx = [global_val in i for i in self.split_idx].index(True)
-        val_list = self.split_idx[list_idx]
-        # find length of list
-        length_list = len(val_list)
+        # find which list (index) each global_val belongs to
+        length_list = np.array([len(i) for i in self.split_idx])
+        list_start = np.cumsum(length_list) - length_list
+        list_idx = np.repeat(np.arange(len(length_list)),
+                             length_list)[global_val]
         # find position of global_val in list and distance from each end
-        pos = np.where(val_list == global_val)[0][0]
-        dist = [(length_list-pos)/float(length_list), pos/float(length_list)]
-
-        # find closest before and after idx_list entries
-        new_list = list(np.sort(np.append(idx_list, list_idx)))
-        new_idx = new_list.index(list_idx)
+        pos = global_val - list_start[list_idx]
+        length = length_list[list_idx].astype(np.float64)
+        dist = np.column_stack(((length - pos)/length, pos/length))
 
-        entry1 = new_idx-1 if new_idx != 0 else new_idx+1
-        entry2 = new_idx+1 if new_idx != len(new_list)-1 else new_idx-1
-        before = idx_list.index(new_list[entry1])
-        after = idx_list.index(new_list[entry2])
-
-        return [before, after], dist
+        # find closest before and after idx_list entries, or the nearest
+        # entry twice if there is none on one side
+        entry = np.searchsorted(idx_list, list_idx)
+        before = np.clip(entry - 1, 0, len(idx_list) - 1)
+        after = np.clip(entry, 0, len(idx_list) - 1)
+        return np.column_stack((before, after)), dist
 
     def calculate_flat_field(self, frames, distance):
-        return self.flat[frames[0]]*distance[0] + \
-            self.flat[frames[1]]*distance[1]
+        return self._interpolate(self.flat_stack, frames, distance)
 
     def calculate_dark_field(self, frames, distance):
-        return self.dark[frames[0]]*distance[0] + \
-            self.dark[frames[1]]*distance[1]
+        return self._interpolate(self.dark_stack, frames, distance)
+
+    def _interpolate(self, stack, frames, distance):
+        """ Weight the two entries of stack either side of each frame. """
+        weights = distance.T.reshape((2, -1) + (1,)*(stack.ndim - 1))
+        return stack[frames[:, 0]]*weights[0] + stack[frames[:, 1]]*weights[1]
 
-    def get_max_frames(self):
-        return 'single'
+    def is_thread_safe(self):
+        return True
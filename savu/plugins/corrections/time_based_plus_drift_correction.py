@@ -46,38 +46,47 @@ class TimeBasedPlusDriftCorrection(TimeBasedCorrection, CpuPlugin):
     def pre_process(self):
         super(TimeBasedPlusDriftCorrection, self).pre_process()
 
-        self.shift_array = np.zeros((len(self.data_idx), 2))
+        self.shift_array = np.zeros((len(self.data_key), 2))
         # find shift between flat field frames
         self.template = self.flat[0][100:300, 800:]
         #self.template = self.flat[0][10:20, 10:20]
+        self.flat_pos = \
+            [self.find_template(f, self.template) for f in self.flat]
         self.drift = self.calculate_flat_field_drift(self.template)
 
     def calculate_flat_field_drift(self, template):
         drift = []
         for i in range(len(self.flat)-1):
-            drift.append(self.calculate_shift(
-                self.flat[i], self.flat[i+1], template))
+            drift.append(self.flat_pos[i+1] - self.flat_pos[i])
         return drift
 
+    def find_template(self, im, template):
+        match = match_template(im, template)
+        return np.array(np.unravel_index(np.argmax(match), match.shape))
+
     def calculate_shift(self, im1, im2, template):
-        index = []
-        for im in [im1, im2]:
-            match = match_template(im, template)
-            index.append(np.unravel_index(np.argmax(match), match.shape))
-        index = np.array(index)
-        shift = index[1] - index[0]
-        return shift
+        return self.find_template(im2, template) - \
+            self.find_template(im1, template)
+
+    def get_flat_field(self, proj, idx):
+        """ The template matching is applied to each frame in turn, using
+        the precomputed groups and weights and the template position in
+        each group. """
+        return np.array([self.calculate_flat_field(
+            i, data, self.flat_frames[i], self.flat_dist[i])
+            for i, data in zip(idx, proj)])
 
     def calculate_flat_field(self, frame, data, frames, distance):
-        shift = self.calculate_shift(self.flat[frames[0]], data, self.template)
+        shift = self.find_template(data, self.template) - \
+            self.flat_pos[frames[0]]
         flat1 = sci_shift(self.flat[frames[0]], tuple(shift), cval=np.nan)
-        flat2 = sci_shift(self.flat[frames[1]], shift-self.drift[frames[0]],
-                          cval=np.nan)
+        drift = self.drift[frames[0]] if frames[1] > frames[0] else 0
+        flat2 = sci_shift(self.flat[frames[1]], shift-drift, cval=np.nan)
         flat1, flat2 = self.fill_nans(flat1, flat2)
 
         if frames[0] > 0:
             shift = shift + self.drift[frames[0]-1]
-        self.shift_array[np.where(self.data_idx == frame)[0]] = shift
+        self.shift_array[frame] = shift
         return flat1*distance[0] + flat2*distance[1]
 
     def fill_nans(self, im1, im2):
@@ -85,6 +94,9 @@ class TimeBasedPlusDriftCorrection(TimeBasedCorrection, CpuPlugin):
         im2[np.isnan(im2)] = im1[np.isnan(im2)]
         return im1, im2
 
+    def is_thread_safe(self):
+        return False
+
     def post_process(self):
         inData = self.get_in_datasets()[0]
         inData.meta_data.set('shift', self.shift_array)
@@ -0,0 +1,216 @@
+# Copyright 2014 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. module:: remap_utils
+   :platform: Unix
+   :synopsis: Geometric resampling of frames through a precomputed table of \
+       bilinear interpolation indices and weights.
+
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+
+"""
+
+import collections
+import numpy as np
+
+
+class Remap(object):
+    """ Resamples images at a fixed set of input coordinates with bilinear
+    interpolation.  The neighbours and weights of every output pixel are
+    calculated once, so applying the map to a block of frames is a few
+    gathers and multiply-adds in float32.
+
+    Coordinates follow skimage.transform.warp: the input (row, col) sampled
+    by each output pixel is given, and the modes are
+
+    * 'constant': neighbours outside the image have the value cval.
+    * 'edge': neighbours outside the image take the nearest edge value.
+    * 'valid': output pixels with any neighbour outside the image are cval.
+
+    :param tuple shape: The (rows, cols) shape of the input frames.
+    :param ndarray rows: The input row sampled by each output pixel.
+    :param ndarray cols: The input column sampled by each output pixel.
+    :param str mode: How to treat points outside the image.
+    :param float cval: The value outside the image.
+    """
+
+    _cache = collections.OrderedDict()
+    cache_size = 8
+
+    def __init__(self, shape, rows, cols, mode='constant', cval=0.0):
+        if mode not in ['constant', 'edge', 'valid']:
+            raise ValueError("Unknown remap mode %s" % mode)
+        self.in_shape = tuple(shape)
+        self.out_shape = np.shape(rows)
+        nrows, ncols = self.in_shape
+
+        rows = np.asarray(rows, dtype=np.float64).ravel()
+        cols = np.asarray(cols, dtype=np.float64).ravel()
+        r0, c0 = np.floor(rows), np.floor(cols)
+        dr, dc = rows - r0, cols - c0
+        taps = [(r0, c0, (1 - dr)*(1 - dc)), (r0, c0 + 1, (1 - dr)*dc),
+                (r0 + 1, c0, dr*(1 - dc)), (r0 + 1, c0 + 1, dr*dc)]
+
+        inside = [(r >= 0) & (r < nrows) & (c >= 0) & (c < ncols)
+                  for r, c, w in taps]
+        outside = ~np.logical_and.reduce(inside)
+        fill = np.zeros(rows.size)
+        index, weights = [], []
+        for (r, c, w), valid in zip(taps, inside):
+            if mode == 'valid':
+                w = np.where(outside, 0, w)
+            elif mode == 'constant':
+                fill += np.where(valid, 0, w)
+                w = np.where(valid, w, 0)
+            # neighbours with no weight are dropped, e.g. for an integer shift
+            if not np.any(w):
+                continue
+            r = np.clip(r, 0, nrows - 1)
+            c = np.clip(c, 0, ncols - 1)
+            index.append((r*ncols + c).astype(np.int32))
+            weights.append(w.astype(np.float32))
+
+        if mode == 'valid':
+            fill = outside.astype(np.float64)
+        self.index = np.array(index, dtype=np.int32).reshape(-1, rows.size)
+        self.weights = \
+            np.array(weights, dtype=np.float32).reshape(-1, rows.size)
+        self.cval = cval
+        self.fill = (cval*fill).astype(np.float32) \
+            if cval and mode != 'edge' else None
+
+    def __call__(self, data, out=None, clip=False):
+        """ Resample frames.
+
+        :param ndarray data: Frames of shape (..., rows, cols).
+        :param ndarray out: An optional float32 array for the result, of \
+            shape (...,) + out_shape.
+        :param bool clip: Clip each frame to the range of the input frame, \
+            keeping points set to cval, as skimage.transform.warp.
+        :returns: The float32 resampled frames.
+        """
+        lead = data.shape[:-2]
+        if data.shape[-2:] != self.in_shape:
+            raise ValueError("Frame shape %s does not match the remap %s"
+                             % (data.shape[-2:], self.in_shape))
+        frames = np.asarray(data, dtype=np.float32).reshape(
+            -1, self.in_shape[0]*self.in_shape[1])
+        shape = (frames.shape[0], self.index.shape[1])
+        result = np.empty(shape, dtype=np.float32) if out is None else \
+            out.reshape(shape)
+
+        if not len(self.index):
+            result[:] = 0
+        temp = np.empty_like(result) if len(self.index) > 1 else None
+        for n, (index, weights) in enumerate(zip(self.index, self.weights)):
+            target = result if n == 0 else temp
+            np.take(frames, index, axis=1, out=target, mode='clip')
+            target *= weights
+            if n:
+                result += temp
+        if self.fill is not None:
+            result += self.fill
+        if clip:
+            self._clip(frames, result)
+        return result.reshape(lead + self.out_shape)
+
+    def _clip(self, frames, result):
+        low = frames.min(axis=1)[:, np.newaxis]
+        high = frames.max(axis=1)[:, np.newaxis]
+        outside = (result == self.cval) & \
+            ((low > self.cval) | (high < self.cval))
+        np.clip(result, low, high, out=result)
+        result[outside] = self.cval
+
+    @classmethod
+    def _get_cached(cls, key, create):
+        """ Remaps are cached by their shape and transform, so the table is
+        only calculated once however many times it is requested. """
+        if key in cls._cache:
+            return cls._cache[key]
+        remap = create()
+        cls._cache[key] = remap
+        while len(cls._cache) > cls.cache_size:
+            cls._cache.popitem(last=False)
+        return remap
+
+    @classmethod
+    def affine(cls, shape, matrix, out_shape=None, mode='constant', cval=0.0):
+        """ A remap for a 3x3 matrix mapping output (x, y) coordinates to
+        input coordinates, as the inverse_map of skimage.transform.warp.
+
+        :param tuple shape: The (rows, cols) shape of the input frames.
+        :param ndarray matrix: The homogeneous affine matrix.
+        :param tuple out_shape: The output (rows, cols). Default: shape.
+        """
+        matrix = np.asarray(matrix, dtype=np.float64)
+        out_shape = tuple(shape) if out_shape is None else tuple(out_shape)
+        key = ('affine', tuple(shape), out_shape, tuple(matrix.ravel()),
+               mode, cval)
+
+        def create():
+            y, x = np.indices(out_shape, dtype=np.float64)
+            cols = matrix[0, 0]*x + matrix[0, 1]*y + matrix[0, 2]
+            rows = matrix[1, 0]*x + matrix[1, 1]*y + matrix[1, 2]
+            return cls(shape, rows, cols, mode=mode, cval=cval)
+        return cls._get_cached(key, create)
+
+    @classmethod
+    def rotation(cls, shape, angle, centre, mode='constant', cval=0.0):
+        """ A remap equivalent to skimage.transform.rotate.
+
+        :param float angle: The rotation in degrees (anticlockwise).
+        :param tuple centre: The (x, y) centre of rotation.
+        """
+        theta = np.deg2rad(angle)
+        rotate = np.array([[np.cos(theta), -np.sin(theta), 0],
+                           [np.sin(theta), np.cos(theta), 0], [0, 0, 1]])
+        to_centre = np.eye(3)
+        to_centre[:2, 2] = centre
+        from_centre = np.eye(3)
+        from_centre[:2, 2] = -np.asarray(centre, dtype=np.float64)
+        matrix = to_centre.dot(rotate).dot(from_centre)
+        return cls.affine(shape, matrix, mode=mode, cval=cval)
+
+    @classmethod
+    def translation(cls, shape, shift, mode='constant', cval=0.0):
+        """ A remap where each output pixel samples the input at its own
+        position plus shift, as skimage.transform.warp with a translation.
+
+        :param tuple shift: The (x, y) translation.
+        """
+        matrix = np.eye(3)
+        matrix[:2, 2] = shift
+        return cls.affine(shape, matrix, mode=mode, cval=cval)
+
+    @classmethod
+    def radial(cls, shape, centre, coeffs, mode='valid', cval=0.0):
+        """ A remap for a radial distortion, where an output pixel at
+        distance r from the centre samples the input at distance r*p(r),
+        with p(r) = a + b*r + c*r**2 + d*r**3 + e*r**4.
+
+        :param tuple centre: The (x, y) centre of distortion.
+        :param tuple coeffs: The polynomial coefficients (a, b, c, d, e).
+        """
+        key = ('radial', tuple(shape), tuple(centre), tuple(coeffs), mode,
+               cval)
+
+        def create():
+            y, x = np.indices(shape, dtype=np.float64)
+            dx, dy = x - centre[0], y - centre[1]
+            ratio = np.polyval(list(coeffs)[::-1], np.sqrt(dx**2 + dy**2))
+            return cls(shape, centre[1] + dy*ratio, centre[0] + dx*ratio,
+                       mode=mode, cval=cval)
+        return cls._get_cached(key, create)
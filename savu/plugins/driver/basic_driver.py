@@ -24,6 +24,8 @@
 import logging
 from mpi4py import MPI
 
+import savu.core.trace as trace
+
 
 class BasicDriver(object):
     """
@@ -36,21 +38,24 @@ class BasicDriver(object):
     def _run_plugin_instances(self, transport, communicator=MPI.COMM_WORLD):
         self.__set_communicator(communicator)
         logging.info("%s.%s", self.__class__.__name__, 'pre_process')
-        self.base_pre_process()
-        self.pre_process()
+        with trace.span('pre_process', 'driver'):
+            self.base_pre_process()
+            self.pre_process()
 
         msg = "Pre-process completed for %s" % self.__class__.__name__
         self.plugin_barrier(msg=msg)
 
         logging.info("%s.%s", self.__class__.__name__, 'process_frames')
-        transport._transport_process(self)
+        with trace.span('process_frames', 'driver'):
+            transport._transport_process(self)
 
         msg = "Process_frames completed for %s" % self.__class__.__name__
         self.plugin_barrier(msg=msg)
 
         logging.info("%s.%s", self.__class__.__name__, 'post_process')
-        self.post_process()
-        self.base_post_process()
+        with trace.span('post_process', 'driver'):
+            self.post_process()
+            self.base_post_process()
 
     def __set_communicator(self, comm):
         self._communicator = comm
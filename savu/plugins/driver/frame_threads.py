@@ -0,0 +1,74 @@
+# Copyright 2014 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. module:: frame_threads
+   :platform: Unix
+   :synopsis: A pool of threads, within a single process, that calls \
+       process_frames concurrently for plugins declared thread safe.
+
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+
+"""
+
+import logging
+import threading
+from multiprocessing.pool import ThreadPool
+
+
+class FrameState(threading.local):
+    """ The frame specific plugin state, held separately by each thread. """
+
+    def __init__(self):
+        self.pcount = 0
+        self.slice_list = None
+        self.buffers = {}
+
+
+class FrameThreads(object):
+    """ Runs the frames processed by a plugin over a pool of threads.
+
+    Only worthwhile for plugins whose process_frames spends most of its time
+    in code that releases the GIL (numpy, scipy, pyfftw or C libraries).
+    """
+
+    def __init__(self, plugin, nThreads):
+        self.plugin = plugin
+        self.nThreads = nThreads
+        self.state = FrameState()
+        self.pool = ThreadPool(nThreads)
+        plugin._set_thread_state(self.state)
+        logging.info("%s: processing frames with %s threads",
+                     plugin.name, nThreads)
+
+    def _map(self, func, items):
+        """ Apply func to each item concurrently, returning the results in
+        order.  The frame counter seen by each call is the same as if the
+        items had been processed serially. """
+        plugin = self.plugin
+        start = plugin.pcount
+
+        def run(args):
+            n, item = args
+            self.state.pcount = start + n
+            return func(item)
+
+        results = self.pool.map(run, list(enumerate(items)))
+        plugin.pcount = start + len(items)
+        return results
+
+    def _close(self):
+        self.pool.close()
+        self.pool.join()
+        self.plugin._set_thread_state(None)
@@ -0,0 +1,147 @@
+# Copyright 2014 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. module:: parameter_tuning
+   :platform: Unix
+   :synopsis: Holds the state of every parameter tuning instance of a plugin,\
+       allowing all instances to be processed in a single pass over the data.
+
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+
+"""
+
+import copy
+import logging
+
+_MISSING = object()
+
+
+class ParameterTuning(object):
+    """ Switches a plugin between its parameter tuning instances.
+
+    The attributes defined by the plugin class (rather than the framework)
+    are deep copied for each instance before ``pre_process``, so changes made
+    to them in place are not shared between instances.  Only these, and any
+    other attributes that ``pre_process`` replaces, are stored per instance,
+    so switching instance is a small dictionary update rather than a
+    snapshot of the whole plugin.
+    """
+
+    def __init__(self, plugin, param_idx, param_dims):
+        self.plugin = plugin
+        self.param_idx = param_idx
+        self.param_dims = param_dims
+        self.nInstances = len(param_idx)
+        self.states = []
+        self.keys = set()
+        self.current = None
+
+    def _pre_process(self):
+        """ Run the pre_process methods once for each tuning instance and
+        record the instance specific attributes. """
+        plugin = self.plugin
+        init = dict(vars(plugin))
+        local = self.__get_local_keys()
+        states = []
+        for n in range(self.nInstances):
+            self.__restore(init)
+            for key in local:
+                setattr(plugin, key, self.__copy(init[key]))
+            plugin._set_parameters_this_instance(self.param_idx[n])
+            logging.info("%s.%s (tuning instance %s)",
+                         plugin.__class__.__name__, 'pre_process', n)
+            plugin.base_pre_process()
+            plugin.pre_process()
+            state = dict((k, v) for k, v in vars(plugin).iteritems()
+                         if k in local or init.get(k, _MISSING) is not v)
+            self.keys.update(state.keys())
+            states.append(state)
+
+        # pcount is updated by each call to process_frames
+        self.keys.add('pcount')
+        for state in states:
+            for key in self.keys.difference(state.keys()):
+                state[key] = init.get(key, _MISSING)
+        self.states = states
+        self.current = None
+
+    def __get_local_keys(self):
+        """ The attributes of the plugin that are not set by the Plugin
+        class. """
+        from savu.plugins.plugin import Plugin
+        return vars(self.plugin).viewkeys() - vars(Plugin()).viewkeys()
+
+    def __copy(self, value):
+        """ A deep copy of an attribute that shares the experiment.  Values
+        that cannot be copied (e.g. bound methods) are shared. """
+        plugin = self.plugin
+        exp = getattr(plugin, 'exp', None)
+        try:
+            return copy.deepcopy(value, {id(exp): exp, id(plugin): plugin})
+        except Exception:
+            logging.debug("Sharing an attribute of %s between the tuning "
+                          "instances", plugin.name)
+            return value
+
+    def __restore(self, init):
+        """ Reset any attributes altered by a previous instance. """
+        plugin = self.plugin
+        for key in set(vars(plugin).keys()).difference(init.keys()):
+            delattr(plugin, key)
+        for key, value in init.iteritems():
+            if getattr(plugin, key, _MISSING) is not value:
+                setattr(plugin, key, value)
+
+    def _set_instance(self, n):
+        """ Switch the plugin to tuning instance n. """
+        if n == self.current:
+            return
+        plugin = self.plugin
+        if self.current is not None:
+            state = self.states[self.current]
+            for key in self.keys:
+                state[key] = getattr(plugin, key, _MISSING)
+
+        for key, value in self.states[n].iteritems():
+            if value is _MISSING:
+                if hasattr(plugin, key):
+                    delattr(plugin, key)
+            else:
+                setattr(plugin, key, value)
+        plugin._set_parameters_this_instance(self.param_idx[n])
+        self.current = n
+
+    def _post_process(self):
+        """ Run the post_process methods once for each tuning instance. """
+        plugin = self.plugin
+        for n in range(self.nInstances):
+            self._set_instance(n)
+            logging.info("%s.%s (tuning instance %s)",
+                         plugin.__class__.__name__, 'post_process', n)
+            plugin.post_process()
+            plugin.base_post_process()
+
+    def _get_instance_slice_list(self, slice_list, nData, n):
+        """ Amend an output transfer slice list to point at the tuning
+        dimensions of instance n.
+
+        :param tuple slice_list: A slice list for the output dataset.
+        :param int nData: The index of the output dataset.
+        :param int n: The tuning instance.
+        """
+        slice_list = list(slice_list)
+        for dim, value in zip(self.param_dims[nData], self.param_idx[n]):
+            slice_list[dim] = slice(value, value + 1, 1)
+        return tuple(slice_list)
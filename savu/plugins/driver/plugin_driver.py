@@ -24,7 +24,9 @@ import logging
 import numpy as np
 from mpi4py import MPI
 
+import savu.core.trace as trace
 from savu.plugins.driver.basic_driver import BasicDriver
+from savu.plugins.driver.parameter_tuning import ParameterTuning
 
 
 class PluginDriver(BasicDriver):
@@ -51,7 +53,10 @@ class PluginDriver(BasicDriver):
         out_data_dims = [len(d.get_shape()) for d in out_data]
         param_dims = [range(d - len(extra_dims), d) for d in out_data_dims]
 
-        if extra_dims:
+        if extra_dims and self.__single_pass_tuning():
+            self.__run_single_pass(transport, param_idx, param_dims)
+            repeat = 0
+        elif extra_dims:
             init_vars = self.__get_local_dict()
 
         for i in range(repeat):
@@ -70,6 +75,40 @@ class PluginDriver(BasicDriver):
         for j in range(len(out_data)):
             out_data[j].set_shape(out_data[j].data.shape)
 
+    def __single_pass_tuning(self):
+        """ Determine whether all parameter tuning instances should be
+        processed in a single pass over the data. """
+        sys_params = self.exp.meta_data.get('system_params')
+        return sys_params.get('parameter_tuning', 'repeat') == 'single_pass'
+
+    def __run_single_pass(self, transport, param_idx, param_dims):
+        """ Transfer each block of data once and process it for every set of
+        tuning parameters, with the results of each written to the relevant
+        index of the extra tuning dimensions. """
+        out_data = self.get_out_datasets()
+        for j in range(len(out_data)):
+            out_data[j]._get_plugin_data()\
+                .set_fixed_dimensions(param_dims[j], param_idx[0])
+
+        tuning = ParameterTuning(self, param_idx, param_dims)
+        logging.info("%s.%s", self.__class__.__name__, 'pre_process')
+        with trace.span('pre_process', 'driver'):
+            tuning._pre_process()
+        msg = "Pre-process completed for %s" % self.__class__.__name__
+        self.plugin_barrier(msg=msg)
+
+        self._set_parameter_tuning(tuning)
+        logging.info("%s.%s", self.__class__.__name__, 'process_frames')
+        with trace.span('process_frames', 'driver'):
+            transport._transport_process(self)
+        self._set_parameter_tuning(None)
+
+        msg = "Process_frames completed for %s" % self.__class__.__name__
+        self.plugin_barrier(msg=msg)
+        logging.info("%s.%s", self.__class__.__name__, 'post_process')
+        with trace.span('post_process', 'driver'):
+            tuning._post_process()
+
     def __get_local_dict(self):
         """ Gets the local variables of the class minus those from the Plugin
         class. """
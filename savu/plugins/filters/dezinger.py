@@ -47,8 +47,20 @@ class Dezinger(BaseFilter, CpuPlugin):
         super(Dezinger, self).__init__("Dezinger")
         self.warnflag = 0
         self.errflag = 0
+        self.dezinger = None
 
     def pre_process(self):
+        # the dezinger settings are held by a context, so frames may be
+        # processed concurrently
+        if hasattr(dezing, 'DezingContext'):
+            self.dezinger = dezing.DezingContext(
+                self.parameters['outlier_mu'], self.pad,
+                mode=self.parameters['mode'], nthreads=self._get_nthreads())
+        else:
+            self.dezinger = _GlobalDezinger(
+                self.parameters['outlier_mu'], self.pad,
+                mode=self.parameters['mode'])
+
         # Apply dezing to dark and flat images
         inData = self.get_in_datasets()[0]
         dark = inData.data.dark()
@@ -58,29 +70,20 @@ class Dezinger(BaseFilter, CpuPlugin):
 
         # dezing the dark field
         if dark.size:
-            (retval, self.warnflag, self.errflag) = dezing.setup_size(
-                dark.shape, self.parameters['outlier_mu'], self.pad,
-                mode=self.parameters['mode'])
             dark = self._dezing(np.pad(dark, pad_list, mode='edge'))
             inData.data.update_dark(dark[self.pad:-self.pad])
-            (retval, self.warnflag, self.errflag) = dezing.cleanup()
 
         # dezing the flat field
         if flat.size:
-            (retval, self.warnflag, self.errflag) = dezing.setup_size(
-                flat.shape, self.parameters['outlier_mu'],
-                self.pad, mode=self.parameters['mode'])
             flat = self._dezing(np.pad(flat, pad_list, mode='edge'))
             inData.data.update_flat(flat[self.pad:-self.pad])
-            (retval, self.warnflag, self.errflag) = dezing.cleanup()
 
-        # setup dezing for data
-        self._dezing_setup(self.data_size)
-
-    def _dezing_setup(self, shape):
-        (retval, self.warnflag, self.errflag) = \
-            dezing.setup_size(shape, self.parameters['outlier_mu'],
-                              self.pad, mode=self.parameters['mode'])
+    def _get_nthreads(self):
+        """ The number of threads used by each call to the dezinger: one if
+        frames are already processed over a pool of threads, otherwise all
+        the processors. """
+        sys_params = self.exp.meta_data.get('system_params')
+        return 1 if int(sys_params.get('threads_per_process', 1)) > 1 else 0
 
     def _process_calibration_frames(self, data):
         nSlices = data.shape[self.proj_dim] - 2*self.pad
@@ -94,16 +97,22 @@ class Dezinger(BaseFilter, CpuPlugin):
             result[tuple(sl)] = self._dezing(data[tuple(sl)])
         return result
 
-    def _dezing(self, data):
-        result = np.empty_like(data)
-        (retval, self.warnflag, self.errflag) = dezing.run(data, result)
+    def _dezing(self, data, result=None):
+        result = np.empty_like(data) if result is None else result
+        self.dezinger.run(data, result)
         return result
 
     def process_frames(self, data):
-        return self._dezing(data[0])
+        result = self.get_thread_buffer('dezing', data[0].shape, data[0].dtype)
+        return self._dezing(data[0], result)
 
     def post_process(self):
-        (retval, self.warnflag, self.errflag) = dezing.cleanup()
+        if isinstance(self.dezinger, _GlobalDezinger):
+            self.dezinger.cleanup()
+        self.dezinger = None
+
+    def is_thread_safe(self):
+        return hasattr(dezing, 'DezingContext')
 
     def get_max_frames(self):
         return 'multiple'
@@ -126,3 +135,31 @@ log messages."])
             return(["WARNINGS detected in dezing plugin, Check the detailed \
 log messages."])
         return ["Nothing to Report"]
+
+
+class _GlobalDezinger(object):
+    """ Runs the module level dezing functions of an extension that was built
+    without DezingContext. The settings are global to the process, so the
+    dezinger is set up again whenever the block shape changes and frames
+    cannot be processed concurrently.
+    """
+
+    def __init__(self, outlier_mu, npad, mode=0):
+        self.outlier_mu = outlier_mu
+        self.npad = npad
+        self.mode = mode
+        self.shape = None
+
+    def run(self, data, result):
+        shape = (data.shape[0] - 2*self.npad,) + data.shape[1:]
+        if shape != self.shape:
+            self.cleanup()
+            dezing.setup_size(shape, self.outlier_mu, self.npad,
+                              mode=self.mode)
+            self.shape = shape
+        dezing.run(data, result)
+
+    def cleanup(self):
+        if self.shape is not None:
+            dezing.cleanup()
+            self.shape = None
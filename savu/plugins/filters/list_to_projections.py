@@ -26,7 +26,8 @@ from savu.plugins.driver.cpu_plugin import CpuPlugin
 from savu.plugins.utils import register_plugin#,dawn_compatible
 import numpy as np
 import savu.test.test_utils as tu
-from scipy.interpolate import griddata
+from scipy.sparse import csr_matrix
+from scipy.spatial import Delaunay
 
 
 @register_plugin
@@ -54,9 +55,32 @@ class ListToProjections(BaseFilter, CpuPlugin):
         elif in_positions.ndim==2:
             positions = in_positions# assume they are the same for all postiions
         self.setup_grids(positions)
-        
-    def process_frames(self, data):
+        self.setup_weights()
+
+    def setup_weights(self):
+        """ Triangulate the scan positions once and store the linear
+        interpolation onto the grid as a sparse matrix, so that each frame is
+        gridded with a single matrix product (equivalent to griddata with
+        method='linear'). """
         meshgridx, meshgridy = self.meshgrids
+        grid_shape = meshgridx[1:, 1:].shape
+        xi = np.column_stack((meshgridx[1:, 1:].ravel(),
+                              meshgridy[1:, 1:].ravel()))
+        tri = Delaunay(np.column_stack((self.x, self.y)))
+        simplex = tri.find_simplex(xi)
+        inside = np.nonzero(simplex >= 0)[0]
+        transform = tri.transform[simplex[inside]]
+        bary = np.einsum('ijk,ik->ij', transform[:, :2],
+                         xi[inside] - transform[:, 2])
+        weights = np.column_stack((bary, 1 - bary.sum(axis=1)))
+        rows = np.repeat(inside, 3)
+        cols = tri.simplices[simplex[inside]].ravel()
+        self.weights = csr_matrix((weights.ravel(), (rows, cols)),
+                                  shape=(xi.shape[0], len(self.x)))
+        self.outside = np.nonzero(simplex < 0)[0]
+        self.grid_shape = grid_shape
+
+    def process_frames(self, data):
         data = data[0]
         if self.parameters['fill_value']=='mean':
             self.fill_value = data.mean()
@@ -68,7 +92,9 @@ class ListToProjections(BaseFilter, CpuPlugin):
             logging.warn("I don't recognise your fill type of:%s , using 0 instead" % self.parameters['fill_value'])
             self.fill_value = 0
         
-        return griddata((self.x, self.y),data, (meshgridx, meshgridy),fill_value=self.fill_value)[1:,1:]
+        result = self.weights.dot(data.astype(np.float64))
+        result[self.outside] = self.fill_value
+        return result.reshape(self.grid_shape)
 
     def setup(self):
         logging.debug('setting up the interpolation')
@@ -61,3 +61,6 @@ class MedianFilter(BaseFilter, CpuPlugin):
     def get_plugin_pattern(self):
         return self.parameters['pattern']
 
+    def is_thread_safe(self):
+        return True
+
@@ -91,3 +91,6 @@ class ThresholdFilter(BaseFilter, CpuPlugin):
             self.threshold = self.parameters['intensity_threshold']
         else:
             self.threshold = (self.highest + self.lowest) / 2.0
+
+    def is_thread_safe(self):
+        return True
@@ -0,0 +1,96 @@
+# Copyright 2014 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. module:: live_nxtomo_loader
+   :platform: Unix
+   :synopsis: A class for loading standard tomography data in Nexus format \
+       while it is still being acquired.
+
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+
+"""
+
+import h5py
+
+from savu.plugins.loaders.full_field_loaders.nxtomo_loader import NxtomoLoader
+from savu.data.data_structures.data_types.live_h5 import LiveHdf5
+from savu.plugins.utils import register_plugin
+
+
+@register_plugin
+class LiveNxtomoLoader(NxtomoLoader):
+    """
+    A class to load tomography data from a hdf5 file that is still being \
+    written in SWMR mode.  Frames are processed as soon as they are \
+    available: a read waits until all the frames it requires have been \
+    written, so projection based plugins follow the acquisition and \
+    sinogram based plugins start once all angles have arrived.  The image \
+    key and rotation angles must be complete before processing can start, \
+    so ideally they are written at the start of the scan.
+
+    :param n_frames: The total number of frames (including darks and \
+        flats) that will be written, if the maximum shape of the dataset \
+        is unlimited. Default: None.
+    :param frame_counter_path: Path to a dataset holding the number of \
+        frames written so far. If this is None the shape of the data is \
+        polled instead. Default: None.
+    :param timeout: Seconds to wait for a new frame before \
+        failing. Default: 600.
+    """
+
+    def __init__(self, name='LiveNxtomoLoader'):
+        super(LiveNxtomoLoader, self).__init__(name)
+        self.nFrames = None
+        self.counter = None
+        self.__file = None
+        self.__entries = {}
+
+    def _open_backing_file(self, path):
+        """ Open the file in SWMR mode.  hdf5 fails to read a growing
+        dataset through more than one handle, so each dataset is only opened
+        once, and the file is closed with the loaded dataset before the
+        loader is set up again. """
+        self.__file = h5py.File(path, 'r', libver='latest', swmr=True)
+        self.__entries = {}
+
+        self.nFrames = self.parameters['n_frames']
+        if self.nFrames is None:
+            self.nFrames = \
+                self.__get_dataset(self.parameters['data_path']).maxshape[0]
+        if self.nFrames is None:
+            raise Exception("The final number of frames is unknown: set the "
+                            "n_frames parameter.")
+        if self.parameters['frame_counter_path']:
+            self.counter = \
+                self.__get_dataset(self.parameters['frame_counter_path'])
+        return self.__file
+
+    def __get_dataset(self, path):
+        if path not in self.__entries:
+            self.__entries[path] = self.__file[path]
+        return self.__entries[path]
+
+    def _get_entry(self, data_obj, path):
+        """ The data, and any other entries that grow during the
+        acquisition, wait for frames to be written before they are read. """
+        entry = self.__get_dataset(path)
+        timeout = self.parameters['timeout']
+        if path == self.parameters['data_path']:
+            return LiveHdf5(entry, 0, self.nFrames, timeout=timeout,
+                            counter=self.counter)
+        if isinstance(entry, h5py.Dataset) and len(entry.shape) and \
+                entry.maxshape[0] != entry.shape[0]:
+            return LiveHdf5(entry, 0, self.nFrames, timeout=timeout)
+        return entry
@@ -61,9 +61,10 @@ class NxtomoLoader(BaseLoader):
         data_obj = exp.create_data_object('in_data', self.parameters['name'])
 
         data_obj.backing_file = \
-            h5py.File(self.exp.meta_data.get("data_file"), 'r')
+            self._open_backing_file(self.exp.meta_data.get("data_file"))
 
-        data_obj.data = data_obj.backing_file[self.parameters['data_path']]
+        data_obj.data = \
+            self._get_entry(data_obj, self.parameters['data_path'])
 
         self._set_dark_and_flat(data_obj)
 
@@ -82,7 +83,8 @@ class NxtomoLoader(BaseLoader):
             self._set_rotation_angles(data_obj)
 
         try:
-            control = data_obj.backing_file['entry1/tomo_entry/control/data']
+            control = self._get_entry(
+                data_obj, 'entry1/tomo_entry/control/data')
             data_obj.meta_data.set("control", control[...])
         except:
             logging.warn("No Control information available")
@@ -93,6 +95,14 @@ class NxtomoLoader(BaseLoader):
         self.set_data_reduction_params(data_obj)
         data_obj.data._set_dark_and_flat()
 
+    def _open_backing_file(self, path):
+        """ Open the input file. """
+        return h5py.File(path, 'r')
+
+    def _get_entry(self, data_obj, path):
+        """ Get an entry from the input file. """
+        return data_obj.backing_file[path]
+
     def _setup_3d(self, data_obj):
         logging.debug("Setting up 3d tomography data.")
         rot = 0
@@ -142,8 +152,8 @@ class NxtomoLoader(BaseLoader):
         ignore = self.parameters['ignore_flats'] if \
             self.parameters['ignore_flats'] else None
         try:
-            image_key = data_obj.backing_file[
-                'entry1/tomo_entry/instrument/detector/image_key'][...]
+            entry = 'entry1/tomo_entry/instrument/detector/image_key'
+            image_key = self._get_entry(data_obj, entry)[...]
             data_obj.data = \
                 ImageKey(data_obj, image_key, 0, ignore=ignore)
         except KeyError:
@@ -163,8 +173,8 @@ class NxtomoLoader(BaseLoader):
 
     def __set_separate_dark_and_flat(self, data_obj):
         try:
-            image_key = data_obj.backing_file[
-                'entry1/tomo_entry/instrument/detector/image_key'][...]
+            entry = 'entry1/tomo_entry/instrument/detector/image_key'
+            image_key = self._get_entry(data_obj, entry)[...]
         except:
             image_key = None
         data_obj.data = NoImageKey(data_obj, image_key, 0)
@@ -194,7 +204,7 @@ class NxtomoLoader(BaseLoader):
         if angles is None:
             try:
                 entry = 'entry1/tomo_entry/data/rotation_angle'
-                angles = data_obj.backing_file[entry][
+                angles = self._get_entry(data_obj, entry)[
                     (data_obj.data.get_image_key()) == 0, ...]
             except KeyError:
                 logging.warn("No rotation angle entry found in input file.")
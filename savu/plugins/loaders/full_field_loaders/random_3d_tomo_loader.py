@@ -30,6 +30,54 @@ from savu.plugins.loaders.random_hdf5_loader import RandomHdf5Loader
 from savu.data.data_structures.data_types.data_plus_darks_and_flats \
     import ImageKey
 
+PHANTOM_DARK = 100.
+PHANTOM_FLAT = 10000.
+PHANTOM_ATTENUATION = 2.
+
+# the ellipsoids of the phantom: value, semi-axes (x, y, z), centre (x, y, z)
+# and rotation about the z (detector_y) axis in degrees
+SHEPP_LOGAN = [[1.0, 0.69, 0.92, 0.81, 0, 0, 0, 0],
+               [-0.8, 0.6624, 0.874, 0.78, 0, -0.0184, 0, 0],
+               [-0.2, 0.11, 0.31, 0.22, 0.22, 0, 0, -18],
+               [-0.2, 0.16, 0.41, 0.28, -0.22, 0, 0, 18],
+               [0.1, 0.21, 0.25, 0.41, 0, 0.35, -0.15, 0],
+               [0.1, 0.046, 0.046, 0.05, 0, 0.1, 0.25, 0],
+               [0.1, 0.046, 0.046, 0.05, 0, -0.1, 0.25, 0],
+               [0.1, 0.046, 0.023, 0.05, -0.08, -0.605, 0, 0],
+               [0.1, 0.023, 0.023, 0.02, 0, -0.606, 0, 0],
+               [0.1, 0.023, 0.046, 0.02, 0.06, -0.605, 0, 0]]
+
+
+def _project_phantom(theta, v, u):
+    """ The parallel beam line integrals through the phantom, from the chord
+    length of each ray through each ellipsoid.
+
+    :param ndarray theta: The rotation angles in radians, shape (n, 1, 1).
+    :param ndarray v: The vertical detector coordinates, shape (1, n, 1).
+    :param ndarray u: The horizontal detector coordinates, shape (1, 1, n).
+    """
+    projection = np.zeros((theta.size, v.size, u.size))
+    for value, a, b, c, x0, y0, z0, phi in SHEPP_LOGAN:
+        rows = np.flatnonzero(np.abs(v.ravel() - z0) < c)
+        if not rows.size:
+            continue
+        rows = slice(rows[0], rows[-1] + 1)
+        # the ray direction and detector position in the ellipsoid frame,
+        # scaled so the ellipsoid is the unit sphere
+        phi = np.deg2rad(phi)
+        dx, dy = np.cos(theta - phi)/a, np.sin(theta - phi)/b
+        x, y = -u*np.sin(theta) - x0, u*np.cos(theta) - y0
+        px = (x*np.cos(phi) + y*np.sin(phi))/a
+        py = (y*np.cos(phi) - x*np.sin(phi))/b
+        pz = (v[:, rows] - z0)/c
+        d2 = dx**2 + dy**2
+        # the discriminant of the ray-sphere intersection, with the terms
+        # that do not depend on the detector row calculated once
+        disc = (px*dx + py*dy)**2 - d2*(px**2 + py**2 - 1) - d2*pz**2
+        projection[:, rows] += \
+            (2*value)*np.sqrt(np.maximum(disc, 0))/d2
+    return projection
+
 
 @register_plugin
 class Random3dTomoLoader(RandomHdf5Loader):
@@ -47,6 +95,9 @@ class Random3dTomoLoader(RandomHdf5Loader):
     :*param dataset_name: The name assigned to the dataset. Default: 'tomo'.
     :u*param image_key: Specify position of darks and flats (in that order) \
     in the data. Default: [[0, 1], [2, 3]]
+    :param phantom: Create the parallel beam projections of a 3D \
+    Shepp-Logan style phantom, with darks, flats and Poisson noise, in place \
+    of random numbers. Default: False.
     """
 
     def __init__(self, name='Random3dTomoLoader'):
@@ -54,23 +105,53 @@ class Random3dTomoLoader(RandomHdf5Loader):
 
     def setup(self):
         data_obj = super(Random3dTomoLoader, self).setup()
-        image_key = self.__set_image_key(data_obj)
-        data_obj.data = ImageKey(data_obj, image_key, 0)
+        data_obj.data = ImageKey(data_obj, self.__get_image_key(data_obj), 0)
         data_obj.set_shape(data_obj.data.shape)
         self.set_data_reduction_params(data_obj)
         data_obj.data._set_dark_and_flat()
-        data_obj.data.update_dark(np.zeros(data_obj.data.dark().shape))
-        data_obj.data.update_flat(np.ones(data_obj.data.flat().shape))
+        if not self.parameters['phantom']:
+            data_obj.data.update_dark(np.zeros(data_obj.data.dark().shape))
+            data_obj.data.update_flat(np.ones(data_obj.data.flat().shape))
 
-    def __set_image_key(self, data_obj):
+    def __get_image_key(self, data_obj):
         proj_slice = \
             data_obj.get_data_patterns()['PROJECTION']['slice_dims'][0]
-        image_key = np.zeros(data_obj.data.shape[proj_slice], dtype=int)
+        image_key = np.zeros(self.parameters['size'][proj_slice], dtype=int)
         dark, flat = self.parameters['image_key']
         image_key[np.array(dark)] = 2
         image_key[np.array(flat)] = 1
         return image_key
 
+    def _generate_block(self, data_obj, sl, rng):
+        if not self.parameters['phantom']:
+            return super(Random3dTomoLoader, self)._generate_block(
+                data_obj, sl, rng)
+
+        labels = ['rotation_angle', 'detector_y', 'detector_x']
+        dims = [data_obj.get_data_dimension_by_axis_label(l) for l in labels]
+        rot, det_y, det_x = dims
+        image_key = self.__get_image_key(data_obj)
+        angles = np.deg2rad(self._get_angles(np.sum(image_key == 0)))
+        angles = angles[np.maximum(np.cumsum(image_key == 0) - 1, 0)]
+
+        # detector coordinates in units of half the detector width
+        scale = self.parameters['size'][det_x]/2.
+        centre = (np.array(self.parameters['size'])[dims] - 1)/2.
+        theta = angles[sl[rot]][:, np.newaxis, np.newaxis]
+        v = (np.arange(sl[det_y].start, sl[det_y].stop) - centre[1])/scale
+        u = (np.arange(sl[det_x].start, sl[det_x].stop) - centre[2])/scale
+        v = v[np.newaxis, :, np.newaxis]
+        u = u[np.newaxis, np.newaxis, :]
+
+        attenuation = PHANTOM_ATTENUATION*_project_phantom(theta, v, u)
+        key = image_key[sl[rot]][:, np.newaxis, np.newaxis]
+        intensity = np.where(key == 2, PHANTOM_DARK, PHANTOM_DARK +
+                             (PHANTOM_FLAT - PHANTOM_DARK)*np.exp(
+                                 -attenuation*(key == 0)))
+        block = rng.poisson(intensity).astype(self.parameters['dtype'])
+        # the block is in (rotation_angle, detector_y, detector_x) order
+        return block.transpose(np.argsort(dims))
+
     def _set_rotation_angles(self, data_obj, nEntries):
         dark, flat = self.parameters['image_key']
         nEntries = nEntries - len(dark + flat)
@@ -25,6 +25,7 @@
 import os
 import h5py
 import logging
+import itertools
 import numpy as np
 
 from savu.data.chunking import Chunking
@@ -32,6 +33,8 @@ from savu.plugins.utils import register_plugin
 from savu.plugins.loaders.base_loader import BaseLoader
 from savu.plugins.savers.utils.hdf5_utils import Hdf5Utils
 
+BLOCK_BYTES = 16*1024**2
+
 
 @register_plugin
 class RandomHdf5Loader(BaseLoader):
@@ -57,6 +60,8 @@ class RandomHdf5Loader(BaseLoader):
     :param pattern: Pattern used to create and store the hdf5 dataset - \
     default is the first pattern in the pattern dictionary. Default: None.
     :param range: Set the distribution interval. Default: [1, 10].
+    :param seed: The seed of the random number generator.  The data is the\
+    same for the same seed, whatever the number of processes. Default: 0.
     """
 
     def __init__(self, name='RandomHdf5Loader'):
@@ -90,45 +95,34 @@ class RandomHdf5Loader(BaseLoader):
         self.hdf5 = Hdf5Utils(self.exp)
 
         size = tuple(self.parameters['size'])
+        dtype = np.dtype(self.parameters['dtype'])
 
         patterns = data_obj.get_data_patterns()
-        p_name = patterns[self.parameters['pattern']] if \
+        p_name = self.parameters['pattern'] if \
             self.parameters['pattern'] is not None else patterns.keys()[0]
-        p_name = patterns.keys()[0]
         p_dict = patterns[p_name]
         p_dict['max_frames_transfer'] = 1
         nnext = {p_name: p_dict}
 
         pattern_idx = {'current': nnext, 'next': nnext}
         chunking = Chunking(self.exp, pattern_idx)
-        chunks = chunking._calculate_chunking(size, np.int16)
+        chunks = chunking._calculate_chunking(size, dtype)
 
         h5file = self.hdf5._open_backing_h5(fname, 'w')
-        dset = h5file.create_dataset('test', size, chunks=chunks)
+        dset = h5file.create_dataset('test', size, chunks=chunks, dtype=dtype)
 
+        # need an mpi barrier after creating the file before populating it
         self.exp._barrier()
 
-        slice_dirs = nnext.values()[0]['slice_dims']
-        nDims = len(dset.shape)
-        total_frames = np.prod([dset.shape[i] for i in slice_dirs])
-        sub_size = \
-            [1 if i in slice_dirs else dset.shape[i] for i in range(nDims)]
-
-        # need an mpi barrier after creating the file before populating it
-        idx = 0
-        sl, total_frames = \
-            self.__get_start_slice_list(slice_dirs, dset.shape, total_frames)
-        # calculate the first slice
-        for i in range(total_frames):
-            low, high = self.parameters['range']
-            dset[tuple(sl)] = np.random.randint(
-                low, high=high, size=sub_size, dtype=self.parameters['dtype'])
-            if sl[slice_dirs[idx]].stop == dset.shape[slice_dirs[idx]]:
-                idx += 1
-                if idx == len(slice_dirs):
-                    break
-            tmp = sl[slice_dirs[idx]]
-            sl[slice_dirs[idx]] = slice(tmp.start+1, tmp.stop+1)
+        blocks = self.__get_blocks(dset.shape, dset.chunks, dtype,
+                                   p_dict['slice_dims'])
+        n_processes = len(self.exp.get('processes'))
+        rank = self.exp.get('process')
+        for i in np.array_split(np.arange(len(blocks)), n_processes)[rank]:
+            # an independent stream per block, so the data is the same
+            # whatever the number of processes
+            rng = np.random.RandomState([self.parameters['seed'], i])
+            dset[blocks[i]] = self._generate_block(data_obj, blocks[i], rng)
 
         self.exp._barrier()
 
@@ -139,21 +133,33 @@ class RandomHdf5Loader(BaseLoader):
 
         return self.hdf5._open_backing_h5(fname, 'r')
 
-    def __get_start_slice_list(self, slice_dirs, shape, n_frames):
-        n_processes = len(self.exp.get('processes'))
-        rank = self.exp.get('process')
-        frames = np.array_split(np.arange(n_frames), n_processes)[rank]
-        f_range = range(0, frames[0]) if len(frames) else []
-        sl = [slice(0, 1) if i in slice_dirs else slice(None)
-              for i in range(len(shape))]
-        idx = 0
-        for i in f_range:
-            if sl[slice_dirs[idx]] == shape[slice_dirs[idx]]-1:
-                idx += 1
-            tmp = sl[slice_dirs[idx]]
-            sl[slice_dirs[idx]] = slice(tmp.start+1, tmp.stop+1)
-
-        return sl, len(frames)
+    def __get_blocks(self, shape, chunks, dtype, slice_dirs):
+        """ Split the dataset into blocks that span the core dimensions and
+        whole chunks of the slice dimensions, so no chunk is written by more
+        than one process.  Blocks are grown along the first slice dimension
+        up to BLOCK_BYTES. """
+        step = [chunks[i] if i in slice_dirs else shape[i]
+                for i in range(len(shape))]
+        dim = slice_dirs[0]
+        n_chunks = BLOCK_BYTES//(np.prod(step)*dtype.itemsize)
+        step[dim] = min(shape[dim], step[dim]*max(1, n_chunks))
+
+        starts = itertools.product(
+            *[range(0, shape[i], step[i]) for i in range(len(shape))])
+        return [tuple(slice(s, min(s + step[i], shape[i]))
+                      for i, s in enumerate(start)) for start in starts]
+
+    def _generate_block(self, data_obj, sl, rng):
+        """ Create the data for a block of the dataset.
+
+        :param Data data_obj: The dataset.
+        :param tuple sl: The slice list of the block.
+        :param RandomState rng: The random number generator of the block.
+        """
+        shape = [s.stop - s.start for s in sl]
+        low, high = self.parameters['range']
+        return rng.randint(low, high=high, size=shape,
+                           dtype=self.parameters['dtype'])
 
     def __convert_patterns(self, data_obj):
         pattern_list = self.parameters['patterns']
@@ -169,6 +175,15 @@ class RandomHdf5Loader(BaseLoader):
                     name, core_dims=core_dims, slice_dims=slice_dims)
 
     def _set_rotation_angles(self, data_obj, n_entries):
+        angles = self._get_angles(n_entries)
+        n_angles = len(angles)
+        data_angles = n_entries
+        if data_angles != n_angles:
+            raise Exception("The number of angles %s does not match the data "
+                            "dimension length %s", n_angles, data_angles)
+        data_obj.meta_data.set("rotation_angle", angles)
+
+    def _get_angles(self, n_entries):
         angles = self.parameters['angles']
 
         if angles is None:
@@ -178,13 +193,7 @@ class RandomHdf5Loader(BaseLoader):
                 exec("angles = " + angles)
             except:
                 raise Exception('Cannot set angles in loader.')
-
-        n_angles = len(angles)
-        data_angles = n_entries
-        if data_angles != n_angles:
-            raise Exception("The number of angles %s does not match the data "
-                            "dimension length %s", n_angles, data_angles)
-        data_obj.meta_data.set("rotation_angle", angles)
+        return angles
 
     def __parameter_checks(self, data_obj):
         if not self.parameters['size']:
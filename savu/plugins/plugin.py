@@ -53,6 +53,10 @@ class Plugin(PluginDatasets):
         self.slice_list = None
         self.global_index = None
         self.pcount = 0
+        self._tuning = None
+        self._frame_distribution = 'static'
+        self._thread_state = None
+        self._buffers = {}
 
     def _main_setup(self, exp, params):
         """ Performs all the required plugin setup.
@@ -78,7 +82,12 @@ class Plugin(PluginDatasets):
     def __reset_process_frames_counter(self):
         self.pcount = 0
 
+    def _set_process_frames_counter(self, count):
+        self.pcount = count
+
     def get_process_frames_counter(self):
+        if self._thread_state is not None:
+            return self._thread_state.pcount
         return self.pcount
 
     def _set_parameters_this_instance(self, indices):
@@ -96,6 +105,24 @@ class Plugin(PluginDatasets):
             self.parameters[name] = info['values'][indices[count]]
             count += 1
 
+    def _set_parameter_tuning(self, tuning):
+        """ Set the ParameterTuning object used to switch between parameter
+        tuning instances when they are processed in a single pass. """
+        self._tuning = tuning
+
+    def _get_parameter_tuning(self):
+        """ Get the ParameterTuning object, or None if the tuning instances
+        (if any) are run one after the other. """
+        return self._tuning
+
+    def _set_frame_distribution(self, distribution):
+        """ Set how the frames are shared between the processes while this
+        plugin is processing them: 'static' or 'dynamic'. """
+        self._frame_distribution = distribution
+
+    def _get_frame_distribution(self):
+        return self._frame_distribution
+
     def base_dynamic_data_info(self):
         """ Provides an opportunity to override the number and name of input
         and output datasets before they are created in the base classes. """
@@ -258,7 +285,9 @@ class Plugin(PluginDatasets):
     def plugin_process_frames(self, data):
         frames = self.base_process_frames_after(self.process_frames(
                 self.base_process_frames_before(data)))
-        self.pcount += 1
+        if self._thread_state is None:
+            # the counter is maintained by the thread pool otherwise
+            self.pcount += 1
         return frames
 
     def process_frames(self, data):
@@ -382,12 +411,40 @@ class Plugin(PluginDatasets):
         
 
     def set_current_slice_list(self, sl):
-        self.slice_list = sl
+        if self._thread_state is not None:
+            self._thread_state.slice_list = sl
+        else:
+            self.slice_list = sl
 
     def get_current_slice_list(self):
         """ Get the slice list of the current frame being processed. """
+        if self._thread_state is not None:
+            return self._thread_state.slice_list
         return self.slice_list
 
+    def _set_thread_state(self, state):
+        """ Set (or unset with None) the thread local frame state used when
+        frames are processed concurrently. """
+        self._thread_state = state
+
+    def get_thread_buffer(self, name, shape, dtype=np.float32):
+        """ Get a scratch array private to the calling thread.
+
+        The array is reused by subsequent calls with the same name, shape and
+        dtype, so its initial contents are undefined.
+
+        :param str name: A name for the buffer.
+        :param tuple shape: The shape of the buffer.
+        :param dtype: The buffer data type.
+        """
+        state = self._thread_state
+        buffers = state.buffers if state is not None else self._buffers
+        buf = buffers.get(name)
+        if buf is None or buf.shape != tuple(shape) or buf.dtype != dtype:
+            buf = np.empty(shape, dtype=dtype)
+            buffers[name] = buf
+        return buf
+
     def get_slice_dir_reps(self, nData):
         """ Return the periodicity of the main slice direction.
 
@@ -395,7 +452,7 @@ class Plugin(PluginDatasets):
         """
         slice_dir = \
             self.get_plugin_in_datasets()[nData].get_slice_directions()[0]
-        sl = [sl[slice_dir] for sl in self.slice_list]
+        sl = [sl[slice_dir] for sl in self.get_current_slice_list()]
         reps = [i for i in range(len(sl)) if sl[i] == sl[0]]
         return np.diff(reps)[0] if len(reps) > 1 else 1
 
@@ -428,6 +485,13 @@ class Plugin(PluginDatasets):
         """
         return 'single'
 
+    def is_thread_safe(self):
+        """ Return True if process_frames may be called concurrently by
+        several threads.  This requires that process_frames does not modify
+        any plugin attributes: use get_thread_buffer() for scratch space.
+        """
+        return False
+
     def final_parameter_updates(self):
         """ An opportunity to update the parameters after they have been set.
         """
@@ -0,0 +1,363 @@
+# Copyright 2014 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. module:: plugin_index
+   :platform: Unix
+   :synopsis: A static index of the available plugins, read from the plugin \
+   source files without importing them.
+
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+
+"""
+
+import os
+import ast
+import json
+import inspect
+import logging
+
+import savu.plugins.utils as pu
+import savu.plugins.docstring_parser as doc
+
+INDEX_VERSION = 1
+INDEX_FILE = os.getenv('SAVU_PLUGIN_INDEX', os.path.join(
+    os.path.expanduser("~"), '.savu', 'plugin_index.json'))
+
+# methods that change the parameters of a plugin when it is instantiated, so
+# the plugin must be imported to find them
+DYNAMIC_METHODS = ['final_parameter_updates', '_override_class_docstring']
+PLUGIN_BASE = ('savu.plugins.plugin', 'Plugin')
+
+_index = None
+
+
+class PluginInfo(object):
+    """ The name, module, parameters and docstring information of a plugin,
+    as a plugin instance holds them after _populate_default_parameters.
+
+    :param str name: The plugin name.
+    :param str pid: The plugin module.
+    """
+
+    def __init__(self, name, pid):
+        self.name = name
+        self.id = pid
+        self.parameters = {}
+        self.parameters_desc = {}
+        self.parameters_hide = []
+        self.parameters_user = []
+        self.docstring_info = {}
+        self.classes = []
+
+    def _populate_from_docstrings(self, docs):
+        """ Follows Plugin._populate_default_parameters.
+
+        :param list docs: The (module docstring, class docstring) of each
+            class in the method resolution order, base classes first.
+        """
+        hidden_items, user_items, params, not_params = [], [], [], []
+        for mod_doc, class_doc in docs:
+            desc = doc._parse_args(
+                doc._get_doc_lines(mod_doc), doc._get_doc_lines(class_doc))
+            for key in ['warn', 'info', 'synopsis']:
+                self.docstring_info[key] = desc[key]
+            params.extend(desc['param'])
+            hidden_items.extend(desc['hide_param'])
+            user_items.extend(desc['user_param'])
+            not_params.extend(desc['not_param'])
+
+        for item in [p for p in params if p['name'] not in not_params]:
+            self.parameters[item['name']] = item['default']
+            self.parameters_desc[item['name']] = item['desc']
+        user_items = [u for u in user_items if u not in not_params]
+        hidden_items = [h for h in hidden_items if h not in not_params]
+        self.parameters_hide = hidden_items
+        self.parameters_user = \
+            list(set(user_items).difference(set(hidden_items)))
+
+    def _populate_from_plugin(self, plugin):
+        plugin._populate_default_parameters()
+        for attr in ['parameters', 'parameters_desc', 'parameters_hide',
+                     'parameters_user', 'docstring_info']:
+            setattr(self, attr, getattr(plugin, attr))
+        self.classes = [c.__name__ for c in inspect.getmro(plugin.__class__)]
+
+
+def get_index():
+    """ Get the plugin index, a dictionary of plugin name to the plugin
+    module, source file, class names and class docstrings.  The index is
+    cached in INDEX_FILE and source files that have changed since it was
+    written are read again. """
+    global _index
+    if _index is None:
+        _index = _get_plugins(_update_index_file())
+    return _index
+
+
+def get_plugin_names():
+    return get_index().keys()
+
+
+def get_plugin_info(name):
+    """ Get the parameters and docstring information of a plugin.  Only
+    plugins that change their parameters at runtime are imported.
+
+    :param str name: The plugin name.
+    :rtype: PluginInfo
+    """
+    entry = get_index()[name]
+    info = PluginInfo(name, entry['id'])
+    if entry['dynamic']:
+        info._populate_from_plugin(pu.load_class(entry['id'], name)())
+    else:
+        info._populate_from_docstrings(entry['docs'])
+        info.classes = entry['classes']
+    return info
+
+
+def _get_sources():
+    """ Find the plugin source files and their module names, in the order
+    the configurator imports them, so a later plugin of the same name
+    replaces an earlier one. """
+    paths = pu.get_plugins_paths()
+    savu_root = os.path.abspath(paths[-1])
+    sources = []
+    for path in paths[:-1] + [os.path.join(savu_root, 'plugin_examples')]:
+        sources.extend(_get_package_sources(path, ''))
+    sources.extend(_get_package_sources(
+        os.path.join(savu_root, 'savu', 'plugins'), 'savu.plugins.'))
+    return sources
+
+
+def _get_package_sources(path, prefix):
+    sources = []
+    if not os.path.isdir(path):
+        return sources
+    for fname in sorted(os.listdir(path)):
+        full_path = os.path.join(path, fname)
+        if fname.endswith('.py') and fname != '__init__.py':
+            sources.append((full_path, prefix + fname[:-3]))
+        elif os.path.exists(os.path.join(full_path, '__init__.py')):
+            sources.append((os.path.join(full_path, '__init__.py'),
+                            prefix + fname))
+            sources.extend(
+                _get_package_sources(full_path, prefix + fname + '.'))
+    return sources
+
+
+def _update_index_file():
+    """ Read the index file, update the entries of new and changed source
+    files and write it back if anything has changed. """
+    index = {'version': INDEX_VERSION, 'files': {}}
+    if os.path.exists(INDEX_FILE):
+        try:
+            with open(INDEX_FILE, 'r') as f:
+                index = _byteify(json.load(f))
+        except ValueError:
+            logging.debug("The plugin index %s is corrupt", INDEX_FILE)
+    if index.get('version') != INDEX_VERSION:
+        index = {'version': INDEX_VERSION, 'files': {}}
+
+    files = {}
+    for path, module in _get_sources():
+        mtime = os.path.getmtime(path)
+        entry = index['files'].get(path)
+        if not entry or entry['mtime'] != mtime or entry['module'] != module:
+            entry = _parse_source(path, module)
+            entry['mtime'] = mtime
+        files[path] = entry
+
+    if files != index['files']:
+        index['files'] = files
+        _write_index(index)
+    return index
+
+
+def _write_index(index):
+    try:
+        folder = os.path.dirname(INDEX_FILE)
+        if not os.path.exists(folder):
+            os.makedirs(folder)
+        tmp = '%s.%d' % (INDEX_FILE, os.getpid())
+        with open(tmp, 'w') as f:
+            json.dump(index, f)
+        os.rename(tmp, INDEX_FILE)
+    except (IOError, OSError):
+        logging.debug("Unable to write the plugin index %s", INDEX_FILE)
+
+
+def _parse_source(path, module):
+    """ Read the classes, imports and docstrings of a source file. """
+    entry = {'module': module, 'doc': None, 'classes': {}, 'imports': {}}
+    try:
+        with open(path, 'r') as f:
+            tree = ast.parse(f.read(), path)
+    except (SyntaxError, TypeError):
+        logging.debug("Unable to parse the plugin file %s", path)
+        return entry
+
+    entry['doc'] = _get_docstring(tree)
+    package = module.rsplit('.', 1)[0] if '.' in module else ''
+    for node in ast.walk(tree):
+        if isinstance(node, ast.ImportFrom):
+            mod = node.module if node.module else ''
+            if node.level:
+                parent = package.rsplit('.', node.level - 1)[0] \
+                    if node.level > 1 else package
+                mod = '.'.join([m for m in [parent, mod] if m])
+            for alias in node.names:
+                entry['imports'][alias.asname or alias.name] = \
+                    [mod, alias.name]
+        elif isinstance(node, ast.Import):
+            for alias in node.names:
+                if alias.asname:
+                    entry['imports'][alias.asname] = [alias.name, None]
+                else:
+                    name = alias.name.split('.')[0]
+                    entry['imports'][name] = [name, None]
+
+    for node in tree.body:
+        if isinstance(node, ast.ClassDef):
+            entry['classes'][node.name] = {
+                'bases': [_get_name(b) for b in node.bases],
+                'doc': _get_docstring(node),
+                'methods': [n.name for n in node.body
+                            if isinstance(n, ast.FunctionDef)],
+                'registered': 'register_plugin' in
+                [_get_name(d).split('.')[-1] for d in node.decorator_list]}
+    return entry
+
+
+def _get_docstring(node):
+    """ The docstring exactly as the __doc__ attribute holds it. """
+    if node.body and isinstance(node.body[0], ast.Expr) and \
+            isinstance(node.body[0].value, ast.Str):
+        return node.body[0].value.s
+    return None
+
+
+def _get_name(node):
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        return _get_name(node.value) + '.' + node.attr
+    if isinstance(node, ast.Call):
+        return _get_name(node.func)
+    return ''
+
+
+def _get_plugins(index):
+    """ Find the docstrings of the registered plugins and their base
+    classes. """
+    modules = dict((e['module'], e) for e in index['files'].values())
+    plugins = {}
+    for path, module in _get_sources():
+        entry = index['files'][path]
+        for name, clazz in entry['classes'].iteritems():
+            if not clazz['registered']:
+                continue
+            mro = _get_mro(modules, (module, name))
+            docs, dynamic = [], False
+            for mod, cls in mro[::-1]:
+                base = modules[mod]['classes'][cls] if mod in modules and \
+                    cls in modules[mod]['classes'] else None
+                if base is None:
+                    continue
+                if (mod, cls) != PLUGIN_BASE and \
+                        set(DYNAMIC_METHODS).intersection(base['methods']):
+                    dynamic = True
+                if base['doc']:
+                    docs.append((modules[mod]['doc'], base['doc']))
+            plugins[name] = {'id': module, 'file': path, 'docs': docs,
+                             'classes': [cls for mod, cls in mro] + ['object'],
+                             'dynamic': dynamic}
+    return plugins
+
+
+def _resolve(modules, module, name, depth=0):
+    """ Find the (module, class name) that a name refers to in a module. """
+    entry = modules.get(module)
+    if entry is None or depth > 10:
+        return (module, name)
+    if '.' in name:
+        head, rest = name.split('.', 1)
+        if head in entry['imports']:
+            mod, attr = entry['imports'][head]
+            mod = mod + '.' + attr if attr else mod
+            mod, cls = (mod + '.' + rest).rsplit('.', 1)
+            return _resolve(modules, _find_module(modules, module, mod), cls,
+                            depth+1)
+        return (module, name)
+    if name in entry['classes']:
+        return (module, name)
+    if name in entry['imports']:
+        mod, attr = entry['imports'][name]
+        if attr:
+            return _resolve(modules, _find_module(modules, module, mod), attr,
+                            depth+1)
+    return (module, name)
+
+
+def _find_module(modules, module, name):
+    """ Resolve an implicit relative import. """
+    if name not in modules and '.' in module:
+        relative = module.rsplit('.', 1)[0] + '.' + name
+        if relative in modules:
+            return relative
+    return name
+
+
+def _get_mro(modules, key):
+    """ The C3 linearisation of a class, without object. """
+    entry = modules.get(key[0])
+    clazz = entry['classes'].get(key[1]) if entry else None
+    if clazz is None:
+        return [key]
+    bases = [_resolve(modules, key[0], b) for b in clazz['bases']]
+    bases = [b for b in bases if b[1] != 'object']
+    seqs = [_get_mro(modules, b) for b in bases] + [bases]
+    mro = [key]
+    while True:
+        seqs = [s for s in seqs if s]
+        if not seqs:
+            return mro
+        for seq in seqs:
+            head = seq[0]
+            if not [s for s in seqs if head in s[1:]]:
+                break
+        else:
+            raise Exception("Inconsistent class hierarchy for %s" % key[1])
+        mro.append(head)
+        seqs = [s[1:] if s[0] == head else s for s in seqs]
+
+
+def _byteify(data):
+    if isinstance(data, dict):
+        return dict((_byteify(k), _byteify(v)) for k, v in data.iteritems())
+    if isinstance(data, list):
+        return [_byteify(d) for d in data]
+    if isinstance(data, unicode):
+        return data.encode('utf-8')
+    return data
+
+
+def main():
+    """ Build or update the plugin index. """
+    print("The plugin index %s lists %d plugins." %
+          (INDEX_FILE, len(get_index())))
+
+
+if __name__ == '__main__':
+    main()
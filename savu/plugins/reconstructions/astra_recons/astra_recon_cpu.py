@@ -46,3 +46,6 @@ class AstraReconCpu(BaseAstraRecon, CpuPlugin):
 
     def set_options(self, cfg):
         return cfg
+
+    def is_thread_safe(self):
+        return True
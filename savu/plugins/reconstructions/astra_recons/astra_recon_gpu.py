@@ -134,7 +134,7 @@ class AstraReconGpu(BaseAstraRecon, GpuPlugin):
             rec_id = astra.data3d.create('-vol', vol_geom)
 
         # setup configuration options
-        cfg = self.set_config(rec_id, sino_id, proj_geom, vol_geom)
+        cfg = self.set_config(rec_id, sino_id, proj_id)
 
         # create algorithm id
         alg_id = astra.algorithm.create(cfg)
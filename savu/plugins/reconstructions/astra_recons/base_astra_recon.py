@@ -20,11 +20,15 @@
 """
 
 import astra
+import threading
 import numpy as np
 
 from savu.plugins.reconstructions.base_recon import BaseRecon
 from savu.data.plugin_list import CitationInformation
 
+# the number of sets of geometries that are kept between frames
+MAX_GEOMETRIES = 4
+
 
 class BaseAstraRecon(BaseRecon):
     """
@@ -37,12 +41,11 @@ class BaseAstraRecon(BaseRecon):
     def __init__(self, name='BaseAstraRecon'):
         super(BaseAstraRecon, self).__init__(name)
         self.res = False
+        self.geometries = {}
+        self.lock = threading.Lock()
 
     def setup(self):
         self.alg = self.parameters['algorithm']
-        self.get_max_frames = \
-            self._get_multiple if '3D' in self.alg else self._get_single
-
         super(BaseAstraRecon, self).setup()
         out_dataset = self.get_out_datasets()
 
@@ -87,12 +90,29 @@ class BaseAstraRecon(BaseRecon):
             pData.get_data_dimension_by_axis_label('x', contains=True)
         self.dim_rot = \
             pData.get_data_dimension_by_axis_label('rot', contains=True)
+        # a single frame is passed to process_frames without its frame
+        # dimension
+        self.dim_frame = None if self.get_max_frames() == 'single' else \
+            pData.get_data_dimension_by_axis_label('y', contains=True)
 
         self.sino_shape = pData.get_shape()
         self.nDims = len(self.sino_shape)
         self.nCols = self.sino_shape[self.dim_detX]
         self.set_mask(self.sino_shape)
 
+        # the dimensions of a single sinogram and reconstructed slice
+        frame_dims = [d for d in range(self.nDims) if d != self.dim_frame]
+        self.sino_dims = (frame_dims.index(self.dim_rot),
+                          frame_dims.index(self.dim_detX))
+        out_pData = self.get_plugin_out_datasets()[0]
+        vol_shape = self.get_vol_shape()
+        self.vol_dim_frame = None
+        if self.dim_frame is not None:
+            self.vol_dim_frame = out_pData.get_data_dimension_by_axis_label(
+                'voxel_y', contains=True)
+            vol_shape = np.delete(vol_shape, self.vol_dim_frame)
+        self.vol_shape_2D = tuple(int(s) for s in vol_shape)
+
     def set_mask(self, shape):
         l = self.sino_shape[self.dim_detX]
         c = np.linspace(-l/2.0, l/2.0, l)
@@ -109,52 +129,118 @@ class BaseAstraRecon(BaseRecon):
             self.manual_mask = False
 
     def astra_2D_recon(self, data):
-        sino = data[0]
-        cor, angles, vol_shape, init = self.get_frame_params()
-        angles = np.deg2rad(angles)
-        if self.res:
-            res = np.zeros(self.len_res)
-        # create volume geom
-        vol_geom = astra.create_vol_geom(vol_shape)
-        # create projection geom
-        det_width = sino.shape[self.dim_detX]
-        proj_geom = astra.create_proj_geom('parallel', 1.0, det_width, angles)
-        sino = np.transpose(sino, (self.dim_rot, self.dim_detX))
-
-        # create sinogram id
-        sino_id = astra.data2d.create("-sino", proj_geom, sino)
-        # create reconstruction id
-        if init:
-            rec_id = astra.data2d.create('-vol', vol_geom, init)
-        else:
-            rec_id = astra.data2d.create('-vol', vol_geom)
-
-#        if self.mask_id:
-#            self.mask_id = astra.data2d.create('-vol', vol_geom, self.mask)
-        # setup configuration options
-        cfg = self.set_config(rec_id, sino_id, proj_geom, vol_geom)
-        # create algorithm id
-        alg_id = astra.algorithm.create(cfg)
-        # run algorithm
+        """ Reconstruct each sinogram in the frames.
+
+        The frames may be processed concurrently by a pool of threads (see
+        is_thread_safe), so the astra objects are only accessed under a lock
+        and each thread has its own data objects.
+        """
+        cors = self._get_frame_state().frame_cors
+        angles = np.deg2rad(self.get_angles())
+        init = self.get_initial_data()
+        if self.dim_frame is None:
+            recon, res = \
+                self._reconstruct_frame(data[0], cors[0], angles, init)
+            return [recon, res] if self.res else recon
+
+        results = []
+        for i in range(data[0].shape[self.dim_frame]):
+            sino = np.take(data[0], [i], axis=self.dim_frame)
+            frame_init = None if init is None else \
+                np.take(init, i, axis=self.vol_dim_frame)
+            results.append(
+                self._reconstruct_frame(sino, cors[i], angles, frame_init))
+
+        recon = np.stack([r[0] for r in results], axis=self.vol_dim_frame)
         if self.res:
-            for j in range(self.iters):
-                # Run a single iteration
-                astra.algorithm.run(alg_id, 1)
-                res[j] = astra.algorithm.get_res_norm(alg_id)
-        else:
+            return [recon, np.array([r[1] for r in results])]
+        return recon
+
+    def _reconstruct_frame(self, sino, cor, angles, init):
+        with self.lock:
+            # centring the sinogram may change the mask
+            sino = self.fix_sino(sino, cor)
+            mask = self.manual_mask
+            geometry = self._get_geometry(sino.shape[self.dim_detX], angles)
+            ids = self._get_data_ids(geometry)
+            if self.dim_frame is not None:
+                sino = np.squeeze(sino, axis=self.dim_frame)
+            astra.data2d.store(ids['sino_id'],
+                               np.transpose(sino, self.sino_dims))
+            astra.data2d.store(ids['rec_id'], init if init is not None else 0)
+            alg_id = ids['alg_id']
+            if alg_id is None:
+                cfg = self.set_config(ids['rec_id'], ids['sino_id'],
+                                      geometry['proj_id'])
+                alg_id = astra.algorithm.create(cfg)
+                # FBP holds no state between runs, so the algorithm can be
+                # reused, but the iterative algorithms continue from where
+                # they stopped
+                if 'FBP' in self.alg:
+                    ids['alg_id'] = alg_id
+
+        res = self.run_algorithm(alg_id)
+
+        with self.lock:
+            recon = astra.data2d.get(ids['rec_id'])
+            if ids['alg_id'] is None:
+                astra.algorithm.delete(alg_id)
+            geometry['users'] -= 1
+        if mask is not False:
+            recon = mask*recon
+        return recon, res
+
+    def _get_geometry(self, det_width, angles):
+        """ The geometries for sinograms of a given width and angles, which
+        are kept between frames. Geometries that are not in use are deleted
+        when there are too many. """
+        key = (det_width, angles.tostring())
+        if key not in self.geometries:
+            if len(self.geometries) >= MAX_GEOMETRIES:
+                self.delete_geometries(in_use=False)
+            self.geometries[key] = self.create_geometry(det_width, angles)
+        geometry = self.geometries[key]
+        geometry['users'] += 1
+        return geometry
+
+    def create_geometry(self, det_width, angles):
+        """ Create the volume and projection geometries, and the projector \
+        if there is one, for sinograms of a given width and angles. """
+        geometry = {'vol': astra.create_vol_geom(self.vol_shape_2D),
+                    'proj': astra.create_proj_geom(
+                        'parallel', 1.0, det_width, angles),
+                    'proj_id': False, 'threads': {}, 'users': 0}
+        if 'projector' in self.parameters.keys():
+            geometry['proj_id'] = astra.create_projector(
+                self.parameters['projector'], geometry['proj'],
+                geometry['vol'])
+        return geometry
+
+    def _get_data_ids(self, geometry):
+        """ The sinogram, reconstruction and (for FBP) algorithm ids of the \
+        calling thread, which are reused for each frame with the same \
+        geometry. """
+        thread = threading.current_thread().ident
+        ids = geometry['threads'].get(thread)
+        if ids is None:
+            ids = {'sino_id': astra.data2d.create('-sino', geometry['proj']),
+                   'rec_id': astra.data2d.create('-vol', geometry['vol']),
+                   'alg_id': None}
+            geometry['threads'][thread] = ids
+        return ids
+
+    def run_algorithm(self, alg_id):
+        if not self.res:
             astra.algorithm.run(alg_id, self.iters)
-        # get reconstruction matrix
-
-        if self.manual_mask is not False:
-            recon = self.manual_mask*astra.data2d.get(rec_id)
-        else:
-            recon = astra.data2d.get(rec_id)
-
-        # delete geometry
-        self.delete(alg_id, sino_id, rec_id, False)
-        return [recon, res] if self.res else recon
-
-    def set_config(self, rec_id, sino_id, proj_geom, vol_geom):
+            return None
+        res = np.zeros(self.len_res)
+        for j in range(self.iters):
+            # Run a single iteration
+            astra.algorithm.run(alg_id, 1)
+            res[j] = astra.algorithm.get_res_norm(alg_id)
+        return res
+
+    def set_config(self, rec_id, sino_id, proj_id):
         cfg = astra.astra_dict(self.alg)
         cfg['ReconstructionDataId'] = rec_id
         cfg['ProjectionDataId'] = sino_id
@@ -162,9 +248,7 @@ class BaseAstraRecon(BaseRecon):
             fbp_filter = self.parameters['FBP_filter'] if 'FBP_filter' in \
                 self.parameters.keys() else 'none'
             cfg['FilterType'] = fbp_filter
-        if 'projector' in self.parameters.keys():
-            proj_id = astra.create_projector(
-                self.parameters['projector'], proj_geom, vol_geom)
+        if proj_id is not False:
             cfg['ProjectorId'] = proj_id
         cfg = self.set_options(cfg)
         return cfg
@@ -176,16 +260,41 @@ class BaseAstraRecon(BaseRecon):
         if proj_id:
             astra.projector.delete(proj_id)
 
+    def delete_geometries(self, in_use=True):
+        """ Delete the geometries and their astra objects, optionally only
+        those that are not being used by any thread. """
+        for key, geometry in self.geometries.items():
+            if geometry['users'] and not in_use:
+                continue
+            for ids in geometry['threads'].values():
+                if ids['alg_id'] is not None:
+                    astra.algorithm.delete(ids['alg_id'])
+                astra.data2d.delete([ids['sino_id'], ids['rec_id']])
+            if geometry['proj_id'] is not False:
+                astra.projector.delete(geometry['proj_id'])
+            del self.geometries[key]
+
+    def post_process(self):
+        self.delete_geometries()
+
+    def centre_frames_separately(self):
+        return '3D' not in self.parameters['algorithm']
+
+    def get_max_frames(self):
+        """ Several sinograms are reconstructed in each call to
+        process_frames, unless the 2D algorithms are run over a pool of
+        threads, which share out the calls to process_frames. """
+        sys_params = self.exp.meta_data.get('system_params')
+        nThreads = int(sys_params.get('threads_per_process', 1))
+        if nThreads > 1 and self.is_thread_safe() and \
+                '3D' not in self.parameters['algorithm']:
+            return 'single'
+        return 'multiple'
+
     def get_padding_algorithms(self):
         """ A list of algorithms that allow the data to be padded. """
         return ['FBP', 'FBP_CUDA']
 
-    def _get_single(self):
-        return 'single'
-
-    def _get_multiple(self):
-        return 'multiple'
-
     def get_citation_information(self):
         cite_info1 = CitationInformation()
         cite_info1.name = 'citation1'
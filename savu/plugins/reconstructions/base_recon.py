@@ -205,34 +205,51 @@ class BaseRecon(Plugin):
         """
         Reconstruct a single sinogram with the provided centre of rotation
         """
+        state = self._get_frame_state()
         sl = self.get_current_slice_list()[0]
         init = data[1] if self.init_vol else None
         angles = \
             self.angles[:, sl[self.scan_dim]] if self.scan_dim else self.angles
-        self.frame_angles = angles
+        state.frame_angles = angles
 
         dim_sl = sl[self.main_dir]
 
         if self.cor_as_dataset:
-            self.frame_cors = self.cor_func(data[len(data)-1])
+            cors = self.cor_func(data[len(data)-1])
         else:
             frame_nos = \
                 self.get_plugin_in_datasets()[0].get_current_frame_idx()
-            self.frame_cors = self.cor_func(self.cor[[frame_nos]])
+            cors = self.cor_func(self.cor[[frame_nos]])
 
         # for extra padded frames that make up the numbers
-        if not self.frame_cors.shape:
-            self.frame_cors = np.array([self.centre])
+        if not cors.shape:
+            cors = np.array([self.centre])
 
         len_data = len(np.arange(dim_sl.start, dim_sl.stop, dim_sl.step))
 
-        missing = [self.centre]*(len(self.frame_cors) - len_data)
-        self.frame_cors = np.append(self.frame_cors, missing)
+        missing = [self.centre]*(len(cors) - len_data)
+        state.frame_cors = np.append(cors, missing)
 
-        self.frame_init_data = init
-        data[0] = self.fix_sino(self.sino_func(data[0]), self.frame_cors[0])
+        state.frame_init_data = init
+        data[0] = self.sino_func(data[0])
+        if not self.centre_frames_separately():
+            data[0] = self.fix_sino(data[0], state.frame_cors[0])
         return data
 
+    def _get_frame_state(self):
+        """ The object that holds the angles, centres of rotation and initial
+        data of the current frames: the plugin, or the state of the calling
+        thread if frames are processed concurrently. """
+        state = self._thread_state
+        return state if state is not None else self
+
+    def centre_frames_separately(self):
+        """ Return True if process_frames centres each sinogram on its own
+        centre of rotation (see fix_sino).  Otherwise the frames are centred
+        on the centre of rotation of the first frame before process_frames is
+        called. """
+        return False
+
     def base_process_frames_after(self, data):
         lower_range, upper_range = self.range
         if lower_range is not None:
@@ -332,7 +349,7 @@ class BaseRecon(Plugin):
         :returns: Angles of the current frames.
         :rtype: np.ndarray
         """
-        return self.frame_angles
+        return self._get_frame_state().frame_angles
 
     def get_cors(self):
         """
@@ -341,7 +358,7 @@ class BaseRecon(Plugin):
         :returns: Centre of rotation values for the current frames.
         :rtype: np.ndarray
         """
-        return self.frame_cors + self.cor_shift
+        return self._get_frame_state().frame_cors + self.cor_shift
 
     def set_mask(self, shape):
         pass
@@ -355,7 +372,7 @@ class BaseRecon(Plugin):
             current frames.
         :rtype: np.ndarray or None
         """
-        return self.frame_init_data
+        return self._get_frame_state().frame_init_data
 
     def get_frame_params(self):
         params = [self.get_cors(), self.get_angles(), self.get_vol_shape(),
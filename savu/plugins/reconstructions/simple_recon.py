@@ -29,6 +29,11 @@ import numpy as np
 
 from savu.plugins.utils import register_plugin
 
+# the number of pixels interpolated at once, over a batch of angles
+BATCH_SIZE = 2**18
+# the largest interpolation tables that are kept between frames
+MAX_TABLE_BYTES = 2**28
+
 
 @register_plugin
 class SimpleRecon(BaseRecon, CpuPlugin):
@@ -38,52 +43,92 @@ class SimpleRecon(BaseRecon, CpuPlugin):
 
     def __init__(self):
         super(SimpleRecon, self).__init__("SimpleRecon")
+        self.tables = {}
+
+    def pre_process(self):
+        in_pData = self.get_plugin_in_datasets()[0]
+        out_pData = self.get_plugin_out_datasets()[0]
+        self.sino_dims = tuple(in_pData.get_data_dimension_by_axis_label(
+            l, contains=True) for l in ['y', 'rot', 'x'])
+        self.vol_dim_frame = out_pData.get_data_dimension_by_axis_label(
+            'voxel_y', contains=True)
+
+    def _filter(self, sinograms):
+        """ Ramp filter all the sinograms along the detector dimension, zero
+        padded to avoid wrap-around, and add a zero at each edge for the
+        back projection. """
+        width = sinograms.shape[-1]
+        size = int(2**np.ceil(np.log2(2*width)))
+        fs = np.fft.rfft(sinograms, n=size, axis=-1)
+        fs *= np.fft.rfftfreq(size)
+        filtered = np.zeros(sinograms.shape[:-1] + (width+2,), np.float32)
+        filtered[..., 1:-1] = np.fft.irfft(fs, n=size, axis=-1)[..., :width]
+        return filtered
+
+    def _get_tables(self, vol_shape, angles, cor, width):
+        """ The interpolation indices and weights of every pixel at each
+        angle, in batches of angles.  They are kept for the next frames with
+        the same volume shape, angles and centre if they are small enough,
+        otherwise they are calculated as they are needed. """
+        key = (vol_shape, angles.tostring(), cor, width)
+        if key in self.tables:
+            return self.tables[key]
+
+        nPixels = vol_shape[0]*vol_shape[1]
+        step = max(1, BATCH_SIZE/nPixels)
+        batches = (self.__get_table(vol_shape, angles, cor, width, i, step)
+                   for i in range(0, len(angles), step))
+        if len(angles)*nPixels*12 > MAX_TABLE_BYTES:
+            return batches
+        self.tables = {key: list(batches)}
+        return self.tables[key]
 
-    def _filter(self, sinogram):
-        ff = np.arange(sinogram.shape[0])
-        ff -= sinogram.shape[0]/2
-        ff = np.abs(ff)
-        fs = np.fft.fft(sinogram)
-        ffs = fs*ff
-        return np.fft.ifft(ffs).real
+    def __get_table(self, vol_shape, angles, cor, width, start, step):
+        centre = (vol_shape[0]/2, vol_shape[1]/2)
+        x = np.arange(-centre[0], vol_shape[0] - centre[0], dtype=np.float32)
+        y = np.arange(-centre[1], vol_shape[1] - centre[1], dtype=np.float32)
+        theta = np.deg2rad(angles[start:start+step]).astype(np.float32)
 
-    def _back_project(self, mapping, sino_element, centre):
-        mapping_array = mapping+centre
-        return sino_element[mapping_array.astype('int')]
+        # position on the (edge padded) detector of each pixel
+        pos = np.cos(theta)[:, None, None]*x[None, None, :] - \
+            np.sin(theta)[:, None, None]*y[None, :, None]
+        pos += cor + 1
+        np.clip(pos, 0, width+1, out=pos)
+        idx = np.minimum(pos.astype(np.intp), width)
+        pos -= idx
+        idx += (np.arange(len(theta))*(width+2))[:, None, None]
+        return start, len(theta), idx, pos
 
-    def _mapping_array(self, shape, center, theta):
-        x, y = np.meshgrid(np.arange(-center[0], shape[0] - center[0]),
-                           np.arange(-center[1], shape[1] - center[1]))
-        return x*np.cos(theta) - y*np.sin(theta)
+    def _back_project(self, filtered, cors, angles, vol_shape):
+        nFrames, nAngles, width = filtered.shape
+        width -= 2
+        result = np.zeros((nFrames,) + vol_shape, dtype=np.float32)
+        slopes = np.zeros_like(filtered)
+        slopes[..., :-1] = np.diff(filtered, axis=-1)
+        for cor in np.unique(cors):
+            frames = np.where(cors == cor)[0]
+            for start, n, idx, weight in \
+                    self._get_tables(vol_shape, angles, cor, width):
+                for j in frames:
+                    # linear interpolation of the filtered sinograms
+                    values = slopes[j, start:start+n].ravel().take(idx)
+                    values *= weight
+                    values += filtered[j, start:start+n].ravel().take(idx)
+                    result[j] += values.sum(axis=0)
+        return result*(np.pi/nAngles)
 
     def process_frames(self, data):
-        sino = data[0]
-        centre_of_rotations, angles, vol_shape, init = self.get_frame_params()
-        sinogram = sino[:, np.newaxis, :]
-        try:
-            centre = self.kwargs['centre']
-        except:
-            centre = (vol_shape[0]/2, vol_shape[1]/2)
-
-        results = []
-        for j in range(sinogram.shape[1]):
-            result = np.zeros(vol_shape, dtype=np.float32)
-            for i in range(sinogram.shape[0]):
-                theta = i*(np.pi/sinogram.shape[0])
-                mapping_array = self._mapping_array(vol_shape, centre, theta)
-                filt = np.zeros(sinogram.shape[2]*3, dtype=np.float32)
-                filt[sinogram.shape[2]:sinogram.shape[2]*2] = \
-                    self._filter(np.log(np.nan_to_num(sinogram[i, j, :])+1))
-                result += \
-                    self._back_project(mapping_array, filt,
-                                       (centre_of_rotations +
-                                           sinogram.shape[2]))
-            results.append(result[:, np.newaxis, :])
-        result = np.hstack(results)
-        return result
+        cors, angles, vol_shape, init = self.get_frame_params()
+        vol_shape = tuple(int(v) for v in
+                          np.delete(vol_shape, self.vol_dim_frame))
+        sinograms = np.transpose(data[0], self.sino_dims)
+        filtered = self._filter(np.log(np.nan_to_num(sinograms)+1))
+        result = self._back_project(
+            filtered, np.asarray(cors)[:len(sinograms)], angles, vol_shape)
+        return np.moveaxis(result, 0, self.vol_dim_frame)
 
     def get_max_frames(self):
-        return 'single'
+        return 'multiple'
 
     def get_citation_information(self):
         cite_info = CitationInformation()
@@ -0,0 +1,101 @@
+# Copyright 2014 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. module:: base_ring_removal
+   :platform: Unix
+   :synopsis: A base class for ring removal plugins that correct blocks of \
+       sinograms using the mean of chunks of rows.
+
+.. moduleauthor:: Nghia Vo <scientificsoftware@diamond.ac.uk>
+
+"""
+
+import numpy as np
+
+from savu.plugins.plugin import Plugin
+
+
+class BaseRingRemoval(Plugin):
+    """
+    A base class for ring removal plugins working on multiple sinograms.
+
+    :param number_of_chunks: Divide the sinogram to many chunks of \
+        rows. Default: 1
+    """
+
+    def __init__(self, name='BaseRingRemoval'):
+        super(BaseRingRemoval, self).__init__(name)
+
+    def setup(self):
+        in_dataset, out_dataset = self.get_datasets()
+        out_dataset[0].create_dataset(in_dataset[0])
+        in_pData, out_pData = self.get_plugin_datasets()
+        in_pData[0].plugin_data_setup('SINOGRAM', 'multiple')
+        out_pData[0].plugin_data_setup('SINOGRAM', 'multiple')
+
+    def is_thread_safe(self):
+        return True
+
+    def base_pre_process(self):
+        in_pData = self.get_plugin_in_datasets()
+        self.slice_dir = in_pData[0].get_slice_dimension()
+        width_dim = \
+            in_pData[0].get_data_dimension_by_axis_label('detector_x')
+        height_dim = \
+            in_pData[0].get_data_dimension_by_axis_label('rotation_angle')
+        sino_shape = list(in_pData[0].get_shape())
+        self.width1 = sino_shape[width_dim]
+        self.height1 = sino_shape[height_dim]
+        num_chunks = np.clip(np.int16(
+                self.parameters['number_of_chunks']), 1, self.height1)
+        # as np.array_split: the first chunks have one extra row
+        size, self.n_larger = divmod(self.height1, num_chunks)
+        self.chunk_sizes = np.array([size + 1]*self.n_larger +
+                                    [size]*(num_chunks - self.n_larger))
+
+    def _get_sinograms(self, data):
+        """ A view of the data with shape (nSinos, height, width). """
+        return np.rollaxis(data, self.slice_dir, 0)
+
+    def _set_sinograms(self, sinograms):
+        """ Return (nSinos, height, width) sinograms in the data layout. """
+        return np.rollaxis(sinograms, 0, self.slice_dir + 1)
+
+    def _get_chunk_means(self, sinograms):
+        """ The mean of each chunk of rows of each sinogram.
+
+        :returns: The means, of shape (nSinos, number_of_chunks, width)
+        """
+        nSinos, width = sinograms.shape[0], sinograms.shape[-1]
+        means = []
+        start = 0
+        for size, n in [(self.chunk_sizes[0], self.n_larger),
+                        (self.chunk_sizes[-1],
+                         len(self.chunk_sizes) - self.n_larger)]:
+            if n:
+                stop = start + n*size
+                block = sinograms[:, start:stop].reshape(
+                    nSinos, n, size, width)
+                means.append(block.mean(axis=2, dtype=np.float64))
+                start = stop
+        return np.concatenate(means, axis=1)
+
+    def _expand_chunks(self, values):
+        """ Repeat chunk values for every row in each chunk.
+
+        :param ndarray values: Values of shape (nSinos, number_of_chunks, \
+            width).
+        """
+        return np.repeat(values, self.chunk_sizes, axis=1)
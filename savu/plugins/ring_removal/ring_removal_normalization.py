@@ -20,15 +20,15 @@
 
 """
 
-from savu.plugins.plugin import Plugin
+from savu.plugins.ring_removal.base_ring_removal import BaseRingRemoval
 from savu.plugins.driver.cpu_plugin import CpuPlugin
 from savu.plugins.utils import register_plugin
 import numpy as np
-from scipy.ndimage import gaussian_filter
+from scipy.ndimage import gaussian_filter1d
 
 
 @register_plugin
-class RingRemovalNormalization(Plugin, CpuPlugin):
+class RingRemovalNormalization(BaseRingRemoval, CpuPlugin):
     """
 
     Method to remove stripe artefacts in a sinogram (<-> ring artefacts in a \
@@ -36,45 +36,20 @@ class RingRemovalNormalization(Plugin, CpuPlugin):
     improvement to handle partial stripes is included.
 
     :param radius: Radius of the Gaussian kernel. Default: 11.
-    :param number_of_chunks: Divide the sinogram to many chunks of \
-        rows. Default: 1
     """
 
     def __init__(self):
         super(RingRemovalNormalization, self).__init__(
                 "RingRemovalNormalization")
 
-    def setup(self):
-        in_dataset, out_dataset = self.get_datasets()
-        out_dataset[0].create_dataset(in_dataset[0])
-        in_pData, out_pData = self.get_plugin_datasets()
-        in_pData[0].plugin_data_setup('SINOGRAM', 'single')
-        out_pData[0].plugin_data_setup('SINOGRAM', 'single')
-
     def pre_process(self):
-        in_pData = self.get_plugin_in_datasets()
-        width_dim = \
-            in_pData[0].get_data_dimension_by_axis_label('detector_x')
-        height_dim = \
-            in_pData[0].get_data_dimension_by_axis_label('rotation_angle')
-        sino_shape = list(in_pData[0].get_shape())
-        self.width1 = sino_shape[width_dim]
-        self.height1 = sino_shape[height_dim]
+        self.radius = \
+            np.clip(np.int16(self.parameters['radius']), 0, self.width1)
 
     def process_frames(self, data):
-        sinogram = np.copy(data[0])
-        radius = np.clip(np.int16(self.parameters['radius']), 0, self.width1)
-        num_chunks = np.clip(np.int16(
-                self.parameters['number_of_chunks']), 1, self.height1)
-        list_pos = np.array_split(np.arange(self.height1), num_chunks)
-        for pos in list_pos:
-            bindex = pos[0]
-            eindex = pos[-1] + 1
-            list_mean = np.mean(sinogram[bindex:eindex, :], axis=0)
-            list_mean_filtered = gaussian_filter(list_mean, radius)
-            list_coe = list_mean_filtered - list_mean
-            mat_coe = \
-                np.zeros((eindex - bindex, self.width1), dtype=np.float32)
-            mat_coe[:] = list_coe
-            sinogram[bindex:eindex, :] = sinogram[bindex:eindex, :] + mat_coe
-        return sinogram
\ No newline at end of file
+        sinograms = self._get_sinograms(data[0])
+        list_mean = self._get_chunk_means(sinograms)
+        list_coe = gaussian_filter1d(list_mean, self.radius, axis=-1)
+        list_coe -= list_mean
+        mat_coe = self._expand_chunks(list_coe.astype(np.float32))
+        return self._set_sinograms(sinograms + mat_coe)
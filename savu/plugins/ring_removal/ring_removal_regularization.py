@@ -19,7 +19,7 @@
 .. moduleauthor:: Nghia Vo <scientificsoftware@diamond.ac.uk>    
    
 """
-from savu.plugins.plugin import Plugin
+from savu.plugins.ring_removal.base_ring_removal import BaseRingRemoval
 from savu.plugins.driver.cpu_plugin import CpuPlugin
 from savu.plugins.utils import register_plugin
 from savu.data.plugin_list import CitationInformation
@@ -27,36 +27,20 @@ import numpy as np
 
 
 @register_plugin
-class RingRemovalRegularization(Plugin, CpuPlugin):
+class RingRemovalRegularization(BaseRingRemoval, CpuPlugin):
     """
 
     Method to remove stripe artefacts in a sinogram (<-> ring artefacts in a\ 
     reconstructed image) using a regularization-based method. 
     A simple improvement to handle partial stripes is included.    
     :param alpha: The correction strength. Smaller is stronger. Default: 0.005
-    :param number_of_chunks: Divide the sinogram to many chunks of rows. \
-    Default: 1
     """
 
     def __init__(self):
         super(RingRemovalRegularization, self).__init__(
             "RingRemovalRegularization")
 
-    def setup(self):
-        in_dataset, out_dataset = self.get_datasets()
-        out_dataset[0].create_dataset(in_dataset[0])
-        in_pData, out_pData = self.get_plugin_datasets()
-        in_pData[0].plugin_data_setup('SINOGRAM', 'single')
-        out_pData[0].plugin_data_setup('SINOGRAM', 'single')
-
     def pre_process(self):
-        in_pData = self.get_plugin_in_datasets()
-        width_dim = in_pData[0].get_data_dimension_by_axis_label('detector_x')
-        height_dim = in_pData[0].get_data_dimension_by_axis_label(
-            'rotation_angle')
-        sino_shape = list(in_pData[0].get_shape())
-        self.width1 = sino_shape[width_dim]
-        self.height1 = sino_shape[height_dim]
         alpha = self.parameters['alpha']
         tau = 2.0 * np.arcsinh(np.sqrt(alpha) * 0.5)
         ilist = np.arange(0, self.width1)
@@ -70,29 +54,19 @@ class RingRemovalRegularization(Plugin, CpuPlugin):
                          (alpha * np.sinh(self.width1 * tau))) * (mat1a + mat2a)
 
     def process_frames(self, data):
-        sinogram = np.copy(data[0])
-        num_mean = np.mean(sinogram)
-        sinogram[sinogram <= 0.0] = num_mean  # Note performance
-        sinogram = -np.log(sinogram)
-        num_chunks = np.clip(
-            np.int16(self.parameters['number_of_chunks']), 1, self.height1)
-        list_pos = np.array_split(np.arange(self.height1), num_chunks)
-        list_grad = np.zeros(self.width1, dtype=np.float32)
-        mat_grad = np.zeros((self.width1, self.width1), dtype=np.float32)
-        for pos in list_pos:
-            bindex = pos[0]
-            eindex = pos[-1] + 1
-            list_mean = np.mean(sinogram[bindex:eindex, :], axis=0)
-            list_grad[1:-1] = - np.diff(list_mean, 2)
-            list_grad[0] = list_mean[0] - list_mean[1]
-            list_grad[-1] = list_mean[-1] - list_mean[-2]
-            mat_grad[:] = list_grad
-            list_corr = np.sum(mat_grad * self.mat_coe, axis=1)
-            mat_corr = np.zeros(
-                (eindex - bindex, self.width1), dtype=np.float32)
-            mat_corr[:] = list_corr
-            sinogram[bindex:eindex, :] = sinogram[bindex:eindex, :] + mat_corr
-        return np.exp(-sinogram)
+        sinograms = self._get_sinograms(data[0])
+        num_mean = np.mean(sinograms, axis=(1, 2), keepdims=True)
+        sinograms = np.where(sinograms <= 0.0, num_mean, sinograms)
+        sinograms = -np.log(sinograms)
+        list_mean = self._get_chunk_means(sinograms)
+        list_grad = np.empty_like(list_mean)
+        list_grad[..., 1:-1] = - np.diff(list_mean, 2)
+        list_grad[..., 0] = list_mean[..., 0] - list_mean[..., 1]
+        list_grad[..., -1] = list_mean[..., -1] - list_mean[..., -2]
+        # sum(mat_grad * mat_coe, axis=1) for every chunk of every sinogram
+        list_corr = np.dot(list_grad, self.mat_coe.T).astype(np.float32)
+        sinograms += self._expand_chunks(list_corr)
+        return self._set_sinograms(np.exp(-sinograms))
 
     def get_citation_information(self):
         cite_info = CitationInformation()
@@ -59,57 +59,64 @@ class RingRemovalWaveletfft(BaseFilter, CpuPlugin):
     def pre_process(self):
         in_pData = self.get_plugin_in_datasets()[0]
         self.slice_dir = in_pData.get_slice_dimension()
-        nDims = len(in_pData.get_shape())
-        self.sslice = [slice(None)]*nDims
-        sino_shape = list(in_pData.get_shape())
-        if len(sino_shape) is 3:
-            del sino_shape[self.slice_dir]
-
-        self.width1 = sino_shape[1] + 2*self.pad
-        self.height1 = sino_shape[0] + 2*self.pad
-
         n = np.abs(self.parameters['nvalue'])
         self.sigma = np.abs(self.parameters['sigma'])
         self.level = np.abs(self.parameters['level'])
         self.waveletname = 'db'+str(n)
 
+        # the number of rows in the padded frame, after rolling the slice
+        # dimension to the front
+        dims = [d for d in range(len(in_pData.get_shape()))
+                if d != self.slice_dir]
+        my = in_pData.get_shape()[dims[-2]] + 2*self.pad
+        # the filters are created here, as process_frames may be threaded
+        filter_len = pywt.Wavelet(self.waveletname).dec_len
+        self.damping = {}
+        for j in range(self.level):
+            my = pywt.dwt_coeff_len(my, filter_len, 'symmetric')
+            self.damping[my] = self._get_damping(my)
+
+    def _get_damping(self, my):
+        """ The damping of the vertical frequencies of a horizontal band with
+        my rows, applied to the output of a real FFT along the rows.
+
+        Damping the shifted 2D FFT and taking the real part of the inverse is
+        equivalent to damping with the symmetrised filter along the rows only.
+        """
+        y_hat = (np.arange(-my, my, 2, dtype='float') + 1) / 2
+        damp = 1 - np.exp(-np.power(y_hat, 2) /
+                          (2 * np.power(self.sigma, 2)))
+        damp = np.fft.ifftshift(damp)
+        damp = 0.5*(damp + np.roll(damp[::-1], 1))
+        return damp[:my//2 + 1, None].astype(np.float32)
+
     def process_frames(self, data):
-        output = np.empty_like(data[0])
-        nSlices = data[0].shape[self.slice_dir]
-        for i in range(nSlices):
-            self.sslice[self.slice_dir] = i
-            sino = data[0][tuple(self.sslice)]
-             # Wavelet decomposition.
-            cH = []
-            cV = []
-            cD = []
-            for j in range(self.level):
-                sino, (cHt, cVt, cDt) = pywt.dwt2(sino, self.waveletname)
-                cH.append(cHt)
-                cV.append(cVt)
-                cD.append(cDt)
-             # FFT transform of horizontal frequency bands.
-            for j in range(self.level):
-                 # FFT
-                fcV = np.fft.fftshift(np.fft.fft2(cV[j]))
-                my, mx = fcV.shape
-                # Damping of ring artifact information.
-                y_hat = (np.arange(-my, my, 2, dtype='float') + 1) / 2
-                damp = 1 - np.exp(-np.power(y_hat, 2) / (2 * np.power(self.sigma, 2)))
-                fcV = np.multiply(fcV, np.transpose(np.tile(damp, (mx, 1))))
-    
-                 # Inverse FFT.
-                cV[j] = np.real(np.fft.ifft2(np.fft.ifftshift(fcV)))
-            # Wavelet reconstruction.
-            for j in range(self.level)[::-1]:
-                sino = sino[0:cH[j].shape[0], 0:cH[j].shape[1]]
-                sino = pywt.idwt2((sino, (cH[j], cV[j], cD[j])), self.waveletname)
-            if self.height1%2!=0:
-                sino = sino[0:-1,:]
-            if self.width1%2!=0:
-                sino = sino[:,0:-1]
-            output[self.sslice] = sino
-        return output
+        # (nSinos, height, width)
+        sino = np.rollaxis(data[0], self.slice_dir, 0)
+        nrow, ncol = sino.shape[1:]
+        # Wavelet decomposition.
+        cH = []
+        cV = []
+        cD = []
+        for j in range(self.level):
+            sino, (cHt, cVt, cDt) = \
+                pywt.dwt2(sino, self.waveletname, axes=(-2, -1))
+            cH.append(cHt)
+            cV.append(cVt)
+            cD.append(cDt)
+        # FFT transform of horizontal frequency bands and damping of ring
+        # artifact information.
+        for j in range(self.level):
+            my = cV[j].shape[-2]
+            fcV = fft.rfft(cV[j], axis=-2)
+            fcV *= self.damping[my]
+            cV[j] = fft.irfft(fcV, n=my, axis=-2)
+        # Wavelet reconstruction.
+        for j in range(self.level)[::-1]:
+            sino = sino[..., 0:cH[j].shape[-2], 0:cH[j].shape[-1]]
+            sino = pywt.idwt2((sino, (cH[j], cV[j], cD[j])),
+                              self.waveletname, axes=(-2, -1))
+        return np.rollaxis(sino[:, :nrow, :ncol], 0, self.slice_dir + 1)
 
     def get_plugin_pattern(self):
         return 'SINOGRAM'
@@ -117,3 +124,6 @@ class RingRemovalWaveletfft(BaseFilter, CpuPlugin):
     def get_max_frames(self):
         return 'multiple'
 
+    def is_thread_safe(self):
+        return True
+
@@ -22,6 +22,7 @@
 """
 
 from savu.plugins.plugin import Plugin
+from savu.plugins.savers.utils.write_queue import WriteQueue
 
 
 class BaseSaver(Plugin):
@@ -30,17 +31,49 @@ class BaseSaver(Plugin):
 
     :*param out_datasets: Hidden, dummy out_datasets entry. Default: []
     :param in_datasets: The name of the dataset to save. Default: [].
+    :param write_buffer: Memory (MB) for frames waiting to be written by a \
+        separate thread, so that saving overlaps processing. Set to 0 to \
+        write each frame as it arrives. Default: 256.
     """
 
     def __init__(self, name="BaseSaver"):
         super(BaseSaver, self).__init__(name)
         self.frame = None
+        self.write_queue = None
+        self.writer = None
 
     def setup(self):
         in_pData = self.get_plugin_in_datasets()
         pattern = self.get_pattern()
         in_pData[0].plugin_data_setup(pattern, self.get_max_frames())
 
+    def _start_write_queue(self, writer, coalesce=False, queue=True):
+        """ Frames passed to _write are written with writer(index, data),
+        through a write-behind queue if there is a write_buffer.
+
+        :param func writer: The function that writes a frame.
+        :param bool coalesce: The index is a slice list and adjacent frames \
+            can be written together.
+        :param bool queue: Set to False to always write synchronously.
+        """
+        self.writer = writer
+        budget = self.parameters['write_buffer']
+        if queue and budget:
+            self.write_queue = \
+                WriteQueue(writer, int(budget*2**20), coalesce=coalesce)
+
+    def _write(self, index, data):
+        if self.write_queue is None:
+            self.writer(index, data)
+        else:
+            self.write_queue.put(index, data)
+
+    def _stop_write_queue(self):
+        """ Wait for all queued frames to be written. """
+        if self.write_queue is not None:
+            write_queue, self.write_queue = self.write_queue, None
+            write_queue.close()
+
     def _get_group_name(self, name):
         nPlugin = self.exp.meta_data.get('nPlugin')
         plugin_dict = \
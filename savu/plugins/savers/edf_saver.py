@@ -68,6 +68,7 @@ class EdfSaver(BaseSaver, CpuPlugin):
             k+=1
             self.axis_info.append(foo)
         #self.axis_info = [in_datasets[0].meta_data.get(ix) for ix in self.axes]
+        self._start_write_queue(self.__write_frame)
 
     def process_frames(self, data):
 
@@ -86,10 +87,17 @@ class EdfSaver(BaseSaver, CpuPlugin):
         header['Size'] = str(8.0*np.prod(foo.shape))
         out_title = "%s_channel_%s" % (elements.replace(" ","_"), str(channel))
         header['Title'] = out_title
-        fout = EdfImage(foo, header)
         filename = self.folder+os.sep + str(out_title) + '.edf'
+        self._write((filename, header), foo)
+
+    def __write_frame(self, index, data):
+        filename, header = index
+        fout = EdfImage(data, header)
         fout.write(filename)
 
+    def post_process(self):
+        self._stop_write_queue()
+
     def get_pattern(self):
         return "PROJECTION"
 
@@ -24,6 +24,8 @@
 import logging
 import os
 import copy
+import numpy as np
+from mpi4py import MPI
 
 from savu.plugins.savers.utils.hdf5_utils import Hdf5Utils
 from savu.plugins.savers.base_saver import BaseSaver
@@ -41,6 +43,8 @@ class Hdf5Saver(BaseSaver, CpuPlugin):
         will automate this process by choosing the output pattern from the \
         previous plugin, if it exists, else the first \
         pattern. Default: 'optimum'.
+    :param collective: Write with collective MPI-IO, if the file is opened \
+        with the h5py mpio driver. Default: False.
     """
 
     def __init__(self, name='Hdf5Saver'):
@@ -50,14 +54,44 @@ class Hdf5Saver(BaseSaver, CpuPlugin):
         self.data_name = None
         self.filename = None
         self.group_name = None
+        self.chunks = None
+        self.collective = False
+        self.nCollective = 0
+        self.nWrites = 0
+
+    def setup(self):
+        # the chunks are fitted to the transfer, so that each write covers
+        # whole chunks along the slice dimension
+        in_pData = self.get_plugin_in_datasets()[0]
+        in_pData.plugin_data_setup(self.get_pattern(), 'multiple')
+        self.chunks = self.__calculate_chunking(in_pData)
+
+    def __calculate_chunking(self, pData):
+        in_data = self.get_in_datasets()[0]
+        pattern = copy.deepcopy(pData.get_pattern())
+        mft = pData._get_max_frames_transfer()
+        pattern[pattern.keys()[0]]['max_frames_transfer'] = mft
+        chunking = Chunking(self.exp, {'current': pattern, 'next': []})
+        dtype = in_data.dtype if in_data.dtype is not None else np.float32
+        chunks = chunking._calculate_chunking(in_data.get_shape(), dtype)
+        if not isinstance(chunks, tuple) or not mft:
+            return chunks
+        return self.__fit_chunks_to_transfer(
+            chunks, pData.get_slice_dimension(), mft)
+
+    def __fit_chunks_to_transfer(self, chunks, sdir, mft):
+        """ Reduce the chunk length along the slice dimension to the largest
+        divisor of the number of frames in a transfer. """
+        chunk = int(min(chunks[sdir], mft))
+        while mft % chunk:
+            chunk -= 1
+        return chunks[:sdir] + (chunk,) + chunks[sdir+1:]
 
     def pre_process(self):
         # Create the hdf5 output file
         self.hdf5 = Hdf5Utils(self.exp)
         self.in_data = self.get_in_datasets()[0]
         self.data_name = self.in_data.get_name()
-        current_pattern = self.__set_current_pattern()
-        pattern_idx = {'current': current_pattern, 'next': []}
 
         self.filename = self.__get_file_name()
         self.group_name = self._get_group_name(self.data_name)
@@ -68,26 +102,82 @@ class Hdf5Saver(BaseSaver, CpuPlugin):
         group.attrs['signal'] = 'data'
         self.exp._barrier()
         shape = self.in_data.get_shape()
-        chunking = Chunking(self.exp, pattern_idx)
         dtype = self.in_data.data.dtype
-        chunks = chunking._calculate_chunking(shape, dtype)
         self.exp._barrier()
         self.out_data = self.hdf5.create_dataset_nofill(
-                group, "data", shape, dtype, chunks=chunks)
+                group, "data", shape, dtype, chunks=self.chunks)
+
+        self.collective = self.__set_collective()
+        self.nCollective = \
+            self.__get_collective_writes() if self.collective else 0
+        self.nWrites = 0
+        # MPI-IO may only be called from the writer thread if MPI is
+        # thread safe, and collective writes must be made in step
+        threaded = not self.collective and (
+            not self.exp.meta_data.get('mpi') or
+            MPI.Query_thread() == MPI.THREAD_MULTIPLE)
+        self._start_write_queue(self.__write_frames, coalesce=True,
+                                queue=threaded)
+
+    def __set_collective(self):
+        if not self.parameters['collective']:
+            return False
+        if self.backing_file.driver != 'mpio' or \
+                not hasattr(self.out_data, 'collective'):
+            logging.warn("Collective writes need the h5py mpio driver: "
+                         "writing independently.")
+            return False
+        return True
+
+    def __get_collective_writes(self):
+        """ The number of writes that every process makes, which are made
+        collectively.  A process with more blocks writes the rest
+        independently, so the collective calls always match.  Blocks that
+        are handed out dynamically cannot be counted in advance, so are all
+        written independently whenever the system parameters request a
+        dynamic distribution (the transport may still choose a static one).
+        """
+        sys_params = self.exp.meta_data.get('system_params')
+        if sys_params.get('frame_distribution', 'static') == 'dynamic':
+            logging.warn("Collective writes need a static frame "
+                         "distribution: writing independently.")
+            return 0
+        sl = self.in_data._get_transport_data()._get_slice_lists_per_process(
+            'in')
+        nTrans = len(sl['transfer']) if 'transfer' in sl else 1
+        cp = self.exp.checkpoint
+        sTrans, sProc = \
+            (cp.get_trans_idx(), cp.get_proc_idx()) if cp else (0, 0)
+        nWrites = max(0, nTrans - sTrans)*max(0, len(sl['process']) - sProc)
+        return MPI.COMM_WORLD.allreduce(int(nWrites), op=MPI.MIN)
 
     def process_frames(self, data):
-        self.out_data[self.get_current_slice_list()[0]] = data[0]
+        slice_list = self.get_current_slice_list()[0]
+        self._write(slice_list, self.__remove_padding(slice_list, data[0]))
+
+    def __remove_padding(self, slice_list, data):
+        """ The final block of frames is padded to the full number of
+        frames. """
+        if data.ndim != len(slice_list):
+            return data
+        shape = self.out_data.shape
+        return data[tuple(slice(0, len(xrange(*sl.indices(shape[i]))))
+                          for i, sl in enumerate(slice_list))]
+
+    def __write_frames(self, slice_list, data):
+        if self.nWrites < self.nCollective:
+            with self.out_data.collective:
+                self.out_data[tuple(slice_list)] = data
+        else:
+            self.out_data[tuple(slice_list)] = data
+        self.nWrites += 1
 
     def post_process(self):
+        self._stop_write_queue()
         self._link_datafile_to_nexus_file(self.data_name, self.filename,
                                           self.group_name + '/data')
         self.backing_file.close()
 
-    def __set_current_pattern(self):
-        pattern = copy.deepcopy(self.in_data._get_plugin_data().get_pattern())
-        pattern[pattern.keys()[0]]['max_frames'] = self.get_max_frames()
-        return pattern
-
     def get_pattern(self):
         if self.parameters['pattern'] != 'optimum':
             return self.parameters['pattern']
@@ -96,6 +186,9 @@ class Hdf5Saver(BaseSaver, CpuPlugin):
             return previous_pattern.keys()[0]
         return self.get_in_datasets()[0].get_data_patterns().keys()[0]
 
+    def get_max_frames(self):
+        return 'multiple'
+
     def __get_file_name(self):
         nPlugin = self.exp.meta_data.get('nPlugin')
         plugin_dict = \
@@ -43,7 +43,6 @@ class TiffSaver(BaseSaver, CpuPlugin):
 
     def __init__(self, name='TiffSaver'):
         super(TiffSaver, self).__init__(name)
-        self.count = None
         self.folder = None
         self.data_name = None
         self.file_name = None
@@ -52,7 +51,6 @@ class TiffSaver(BaseSaver, CpuPlugin):
 
     def pre_process(self):
         self.data_name = self.get_in_datasets()[0].get_name()
-        self.count = 0
         self.group_name = self._get_group_name(self.data_name)
         self.folder = "%s/%s-%s" % (self.exp.meta_data.get("out_path"),
                                     self.name, self.data_name)
@@ -65,6 +63,7 @@ class TiffSaver(BaseSaver, CpuPlugin):
         if MPI.COMM_WORLD.rank == 0:
             if not os.path.exists(self.folder):
                 os.makedirs(self.folder)
+        self._start_write_queue(tf.imsave)
 
     def setup(self):
         super(TiffSaver, self).setup()
@@ -74,7 +73,10 @@ class TiffSaver(BaseSaver, CpuPlugin):
             raise Exception(emsg)
 
     def process_frames(self, data):
-        frame = self.get_global_frame_index()[self.count]
+        frame = self.get_global_frame_index()[
+            self.get_process_frames_counter()]
         filename = '%s%05i.tiff' % (self.filename, frame)
-        tf.imsave(filename, data[0])
-        self.count += 1
+        self._write(filename, data[0])
+
+    def post_process(self):
+        self._stop_write_queue()
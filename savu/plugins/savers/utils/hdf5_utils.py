@@ -26,6 +26,7 @@ import h5py
 import logging
 from mpi4py import MPI
 
+import savu.core.trace as trace
 from savu.data.chunking import Chunking
 #from savu.data.data_structures.data_types.data_plus_darks_and_flats \
 #    import NoImageKey
@@ -60,7 +61,8 @@ class Hdf5Utils(object):
         kwargs = {'driver': 'mpio', 'comm': comm, 'info': self.info}\
             if self.exp.meta_data.get('mpi') and mpi else {}
 
-        backing_file = h5py.File(filename, mode, **kwargs)
+        with trace.span('open', 'hdf5', file=filename, mode=mode):
+            backing_file = h5py.File(filename, mode, **kwargs)
 
         if mpi:
             self.exp._barrier(communicator=comm, msg=msg+'2')
@@ -185,7 +187,8 @@ class Hdf5Utils(object):
         if data.backing_file is not None:
             try:
                 filename = data.backing_file.filename
-                data.backing_file.close()
+                with trace.span('close', 'hdf5', file=filename):
+                    data.backing_file.close()
                 logging.debug("File close successful: %s", filename)
                 data.backing_file = None
             except:
@@ -0,0 +1,195 @@
+# Copyright 2014 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. module:: write_queue
+   :platform: Unix
+   :synopsis: A bounded write-behind queue, serviced by a separate thread, \
+       for saver plugins.
+
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+
+"""
+
+import logging
+import collections
+import threading
+import numpy as np
+
+
+class WriteQueue(object):
+    """ Frames put in the queue are written by a writer thread, so the
+    caller can carry on processing while the data is saved.  A put blocks
+    while the frames waiting to be written use more than max_bytes.
+
+    If coalesce is True the index of each frame is a list of slices into
+    the output, and frames that arrive one after another and are adjacent
+    along a single dimension are joined into one larger write.  The joined
+    copy is counted against max_bytes while it is written, so a join stops
+    once the frames and their copy would no longer fit in the budget.
+
+    :param func write: Called by the writer thread as write(index, data).
+    :param int max_bytes: The memory budget for queued frames.
+    :param bool coalesce: Join adjacent frames into larger writes.
+    """
+
+    def __init__(self, write, max_bytes, coalesce=False):
+        self.write = write
+        self.max_bytes = max_bytes
+        self.coalesce = coalesce
+        self._pending = collections.deque()
+        self._nbytes = 0
+        self._outstanding = 0
+        self._closed = False
+        self._error = None
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name='WriteQueue')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def put(self, index, data):
+        """ Queue a frame to be written, waiting for space if the queue is
+        full.  The data is copied, so the caller may reuse it. """
+        data = np.array(data)
+        with self._cond:
+            if self._closed:
+                raise Exception("The write queue has been closed.")
+            while self._outstanding and self._error is None and \
+                    self._nbytes + data.nbytes > self.max_bytes:
+                self._cond.wait()
+            self._check_error()
+            self._pending.append((index, data))
+            self._nbytes += data.nbytes
+            self._outstanding += 1
+            self._cond.notify_all()
+
+    def flush(self):
+        """ Wait for all queued frames to be written. """
+        with self._cond:
+            while self._outstanding and self._error is None:
+                self._cond.wait()
+            self._check_error()
+
+    def close(self):
+        """ Write any queued frames and stop the writer thread. """
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+        with self._cond:
+            self._check_error()
+
+    def _check_error(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+                items = list(self._pending)
+                self._pending.clear()
+
+            blocks = self._coalesce(items) if self.coalesce else \
+                [(index, None, [data]) for index, data in items]
+            for index, dim, arrays in blocks:
+                if not self._write_block(index, dim, arrays):
+                    break
+
+    def _write_block(self, index, dim, arrays):
+        """ Write a block of frames, joined along dim if there are several,
+        and release their space in the queue.
+
+        :returns: False if the write failed.
+        """
+        nbytes = sum(a.nbytes for a in arrays)
+        joined = nbytes if len(arrays) > 1 else 0
+        with self._cond:
+            self._nbytes += joined
+        try:
+            self.write(index, np.concatenate(arrays, axis=dim) if joined
+                       else arrays[0])
+        except Exception as e:
+            logging.exception("Failed to write queued frames")
+            with self._cond:
+                self._error = e
+                self._pending.clear()
+                self._nbytes = self._outstanding = 0
+                self._cond.notify_all()
+            return False
+
+        with self._cond:
+            self._nbytes -= nbytes + joined
+            self._outstanding -= len(arrays)
+            self._cond.notify_all()
+        return True
+
+    def _coalesce(self, items):
+        """ Join runs of frames that are adjacent along one dimension.  A
+        run is split when the frames and their joined copy would use more
+        than max_bytes.
+
+        :returns: A list of (slice list, join dimension, frames) blocks to \
+            write.
+        """
+        blocks = []
+        nbytes = 0
+        for index, data in items:
+            shape = _get_shape(index)
+            if shape is None or data.size != np.prod(shape):
+                blocks.append([tuple(index), None, [data]])
+                continue
+            data = data.reshape(shape)
+            dim = _adjacent_dim(blocks[-1], index) if blocks else None
+            if dim is None or 2*(nbytes + data.nbytes) > self.max_bytes:
+                blocks.append([list(index), None, [data]])
+                nbytes = data.nbytes
+                continue
+            block = blocks[-1]
+            block[0][dim] = slice(block[0][dim].start, index[dim].stop)
+            block[1] = dim
+            block[2].append(data)
+            nbytes += data.nbytes
+        return blocks
+
+
+def _get_shape(index):
+    """ The shape selected by a list of slices, or None if the selection is
+    not contiguous with known bounds. """
+    shape = []
+    for sl in index:
+        if not isinstance(sl, slice) or sl.start is None or \
+                sl.stop is None or sl.step not in [None, 1]:
+            return None
+        shape.append(sl.stop - sl.start)
+    return tuple(shape)
+
+
+def _adjacent_dim(block, index):
+    """ The dimension along which index follows on from the block, if any.
+    """
+    sl, dim, arrays = block
+    if not isinstance(sl, list) or len(sl) != len(index) or \
+            _get_shape(sl) is None:
+        return None
+    diff = [i for i in range(len(sl)) if sl[i] != index[i]]
+    if len(diff) != 1 or (dim is not None and diff[0] != dim):
+        return None
+    if sl[diff[0]].stop != index[diff[0]].start:
+        return None
+    return diff[0]
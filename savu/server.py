@@ -0,0 +1,345 @@
+# Copyright 2014 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. module:: server
+   :platform: Unix
+   :synopsis: A Savu server, keeping a pool of warm worker processes that \
+   run jobs submitted over a local socket, and its command line client.
+
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import getpass
+import argparse
+import threading
+import traceback
+import subprocess
+import Queue
+
+DEFAULT_SOCKET = \
+    os.path.join('/tmp', 'savu_server_%s.sock' % getpass.getuser())
+FINAL_MESSAGES = ['result', 'error', 'exit']
+
+
+class _Channel(object):
+    """ Newline delimited json messages over a socket. """
+
+    def __init__(self, sock):
+        self.sock = sock
+        self._reader = sock.makefile('rb')
+        self._lock = threading.Lock()
+
+    def send(self, msg):
+        with self._lock:
+            self.sock.sendall(json.dumps(msg) + '\n')
+
+    def receive(self):
+        """ Get the next message, or None if the connection is closed. """
+        line = self._reader.readline()
+        return json.loads(line) if line else None
+
+    def close(self):
+        self._reader.close()
+        self.sock.close()
+
+
+def _connect(socket_path):
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.connect(socket_path)
+    return _Channel(sock)
+
+
+class SavuServer(object):
+    """ Accepts Savu jobs from clients on a UNIX socket and passes each one
+    to an idle worker process, relaying the worker's messages back to the
+    client.  Workers are started once, with the Savu modules and plugins
+    imported, and are replaced if they exit.
+
+    :param str socket_path: The socket to listen on.
+    :param int n_workers: The number of worker processes.
+    """
+
+    def __init__(self, socket_path=DEFAULT_SOCKET, n_workers=1):
+        self.socket_path = socket_path
+        self.n_workers = n_workers
+        self._idle = Queue.Queue()
+        self._workers = []
+        self._stop = threading.Event()
+        self._sock = None
+
+    def serve_forever(self):
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.bind(self.socket_path)
+        self._sock.listen(5)
+        self._sock.settimeout(0.5)
+
+        supervisor = threading.Thread(target=self.__supervise)
+        supervisor.daemon = True
+        supervisor.start()
+
+        try:
+            while not self._stop.is_set():
+                try:
+                    conn, _ = self._sock.accept()
+                except socket.timeout:
+                    continue
+                conn.settimeout(None)
+                thread = threading.Thread(target=self.__handle,
+                                          args=(_Channel(conn),))
+                thread.daemon = True
+                thread.start()
+        finally:
+            self.__shutdown()
+
+    def __supervise(self):
+        """ Keep the pool of workers at full strength. """
+        while not self._stop.is_set():
+            self._workers = [w for w in self._workers if w.poll() is None]
+            for i in range(self.n_workers - len(self._workers)):
+                self._workers.append(subprocess.Popen(
+                    [sys.executable, '-m', 'savu.server', '--worker',
+                     '--socket', self.socket_path]))
+            time.sleep(0.5)
+
+    def __handle(self, channel):
+        msg = channel.receive()
+        if msg is None:
+            channel.close()
+        elif msg['type'] == 'worker':
+            self._idle.put(channel)
+        elif msg['type'] == 'job':
+            self.__run_job(channel, msg)
+        elif msg['type'] == 'shutdown':
+            self._stop.set()
+            channel.close()
+
+    def __run_job(self, client, job):
+        worker = self._idle.get()
+        worker.send(job)
+        msg = {'type': 'progress'}
+        while msg['type'] not in FINAL_MESSAGES:
+            msg = worker.receive()
+            if msg is None:
+                msg = {'type': 'error', 'msg': 'The Savu worker has exited.'}
+            try:
+                client.send(msg)
+            except socket.error:
+                # the client has gone, but let the job finish
+                pass
+
+        client.close()
+        if msg['type'] == 'error':
+            # the worker exits after an error and is replaced
+            worker.close()
+        else:
+            self._idle.put(worker)
+
+    def __shutdown(self):
+        self._stop.set()
+        for worker in self._workers:
+            if worker.poll() is None:
+                worker.terminate()
+        self._sock.close()
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+
+class _MessageStream(object):
+    """ A file-like object that forwards whole lines of output to the client
+    as progress messages. """
+
+    def __init__(self, channel):
+        self.channel = channel
+        self._buffer = ''
+
+    def write(self, text):
+        self._buffer += text
+        while '\n' in self._buffer:
+            line, self._buffer = self._buffer.split('\n', 1)
+            self.channel.send({'type': 'progress', 'msg': line})
+
+    def flush(self):
+        if self._buffer:
+            self.channel.send({'type': 'progress', 'msg': self._buffer})
+            self._buffer = ''
+
+
+def _import_plugins():
+    """ Import the plugin modules, so they are ready for the first job. """
+    import pkgutil
+    import logging
+    import savu.plugins
+    import savu.plugins.utils as pu
+
+    paths = pu.get_plugins_paths()[:-1]
+    modules = list(pkgutil.walk_packages(paths)) + list(
+        pkgutil.walk_packages(savu.plugins.__path__, 'savu.plugins.'))
+    for loader, name, _ in modules:
+        if name not in sys.modules:
+            try:
+                loader.find_module(name).load_module(name)
+            except Exception:
+                logging.debug("savu_server: unable to import %s", name)
+
+    try:
+        import pyfftw
+        pyfftw.interfaces.cache.enable()
+        pyfftw.interfaces.cache.set_keepalive_time(3600)
+    except ImportError:
+        pass
+
+
+def _reset_logging():
+    """ Remove the log handlers of the previous job, so they are created
+    afresh in the output folder of the next one. """
+    import logging
+    logger = logging.getLogger()
+    for handler in logger.handlers[:]:
+        logger.removeHandler(handler)
+        handler.close()
+
+
+def _run_job(channel, job):
+    """ Run a job in this worker.
+
+    :returns: False if the worker should exit.
+    """
+    from savu import tomo_recon
+    from savu.core.basic_plugin_runner import BasicPluginRunner
+    from savu.core.plugin_runner import PluginRunner
+
+    stream = _MessageStream(channel)
+    stdout, stderr, cwd = sys.stdout, sys.stderr, os.getcwd()
+    sys.stdout = sys.stderr = stream
+    try:
+        os.chdir(job['cwd'])
+        args = tomo_recon._parse_args(job['args'])
+        options = tomo_recon._set_options(args)
+        if options['nProcesses'] != 1:
+            raise Exception("savu_server workers run single process jobs.")
+        _reset_logging()
+        pRunner = \
+            PluginRunner if options['mode'] == 'full' else BasicPluginRunner
+        exp = pRunner(options)._run_plugin_list()
+        msg = {'type': 'result', 'worker': os.getpid(),
+               'out_path': options['out_path'],
+               'nxs_filename': exp.meta_data.get('nxs_filename')}
+    except SystemExit as e:
+        msg = {'type': 'exit', 'status': e.code}
+    except Exception:
+        msg = {'type': 'error', 'msg': traceback.format_exc()}
+    finally:
+        stream.flush()
+        _reset_logging()
+        sys.stdout, sys.stderr = stdout, stderr
+        os.chdir(cwd)
+    channel.send(msg)
+    return msg['type'] != 'error'
+
+
+def _worker_main(socket_path):
+    # import the framework and plugins before accepting any jobs
+    import savu.tomo_recon
+    _import_plugins()
+
+    channel = _connect(socket_path)
+    channel.send({'type': 'worker', 'pid': os.getpid()})
+    job = channel.receive()
+    while job is not None and _run_job(channel, job):
+        job = channel.receive()
+    channel.close()
+
+
+def submit(args, socket_path=DEFAULT_SOCKET, cwd=None):
+    """ Submit a job to a Savu server and yield the messages it sends back,
+    ending with a 'result', 'error' or 'exit' message.
+
+    :param list args: The savu command line arguments.
+    :param str socket_path: The socket of the server.
+    :param str cwd: The directory to run the job in (defaults to the current
+        directory).
+    """
+    channel = _connect(socket_path)
+    try:
+        channel.send({'type': 'job', 'args': list(args),
+                      'cwd': cwd if cwd else os.getcwd()})
+        msg = channel.receive()
+        while msg is not None:
+            yield msg
+            if msg['type'] in FINAL_MESSAGES:
+                return
+            msg = channel.receive()
+        yield {'type': 'error', 'msg': 'Lost the connection to savu_server.'}
+    finally:
+        channel.close()
+
+
+def __server_option_parser():
+    parser = argparse.ArgumentParser(prog='savu_server')
+    parser.add_argument("-s", "--socket", help="The socket to listen on.",
+                        default=os.getenv('SAVU_SERVER_SOCKET',
+                                          DEFAULT_SOCKET))
+    parser.add_argument("-w", "--workers", help="Number of worker processes.",
+                        default=1, type=int)
+    parser.add_argument("--stop", action="store_true", default=False,
+                        help="Stop the server listening on the socket.")
+    parser.add_argument("--worker", action="store_true", default=False,
+                        help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def main():
+    args = __server_option_parser()
+    if args.worker:
+        _worker_main(args.socket)
+    elif args.stop:
+        _connect(args.socket).send({'type': 'shutdown'})
+    else:
+        SavuServer(args.socket, args.workers).serve_forever()
+
+
+def client_main():
+    """ Run a savu job on a savu_server, with the savu command line
+    arguments. """
+    parser = argparse.ArgumentParser(prog='savu_client', add_help=False)
+    parser.add_argument("--server", default=os.getenv('SAVU_SERVER_SOCKET',
+                                                      DEFAULT_SOCKET))
+    client_args, savu_args = parser.parse_known_args()
+
+    status = 1
+    for msg in submit(savu_args, socket_path=client_args.server):
+        if msg['type'] == 'progress':
+            print msg['msg']
+        elif msg['type'] == 'result':
+            print "Results saved to %s" % msg['nxs_filename']
+            status = 0
+        elif msg['type'] == 'error':
+            print msg['msg']
+        elif msg['type'] == 'exit':
+            status = msg['status'] if msg['status'] else 0
+        sys.stdout.flush()
+    sys.exit(status)
+
+
+if __name__ == '__main__':
+    main()
@@ -25,6 +25,8 @@ import inspect
 import tempfile
 import os
 import copy
+import h5py
+import numpy as np
 
 from savu.core.plugin_runner import PluginRunner
 from savu.data.experiment_collection import Experiment
@@ -109,6 +111,44 @@ def set_3dto4d_experiment(filename, **kwargs):
     return options
 
 
+def create_tomo_file(folder, data=None, image_key=None, angles=None):
+    """ Write a synthetic NXtomo file that can be read by the nxtomo_loader.
+    By default there are 3 darks, 3 flats and 20 projections of 12x16
+    random values between 1000 and 1500.
+
+    :param str folder: The folder to write tomo.nxs into.
+    :param ndarray data: The frames. Default: random.
+    :param list image_key: The image key of each frame. Default: all \
+        projections.
+    :param ndarray angles: The rotation angle of each frame. Default: evenly \
+        spaced from 0 to 180 degrees.
+    :returns: The path of the file.
+    """
+    if data is None:
+        image_key = [2]*3 + [1]*3 + [0]*20
+        data = 1000 + 500*np.random.rand(len(image_key), 12, 16)
+    image_key = [0]*len(data) if image_key is None else image_key
+    if angles is None:
+        angles = np.linspace(0, 180, len(image_key))
+
+    path = os.path.join(folder, 'tomo.nxs')
+    with h5py.File(path, 'w') as f:
+        entry = f.create_group('entry1/tomo_entry')
+        entry['data/data'] = np.asarray(data, dtype=np.float32)
+        entry['data/rotation_angle'] = angles
+        entry['instrument/detector/image_key'] = image_key
+    return path
+
+
+def set_tomo_file_options(path, **kwargs):
+    """ Options to run the nxtomo_loader on a file from create_tomo_file,
+    with the output in a new folder next to the file. """
+    kwargs.setdefault('out_path', tempfile.mkdtemp(dir=os.path.dirname(path)))
+    options = set_options(path, **kwargs)
+    options['loader'] = 'savu.plugins.loaders.full_field_loaders.nxtomo_loader'
+    return options
+
+
 def get_output_datasets(plugin):
     n_out = plugin.nOutput_datasets()
     out_data = []
@@ -174,6 +214,8 @@ def set_options(path, **kwargs):
     options['template'] = None
     options['checkpoint'] = None
     options['system_params'] = None
+    options['cache'] = None
+    options['cache_size'] = None
     return options
 
 
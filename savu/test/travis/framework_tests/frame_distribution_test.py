@@ -0,0 +1,124 @@
+# Copyright 2014 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. module:: frame_distribution_test
+   :platform: Unix
+   :synopsis: Tests for the static and dynamic distribution of frames \
+   between processes.
+
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+
+"""
+
+import os
+import re
+import h5py
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from mpi4py import MPI
+
+import savu.test.test_utils as tu
+import savu.core.transports.base_transport as base_transport
+from savu.core.frame_queue import FrameQueue
+from savu.test.travis.framework_tests.plugin_runner_test import \
+    run_protected_plugin_runner
+
+
+class FrameDistributionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = tu.create_tomo_file(self.tmp)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def _run_distribution(self, distribution):
+        path = os.path.dirname(os.path.abspath(tu.__file__))
+        sys_file = os.path.join(path, '..', '..', 'system_files', 'dls',
+                                'system_parameters.yml')
+        with open(sys_file, 'r') as f:
+            sys_params = f.read()
+
+        options = tu.set_tomo_file_options(self.path)
+        options['system_params'] = os.path.join(options['out_path'],
+                                                'system_parameters.yml')
+        with open(options['system_params'], 'w') as f:
+            f.write(re.sub(r'frame_distribution\s*:\s*\w+',
+                           'frame_distribution : %s' % distribution,
+                           sys_params))
+
+        # projection then sinogram processing
+        plugin_list = ['savu.plugins.corrections.dark_flat_field_correction',
+                       'savu.plugins.filters.dezinger_sinogram']
+        tu.set_plugin_list(options, plugin_list, [{}, {}, {}, {}])
+        run_protected_plugin_runner(options)
+
+        fname = os.path.join(options['out_path'],
+                             'tomo_p2_dezinger_sinogram.h5')
+        with h5py.File(fname, 'r') as f:
+            return f['2-DezingerSinogram-tomo/data'][...]
+
+    def test_dynamic_output(self):
+        static = self._run_distribution('static')
+
+        # use dynamic distribution on a single process, and record the
+        # blocks handed out by the queue and the distribution of each plugin
+        blocks, plugins = [], []
+        _next = FrameQueue._next
+        _initialise = base_transport.BaseTransport._initialise
+
+        def _record_next(queue):
+            idx = _next(queue)
+            blocks.append(idx)
+            return idx
+
+        def _record_initialise(transport, plugin):
+            plugins.append((plugin, plugin._get_frame_distribution()))
+            return _initialise(transport, plugin)
+
+        min_processes = base_transport.MIN_DYNAMIC_PROCESSES
+        base_transport.MIN_DYNAMIC_PROCESSES = 1
+        FrameQueue._next = _record_next
+        base_transport.BaseTransport._initialise = _record_initialise
+        try:
+            dynamic = self._run_distribution('dynamic')
+        finally:
+            base_transport.MIN_DYNAMIC_PROCESSES = min_processes
+            FrameQueue._next = _next
+            base_transport.BaseTransport._initialise = _initialise
+
+        self.assertTrue([b for b in blocks if b is not None])
+        np.testing.assert_array_equal(static, dynamic)
+        # the distribution only applies while each plugin is processing
+        self.assertTrue([p for p, d in plugins if d == 'dynamic'])
+        for plugin, _ in plugins:
+            self.assertEqual(plugin._get_frame_distribution(), 'static')
+
+    def test_frame_queue(self):
+        comm = MPI.COMM_WORLD
+        queue = FrameQueue(comm, 2, 11)
+        blocks = list(queue)
+        # there are no blocks left once the queue is exhausted
+        self.assertEqual(list(queue), [])
+        queue._close()
+        blocks = sorted(b for p in comm.allgather(blocks) for b in p)
+        self.assertEqual(blocks, range(2, 11))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+# Copyright 2014 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. module:: frame_threads_test
+   :platform: Unix
+   :synopsis: Tests for processing frames over a pool of threads.
+
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+
+"""
+
+import os
+import re
+import h5py
+import unittest
+import numpy as np
+
+import savu.test.test_utils as tu
+from savu.plugins.plugin import Plugin
+from savu.plugins.driver.frame_threads import FrameThreads
+from savu.test.travis.framework_tests.plugin_runner_test import \
+    run_protected_plugin_runner
+
+
+class FrameThreadsTest(unittest.TestCase):
+
+    def _run_threaded(self, nThreads):
+        path = os.path.dirname(os.path.abspath(tu.__file__))
+        sys_file = os.path.join(path, '..', '..', 'system_files', 'dls',
+                                'system_parameters.yml')
+        with open(sys_file, 'r') as f:
+            sys_params = f.read()
+
+        options = tu.set_experiment('fluo')
+        options['system_params'] = os.path.join(options['out_path'],
+                                                'system_parameters.yml')
+        with open(options['system_params'], 'w') as f:
+            f.write(re.sub(r'threads_per_process\s*:\s*\w+',
+                           'threads_per_process : %s' % nThreads,
+                           sys_params))
+
+        plugin = 'savu.plugins.filters.threshold_filter'
+        params = {'in_datasets': ['fluo'], 'out_datasets': ['fluo'],
+                  'intensity_threshold': 5.0}
+        tu.set_plugin_list(options, plugin, [{}, params, {}])
+        run_protected_plugin_runner(options)
+
+        fname = os.path.join(options['out_path'],
+                             'fluo_p1_threshold_filter.h5')
+        with h5py.File(fname, 'r') as f:
+            return f['1-ThresholdFilter-fluo/data'][...]
+
+    def test_threaded_output(self):
+        serial = self._run_threaded(1)
+        threaded = self._run_threaded(4)
+        np.testing.assert_array_equal(serial, threaded)
+
+    def test_frame_state(self):
+        plugin = Plugin()
+        threads = FrameThreads(plugin, 3)
+
+        def process(i):
+            plugin.set_current_slice_list(i)
+            buf = plugin.get_thread_buffer('scratch', (2,))
+            buf[:] = i
+            return (plugin.get_process_frames_counter(),
+                    plugin.get_current_slice_list(), buf[0])
+
+        try:
+            results = threads._map(process, range(10, 30))
+        finally:
+            threads._close()
+        self.assertEqual([r[0] for r in results], range(20))
+        self.assertEqual([r[1] for r in results], range(10, 30))
+        self.assertEqual([r[2] for r in results], range(10, 30))
+        self.assertEqual(plugin.get_process_frames_counter(), 20)
+        self.assertIsNone(plugin._thread_state)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+# Copyright 2014 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. module:: local_object_store_test
+   :platform: Unix
+   :synopsis: Tests for the local DosNa backends.
+
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+
+"""
+
+import os
+import h5py
+import shutil
+import tempfile
+import unittest
+import numpy as np
+
+import savu.test.test_utils as tu
+from savu.data.local_object_store import LocalConnection
+from savu.test.travis.framework_tests.plugin_runner_test import \
+    run_protected_plugin_runner
+
+
+class LocalObjectStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def _connect(self, backend, path, cache_size):
+        connection = LocalConnection('test', backend=backend, path=path,
+                                     cache_size=cache_size)
+        connection.connect()
+        return connection
+
+    def test_indexing(self):
+        np.random.seed(0)
+        for backend in ['memory', 'local']:
+            # a cache smaller than one chunk evicts on every access
+            for cache_size in [1e-4, 100]:
+                connection = self._connect(
+                    backend, tempfile.mkdtemp(dir=self.tmp), cache_size)
+                expected = np.zeros((13, 9, 11), dtype=np.float32)
+                data = connection.create_dataset(
+                    'data', expected.shape, np.float32, chunk_size=(4, 3, 5))
+                for i in range(20):
+                    sl = tuple(slice(*sorted(np.random.randint(0, n + 1, 2)))
+                               for n in expected.shape)
+                    value = np.random.rand(*expected[sl].shape)
+                    expected[sl] = value
+                    data[sl] = value
+                    if i % 7 == 0:
+                        connection.flush()
+                    np.testing.assert_array_equal(
+                        data[2:, ::2, 3::3], expected[2:, ::2, 3::3])
+                data[5] = 7
+                expected[5] = 7
+                np.testing.assert_array_equal(data[3, :, -1],
+                                              expected[3, :, -1])
+                np.testing.assert_array_equal(data[...], expected)
+                connection.del_dataset('data')
+
+    def test_shared_chunks(self):
+        # two connections, as two processes, write to the same chunks
+        path = tempfile.mkdtemp(dir=self.tmp)
+        conn1, conn2 = [self._connect('local', path, 1) for i in range(2)]
+        data1, data2 = [c.create_dataset('data', (8, 6), np.float64,
+                                         chunk_size=(4, 4))
+                        for c in [conn1, conn2]]
+        expected = np.random.rand(8, 6)
+        data1[:, :3] = expected[:, :3]
+        data2[:, 3:] = expected[:, 3:]
+        conn1.flush()
+        conn2.flush()
+        np.testing.assert_array_equal(data1[:], expected)
+        np.testing.assert_array_equal(data2[:], expected)
+
+    def test_dosna_transport(self):
+        path = tu.create_tomo_file(self.tmp)
+
+        results = []
+        for transport, backend in [('hdf5', None), ('dosna', 'local'),
+                                   ('dosna', 'memory')]:
+            options = tu.set_tomo_file_options(path, transport=transport)
+            options['dosna_backend'] = backend
+            plugin_list = [
+                'savu.plugins.corrections.dark_flat_field_correction',
+                'savu.plugins.filters.dezinger_sinogram',
+                'savu.plugins.reshape.downsample_filter']
+            tu.set_plugin_list(options, plugin_list, [{}, {}, {}, {}, {}])
+            run_protected_plugin_runner(options)
+            fname = os.path.join(options['out_path'],
+                                 'tomo_p3_downsample_filter.h5')
+            with h5py.File(fname, 'r') as f:
+                results.append(f['3-DownsampleFilter-tomo/data'][...])
+
+        for result in results[1:]:
+            np.testing.assert_array_equal(result, results[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+# Copyright 2014 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. module:: npy_transport_test
+   :platform: Unix
+   :synopsis: Tests for passing intermediate datasets in .npy files.
+
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+
+"""
+
+import os
+import h5py
+import shutil
+import tempfile
+import unittest
+import numpy as np
+
+import savu.test.test_utils as tu
+from savu.test.travis.framework_tests.plugin_runner_test import \
+    run_protected_plugin_runner
+
+
+class NpyTransportTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = tu.create_tomo_file(self.tmp)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def _run_transport(self, transport):
+        options = tu.set_tomo_file_options(self.path, transport=transport)
+        plugin_list = ['savu.plugins.corrections.dark_flat_field_correction',
+                       'savu.plugins.filters.dezinger_sinogram',
+                       'savu.plugins.reshape.downsample_filter']
+        tu.set_plugin_list(options, plugin_list, [{}, {}, {}, {}, {}])
+        run_protected_plugin_runner(options)
+
+        files = os.listdir(options['out_path'])
+        fname = os.path.join(options['out_path'],
+                             'tomo_p3_downsample_filter.h5')
+        with h5py.File(fname, 'r') as f:
+            return files, f['3-DownsampleFilter-tomo/data'][...]
+
+    def test_transport_output(self):
+        files, expected = self._run_transport('hdf5')
+        self.assertIn('tomo_p2_dezinger_sinogram.h5', files)
+        files, result = self._run_transport('npy')
+        # intermediate files are removed once they are no longer required
+        self.assertEqual(
+            [f for f in files if f.startswith('tomo_')],
+            ['tomo_p3_downsample_filter.h5'])
+        np.testing.assert_array_equal(result, expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+# Copyright 2014 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. module:: parameter_tuning_test
+   :platform: Unix
+   :synopsis: Tests for single pass parameter tuning.
+
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+
+"""
+
+import os
+import re
+import h5py
+import unittest
+import numpy as np
+
+import savu.test.test_utils as tu
+from savu.plugins.plugin import Plugin
+from savu.plugins.driver.parameter_tuning import ParameterTuning
+from savu.test.travis.framework_tests.plugin_runner_test import \
+    run_protected_plugin_runner
+
+
+class InPlacePlugin(Plugin):
+    """ A plugin whose pre_process changes an attribute in place. """
+
+    def __init__(self):
+        super(InPlacePlugin, self).__init__('InPlacePlugin')
+        self.values = [1.0, 5.0, 20.0]
+        self.offset = np.zeros(1)
+        self.names = {}
+
+    def _set_parameters_this_instance(self, indices):
+        self.parameters['value'] = self.values[indices[0]]
+
+    def pre_process(self):
+        self.offset[0] = self.parameters['value']
+        self.names['value'] = self.parameters['value']
+
+
+class ParameterTuningTest(unittest.TestCase):
+
+    def _run_tuning(self, mode):
+        path = os.path.dirname(os.path.abspath(tu.__file__))
+        sys_file = os.path.join(path, '..', '..', 'system_files', 'dls',
+                                'system_parameters.yml')
+        with open(sys_file, 'r') as f:
+            sys_params = f.read()
+
+        options = tu.set_experiment('fluo')
+        options['system_params'] = os.path.join(options['out_path'],
+                                                'system_parameters.yml')
+        with open(options['system_params'], 'w') as f:
+            f.write(re.sub(r'parameter_tuning\s*:\s*\w+',
+                           'parameter_tuning : %s' % mode, sys_params))
+
+        plugin = 'savu.plugins.filters.threshold_filter'
+        params = {'in_datasets': ['fluo'], 'out_datasets': ['fluo'],
+                  'intensity_threshold': '1.0;5.0;20.0'}
+        tu.set_plugin_list(options, plugin, [{}, params, {}])
+        run_protected_plugin_runner(options)
+
+        fname = os.path.join(options['out_path'],
+                             'fluo_p1_threshold_filter.h5')
+        with h5py.File(fname, 'r') as f:
+            return f['1-ThresholdFilter-fluo/data'][...]
+
+    def test_single_pass(self):
+        repeat = self._run_tuning('repeat')
+        single = self._run_tuning('single_pass')
+        self.assertEqual(repeat.shape[-1], 3)
+        self.assertEqual(repeat.shape, single.shape)
+        np.testing.assert_array_equal(repeat, single)
+        # each tuning instance uses a different threshold
+        self.assertFalse(np.array_equal(single[..., 0], single[..., 2]))
+
+    def test_in_place_state(self):
+        plugin = InPlacePlugin()
+        tuning = ParameterTuning(plugin, [[0], [1], [2]], [[2]])
+        tuning._pre_process()
+        for n in [2, 0, 1, 0]:
+            tuning._set_instance(n)
+            self.assertEqual(plugin.offset[0], plugin.values[n])
+            self.assertEqual(plugin.names['value'], plugin.values[n])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+# Copyright 2014 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. module:: plugin_index_test
+   :platform: Unix
+   :synopsis: Tests for the static plugin index used by the configurator.
+
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+
+"""
+
+import os
+import sys
+import time
+import tempfile
+import unittest
+
+import savu.plugins.utils as pu
+import savu.plugins.plugin_index as pi
+
+PLUGIN = '''
+from savu.plugins.utils import register_plugin
+from savu.plugins.filters.base_filter import BaseFilter
+from savu.plugins.driver.cpu_plugin import CpuPlugin
+import a_missing_dependency
+
+
+@register_plugin
+class IndexTestPlugin(BaseFilter, CpuPlugin):
+    """
+    A plugin that cannot be imported.
+
+    :param value: A value. Default: %s.
+    """
+'''
+
+
+class PluginIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.index_file = pi.INDEX_FILE
+        self.plugins_path = os.getenv('SAVU_PLUGINS_PATH')
+        self.folder = tempfile.mkdtemp()
+        pi.INDEX_FILE = os.path.join(self.folder, 'index', 'plugin_index.json')
+        os.environ['SAVU_PLUGINS_PATH'] = self.folder
+        pi._index = None
+
+    def tearDown(self):
+        pi.INDEX_FILE = self.index_file
+        pi._index = None
+        if self.plugins_path is None:
+            del os.environ['SAVU_PLUGINS_PATH']
+        else:
+            os.environ['SAVU_PLUGINS_PATH'] = self.plugins_path
+
+    def _write_plugin(self, value):
+        fname = os.path.join(self.folder, 'index_test_plugin.py')
+        with open(fname, 'w') as f:
+            f.write(PLUGIN % value)
+        # make sure the modification time changes
+        mtime = time.time() + value
+        os.utime(fname, (mtime, mtime))
+
+    def test_plugin_info(self):
+        name = 'DezingerSinogram'
+        module = 'savu.plugins.filters.dezinger_sinogram'
+        info = pi.get_plugin_info(name)
+        self.assertEqual(info.id, module)
+
+        plugin = pu.load_class(module)()
+        plugin._populate_default_parameters()
+        self.assertEqual(info.parameters, plugin.parameters)
+        self.assertEqual(info.parameters_desc, plugin.parameters_desc)
+        self.assertEqual(info.parameters_hide, plugin.parameters_hide)
+        self.assertEqual(info.parameters_user, plugin.parameters_user)
+        self.assertEqual(info.docstring_info, plugin.docstring_info)
+        self.assertTrue('CpuPlugin' in info.classes)
+
+    def test_not_imported(self):
+        self._write_plugin(1)
+        info = pi.get_plugin_info('IndexTestPlugin')
+        self.assertEqual(info.id, 'index_test_plugin')
+        self.assertEqual(info.parameters['value'], 1)
+        self.assertTrue('in_datasets' in info.parameters)
+        self.assertFalse('index_test_plugin' in sys.modules)
+        self.assertTrue(os.path.exists(pi.INDEX_FILE))
+
+    def test_invalidation(self):
+        self._write_plugin(1)
+        pi.get_index()
+        self._write_plugin(2)
+        pi._index = None
+        self.assertEqual(
+            pi.get_plugin_info('IndexTestPlugin').parameters['value'], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+# Copyright 2014 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. module:: result_cache_test
+   :platform: Unix
+   :synopsis: Tests for reusing cached plugin results between runs.
+
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+
+"""
+
+import os
+import sys
+import h5py
+import shutil
+import tempfile
+import unittest
+import numpy as np
+
+import savu.test.test_utils as tu
+from savu.core.result_cache import get_source_hash
+from savu.test.travis.framework_tests.plugin_runner_test import \
+    run_protected_plugin_runner
+
+
+class ResultCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = tu.create_tomo_file(self.tmp)
+        self.cache = tempfile.mkdtemp(dir=self.tmp)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def _run(self, dezinger_params={}, cache_size=None):
+        options = tu.set_tomo_file_options(self.path)
+        options['cache'] = self.cache
+        options['cache_size'] = cache_size
+        plugin_list = ['savu.plugins.corrections.dark_flat_field_correction',
+                       'savu.plugins.filters.dezinger_sinogram']
+        tu.set_plugin_list(options, plugin_list, [{}, {}, dezinger_params])
+        run_protected_plugin_runner(options)
+
+        fname = os.path.join(options['out_path'],
+                             'tomo_p2_dezinger_sinogram.h5')
+        with h5py.File(fname, 'r') as f:
+            result = f['2-DezingerSinogram-tomo/data'][...]
+        flat_field = os.path.join(options['out_path'],
+                                  'tomo_p1_dark_flat_field_correction.h5')
+        return result, flat_field
+
+    def test_reuse(self):
+        first, flat_field = self._run()
+        second, reused_flat_field = self._run()
+        np.testing.assert_array_equal(first, second)
+        # the corrected data is linked from the cache, not recalculated
+        self.assertTrue(os.path.samefile(flat_field, reused_flat_field))
+
+        # changing a later plugin still reuses the earlier results
+        third, reused_flat_field = self._run({'tolerance': 0.05})
+        self.assertTrue(os.path.samefile(flat_field, reused_flat_field))
+
+    def test_eviction(self):
+        self._run(cache_size=1e-9)
+        self._run({'tolerance': 0.05}, cache_size=1e-9)
+        entries = [e for e in os.listdir(self.cache)
+                   if os.path.exists(os.path.join(self.cache, e,
+                                                  'manifest.json'))]
+        self.assertEqual(len(entries), 1)
+
+    def test_base_class_source(self):
+        # a change to an inherited class changes the plugin identity
+        folder = tempfile.mkdtemp(dir=self.tmp)
+        with open(os.path.join(folder, 'cache_base.py'), 'w') as f:
+            f.write('class CacheBase(object):\n    pass\n')
+        with open(os.path.join(folder, 'cache_plugin.py'), 'w') as f:
+            f.write('from cache_base import CacheBase\n\n\n'
+                    'class CachePlugin(CacheBase):\n    pass\n')
+        sys.path.insert(0, folder)
+        try:
+            first = get_source_hash('cache_plugin')
+            with open(os.path.join(folder, 'cache_base.py'), 'a') as f:
+                f.write('# changed\n')
+            second = get_source_hash('cache_plugin')
+        finally:
+            sys.path.remove(folder)
+            for name in ['cache_base', 'cache_plugin']:
+                sys.modules.pop(name, None)
+        self.assertNotEqual(first, second)
+
+
+if __name__ == "__main__":
+    unittest.main()
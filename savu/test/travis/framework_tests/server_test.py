@@ -0,0 +1,73 @@
+# Copyright 2014 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. module:: server_test
+   :platform: Unix
+   :synopsis: Tests for running jobs on a savu_server.
+
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+
+"""
+
+import os
+import sys
+import time
+import tempfile
+import unittest
+import subprocess
+
+import savu.server as server
+from savu.test import test_utils as tu
+
+
+class ServerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.socket = os.path.join(tempfile.mkdtemp(), 'savu.sock')
+        self.server = subprocess.Popen(
+            [sys.executable, '-m', 'savu.server', '--socket', self.socket])
+        while not os.path.exists(self.socket):
+            time.sleep(0.1)
+
+    def tearDown(self):
+        server._connect(self.socket).send({'type': 'shutdown'})
+        self.server.wait()
+
+    def _submit(self, args):
+        return list(server.submit(args, socket_path=self.socket))
+
+    def test_jobs(self):
+        out_path = tempfile.mkdtemp()
+        args = [tu.get_test_data_path('mm.nxs'),
+                tu.get_test_process_path('spectrum_crop_test.nxs'), out_path]
+
+        results = []
+        for folder in ['job1', 'job2']:
+            messages = self._submit(args + ['-f', folder])
+            self.assertEqual(messages[-1]['type'], 'result')
+            self.assertTrue(os.path.exists(messages[-1]['nxs_filename']))
+            self.assertIn('* Processing Complete *',
+                          [m.get('msg') for m in messages])
+            results.append(messages[-1])
+        # both jobs are run by the same warm worker
+        self.assertEqual(results[0]['worker'], results[1]['worker'])
+
+    def test_bad_arguments(self):
+        messages = self._submit(['--not_an_option'])
+        self.assertEqual(messages[-1], {'type': 'exit', 'status': 2})
+
+
+if __name__ == "__main__":
+    unittest.main()
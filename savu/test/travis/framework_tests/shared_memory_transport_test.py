@@ -0,0 +1,87 @@
+# Copyright 2014 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. module:: shared_memory_transport_test
+   :platform: Unix
+   :synopsis: Tests for passing intermediate datasets in shared memory.
+
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+
+"""
+
+import os
+import h5py
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from mpi4py import MPI
+
+import savu.test.test_utils as tu
+from savu.data.data_structures.data_types.shared_memory import SharedMemory
+from savu.test.travis.framework_tests.plugin_runner_test import \
+    run_protected_plugin_runner
+
+
+class SharedMemoryTransportTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = tu.create_tomo_file(self.tmp)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def _run_transport(self, transport):
+        options = tu.set_tomo_file_options(self.path, transport=transport)
+        # projection then sinogram processing
+        plugin_list = ['savu.plugins.corrections.dark_flat_field_correction',
+                       'savu.plugins.filters.dezinger_sinogram']
+        tu.set_plugin_list(options, plugin_list, [{}, {}, {}, {}])
+        run_protected_plugin_runner(options)
+
+        files = os.listdir(options['out_path'])
+        fname = os.path.join(options['out_path'],
+                             'tomo_p2_dezinger_sinogram.h5')
+        with h5py.File(fname, 'r') as f:
+            return files, f['2-DezingerSinogram-tomo/data'][...]
+
+    def test_transport_output(self):
+        files, expected = self._run_transport('hdf5')
+        self.assertIn('tomo_p1_dark_flat_field_correction.h5', files)
+        files, result = self._run_transport('shared_memory')
+        # the intermediate dataset is never written to disk
+        self.assertNotIn('tomo_p1_dark_flat_field_correction.h5', files)
+        np.testing.assert_array_equal(result, expected)
+
+    def test_shared_memory(self):
+        data = SharedMemory((4, 3, 5), np.float32)
+        data._allocate(MPI.COMM_SELF, zero=True)
+        self.assertEqual(data.get_shape(), (4, 3, 5))
+        expected = np.random.rand(2, 3, 5).astype(np.float32)
+        data[[slice(1, 3), slice(None), slice(None)]] = expected
+        data._synchronise()
+        result = data[[slice(1, 3), slice(None), slice(None)]]
+        np.testing.assert_array_equal(result, expected)
+        self.assertEqual(data[0].sum(), 0)
+        # returned frames do not share memory with the dataset
+        result[:] = 0
+        np.testing.assert_array_equal(data[1:3], expected)
+        data._free()
+        self.assertIsNone(data.data)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+# Copyright 2014 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. module:: trace_test
+   :platform: Unix
+   :synopsis: Tests for the structured trace of the framework.
+
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+
+"""
+
+import os
+import re
+import json
+import h5py
+import shutil
+import tempfile
+import unittest
+import numpy as np
+
+import savu.test.test_utils as tu
+from savu.test.travis.framework_tests.plugin_runner_test import \
+    run_protected_plugin_runner
+
+
+class TraceTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = tu.create_tomo_file(self.tmp)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def _run_trace(self, dezinger_params={}, tuning='repeat'):
+        options = tu.set_tomo_file_options(self.path)
+        options['trace'] = True
+        path = os.path.dirname(os.path.abspath(tu.__file__))
+        sys_file = os.path.join(path, '..', '..', 'system_files', 'dls',
+                                'system_parameters.yml')
+        with open(sys_file, 'r') as f:
+            sys_params = f.read()
+        options['system_params'] = os.path.join(options['out_path'],
+                                                'system_parameters.yml')
+        with open(options['system_params'], 'w') as f:
+            f.write(re.sub(r'parameter_tuning\s*:\s*\w+',
+                           'parameter_tuning : %s' % tuning, sys_params))
+
+        plugin_list = ['savu.plugins.corrections.dark_flat_field_correction',
+                       'savu.plugins.filters.dezinger_sinogram']
+        tu.set_plugin_list(options, plugin_list, [{}, {}, dezinger_params])
+        run_protected_plugin_runner(options)
+
+        # the trace of each process has been merged
+        self.assertFalse(
+            os.path.exists(os.path.join(options['out_path'], 'trace')))
+        with open(os.path.join(options['out_path'], 'trace.json'), 'r') as f:
+            events = json.load(f)['traceEvents']
+        return [e for e in events if e['ph'] == 'X']
+
+    def test_trace(self):
+        spans = self._run_trace()
+        names = set((e['cat'], e['name']) for e in spans)
+        for span in [('plugin', 'DezingerSinogram'), ('driver', 'pre_process'),
+                     ('transport', 'process'), ('hdf5', 'open')]:
+            self.assertIn(span, names)
+
+        # each plugin writes the 20 corrected projections once
+        writes = [e for e in spans if e['name'] == 'write']
+        self.assertEqual(sum(e['args']['bytes'] for e in writes),
+                         2*20*12*16*4)
+        self.assertTrue(all(e['dur'] >= 0 for e in spans))
+
+    def test_single_pass_trace(self):
+        spans = self._run_trace({'tolerance': '0.05;0.1'}, 'single_pass')
+        # the tuned plugin is traced like any other
+        for name in ['pre_process', 'process_frames', 'post_process']:
+            self.assertEqual(
+                len([e for e in spans if (e['cat'], e['name']) ==
+                     ('driver', name)]), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -19,19 +19,101 @@
 .. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
 
 """
+import os
+import h5py
+import shutil
+import tempfile
 import unittest
+import numpy as np
+
 from savu.test import test_utils as tu
 from savu.test.travis.framework_tests.plugin_runner_test import \
     run_protected_plugin_runner
+from savu.plugins.basic_operations.expression_engine import ExpressionEngine
 
 
 class BasicOperations(unittest.TestCase):
 
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
     def test_basic_operations(self):
         process_file = tu.get_test_process_path('basic_operations_test.nxs')
         options = tu.set_experiment('tomo')
         options['process_file'] = process_file
         run_protected_plugin_runner(options)
 
+    def test_synthetic(self):
+        data = 1 + np.random.rand(20, 12, 16).astype(np.float32)
+        path = tu.create_tomo_file(self.tmp, data)
+
+        options = tu.set_tomo_file_options(path)
+        params = {'in_datasets': ['tomo', 'tomo'], 'out_datasets': ['result'],
+                  'operations': ['np.sqrt(tomo) + 2*tomo'],
+                  'pattern': 'PROJECTION'}
+        tu.set_plugin_list(options, 'savu.plugins.basic_operations.'
+                           'basic_operations', [{}, params, {}])
+        run_protected_plugin_runner(options)
+
+        fname = os.path.join(options['out_path'],
+                             'result_p1_basic_operations.h5')
+        with h5py.File(fname, 'r') as f:
+            result = f['1-BasicOperations-result/data'][...]
+        np.testing.assert_allclose(result, np.sqrt(data) + 2*data, rtol=1e-6)
+
+
+class ExpressionEngineTest(unittest.TestCase):
+
+    def setUp(self):
+        self.a = np.random.rand(3, 10, 7).astype(np.float32)
+        self.b = np.random.rand(3, 10, 7).astype(np.float32)
+
+    def test_evaluate(self):
+        a, b = self.a, self.b
+        operations = ['a*b + np.sqrt(a*b) - 2', 'out1/(a*b + 1)', 'b',
+                      'abs(-a)**2 % 0.3', 'numpy.maximum(a, 0.5)']
+        engine = ExpressionEngine(operations, ['a', 'b'],
+                                  ['out%d' % i for i in range(1, 6)],
+                                  chunk_size=50)
+        out1 = a*b + np.sqrt(a*b) - 2
+        expected = [out1, out1/(a*b + 1), b, abs(-a)**2 % 0.3,
+                    np.maximum(a, 0.5)]
+        result = engine.evaluate([a, b])
+        for r, e in zip(result, expected):
+            self.assertEqual(r.dtype, e.dtype)
+            np.testing.assert_array_equal(r, e)
+        # a*b is evaluated once
+        self.assertEqual(
+            len([f for f, args in engine.program if f is np.multiply]), 1)
+        self.assertFalse(result[2] is b)
+
+    def test_strided_and_broadcast(self):
+        engine = ExpressionEngine(['a - b'], ['a', 'b'], ['c'])
+        np.testing.assert_array_equal(
+            engine.evaluate([self.a[:, ::2], self.b[:, ::2]])[0],
+            self.a[:, ::2] - self.b[:, ::2])
+        np.testing.assert_array_equal(
+            engine.evaluate([self.a, self.b[0]])[0], self.a - self.b[0])
+
+    def test_constant_types(self):
+        engine = ExpressionEngine(['a*2', 'a*2.0', 'a**2', 'a**2.0'], ['a'],
+                                  ['o1', 'o2', 'o3', 'o4'])
+        a = np.arange(4)
+        result = engine.evaluate([a])
+        for r, e in zip(result, [a*2, a*2.0, a**2, a**2.0]):
+            self.assertEqual(r.dtype, e.dtype)
+            np.testing.assert_array_equal(r, e)
+        self.assertEqual(result[0].dtype, np.int64)
+        self.assertEqual(result[1].dtype, np.float64)
+
+    def test_not_allowed(self):
+        for op in ['__import__("os")', 'a.shape', 'a[0]', 'np.mean(a)',
+                   'c + 1', 'np.sqrt(a, b)', 'a if b else 1', 'a +']:
+            self.assertRaises(ValueError, ExpressionEngine, [op], ['a', 'b'],
+                              ['c'])
+
 if __name__ == "__main__":
     unittest.main()
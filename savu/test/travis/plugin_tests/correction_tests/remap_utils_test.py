@@ -0,0 +1,81 @@
+# Copyright 2014 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. module:: remap_utils_test
+   :platform: Unix
+   :synopsis: Test the precomputed remap against skimage.
+
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+
+"""
+import unittest
+import numpy as np
+import skimage.transform as sktf
+
+from savu.plugins.corrections.utils.remap_utils import Remap
+
+
+class RemapUtilsTest(unittest.TestCase):
+
+    def setUp(self):
+        np.random.seed(0)
+        self.frames = np.random.rand(3, 30, 40).astype(np.float32)
+
+    def test_rotation(self):
+        for angle, centre in [(3.7, (12.2, 17.5)), (-90, (19.5, 14.5))]:
+            remap = Remap.rotation(self.frames.shape[1:], angle, centre)
+            expected = [sktf.rotate(f.astype(np.float64), angle,
+                                    center=centre) for f in self.frames]
+            np.testing.assert_allclose(remap(self.frames, clip=True),
+                                       expected, atol=1e-6)
+
+    def test_translation(self):
+        for shift in [-2.3, 0.6, 3]:
+            remap = Remap.translation(self.frames.shape[1:], (shift, 0))
+            tf = sktf.SimilarityTransform(translation=(shift, 0))
+            expected = [sktf.warp(f.astype(np.float64), tf)
+                        for f in self.frames]
+            np.testing.assert_allclose(remap(self.frames, clip=True),
+                                       expected, atol=1e-6)
+        # an integer shift only needs one neighbour
+        self.assertEqual(len(remap.index), 1)
+
+    def test_modes(self):
+        rows, cols = np.meshgrid(np.arange(30) - 0.5, np.arange(40) + 0.5,
+                                 indexing='ij')
+        frame = self.frames[0]
+        edge = Remap(frame.shape, rows, cols, mode='edge')
+        expected = sktf.warp(frame, np.array([[1, 0, 0.5], [0, 1, -0.5],
+                                              [0, 0, 1]]), mode='edge')
+        np.testing.assert_allclose(edge(frame), expected, atol=1e-6)
+
+        valid = Remap(frame.shape, rows, cols, mode='valid', cval=-1)
+        result = valid(frame)
+        self.assertTrue(np.all(result[0] == -1))
+        self.assertTrue(np.all(result[:, -1] == -1))
+        np.testing.assert_allclose(result[1:, :-1], expected[1:, :-1],
+                                   atol=1e-6)
+
+    def test_cache(self):
+        shape = self.frames.shape[1:]
+        coeffs = (1, 1e-3, 0, 0, 0)
+        remap = Remap.radial(shape, (20, 15), coeffs)
+        self.assertIs(remap, Remap.radial(shape, (20, 15), coeffs))
+        out = np.empty(self.frames.shape, dtype=np.float32)
+        self.assertIs(remap(self.frames, out=out).base, out)
+
+
+if __name__ == "__main__":
+    unittest.main()
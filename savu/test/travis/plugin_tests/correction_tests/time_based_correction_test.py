@@ -21,10 +21,13 @@
 
 """
 import unittest
+import numpy as np
 from savu.test import test_utils as tu
 
 from savu.test.travis.framework_tests.plugin_runner_test import \
     run_protected_plugin_runner
+from savu.plugins.corrections.time_based_correction import \
+    TimeBasedCorrection
 
 
 class TimeBasedCorrectionTest(unittest.TestCase):
@@ -43,6 +46,22 @@ class TimeBasedCorrectionTest(unittest.TestCase):
         run_protected_plugin_runner(tu.set_options(data_file,
                                                    process_file=process_file))
 
+    def test_nearest_frames(self):
+        plugin = TimeBasedCorrection()
+        image_key = np.array([1, 1, 0, 0, 0, 0, 1, 0, 0, 2, 1])
+        changes = np.where(np.diff(image_key) != 0)[0] + 1
+        plugin.split_idx = np.split(np.arange(len(image_key)), changes)
+        plugin.data_key = np.where(image_key == 0)[0]
+        frames, dist = plugin.find_nearest_frames([0, 2, 5], np.arange(6))
+        np.testing.assert_array_equal(
+            frames, [[0, 1]]*4 + [[1, 2]]*2)
+        np.testing.assert_allclose(
+            dist[:, 1], [0, 0.25, 0.5, 0.75, 0, 0.5])
+        np.testing.assert_allclose(dist.sum(axis=1), 1)
+        # a run of projections after the last flat field uses it twice
+        frames, dist = plugin.find_nearest_frames([0], np.arange(6))
+        np.testing.assert_array_equal(frames, [[0, 0]]*6)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,88 @@
+# Copyright 2014 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. module:: component_analysis_test
+   :platform: Unix
+   :synopsis: Tests for the principal and independent component analysis \
+   plugins.
+
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+
+"""
+
+import os
+import h5py
+import unittest
+import numpy as np
+
+from savu.test import test_utils as tu
+from savu.test.travis.framework_tests.plugin_runner_test import \
+    run_protected_plugin_runner
+
+
+class ComponentAnalysisTest(unittest.TestCase):
+
+    def _get_spectra(self):
+        with h5py.File(tu.get_test_data_path('fluo.nxs'), 'r') as f:
+            data = \
+                f['entry1/fluo_entry/instrument/fluorescence/data'][...]
+        return data[..., :512].reshape(-1, 512).astype(np.float64)
+
+    def _run_plugin(self, name):
+        options = tu.set_experiment('fluo')
+        loader = {'preview': [':', ':', ':', '0:512']}
+        plugin = 'savu.plugins.component_analysis.' + name.lower()
+        params = {'in_datasets': ['fluo'],
+                  'out_datasets': ['scores', 'eigenvectors']}
+        tu.set_plugin_list(options, plugin, [loader, params, {}])
+        run_protected_plugin_runner(options)
+
+        result = []
+        for dname in params['out_datasets']:
+            fname = os.path.join(options['out_path'],
+                                 '%s_p1_%s.h5' % (dname, name.lower()))
+            with h5py.File(fname, 'r') as f:
+                result.append(f['1-%s-%s/data' % (name, dname)][...])
+        scores, eigenvectors = result
+        return scores.reshape(-1, scores.shape[-1]), eigenvectors
+
+    def test_pca(self):
+        scores, eigenvectors = self._run_plugin('Pca')
+        spectra = self._get_spectra()
+        centred = spectra - spectra.mean(axis=0)
+        _, s, vt = np.linalg.svd(centred, full_matrices=False)
+        # the largest element of each component is positive
+        idx = np.argmax(np.abs(vt[:3]), axis=1)
+        expected = vt[:3]*np.sign(vt[range(3), idx])[:, np.newaxis]
+        np.testing.assert_allclose(eigenvectors, expected, atol=1e-6)
+
+        variance = s[:3]**2/(len(spectra) - 1)
+        np.testing.assert_allclose(
+            scores, np.dot(centred, expected.T)/np.sqrt(variance),
+            rtol=1e-4, atol=1e-4)
+
+    def test_ica(self):
+        scores, components = self._run_plugin('Ica')
+        spectra = self._get_spectra()
+        centred = spectra - spectra.mean(axis=0)
+        np.testing.assert_allclose(
+            scores, np.dot(centred, components.T), rtol=1e-4, atol=1e-4)
+        # the independent components are uncorrelated, with unit variance
+        np.testing.assert_allclose(
+            np.dot(scores.T, scores)/len(scores), np.eye(3), atol=1e-4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -22,7 +22,11 @@
 """
 
 import unittest
+import numpy as np
+from scipy.interpolate import griddata
+
 from savu.test import test_utils as tu
+from savu.plugins.filters.list_to_projections import ListToProjections
 from savu.test.travis.framework_tests.plugin_runner_test import \
     run_protected_plugin_runner
 
@@ -34,5 +38,24 @@ class ListToProjectionsTest(unittest.TestCase):
         run_protected_plugin_runner(tu.set_options(data_file,
                                                    process_file=process_file))
 
+    def test_weights(self):
+        # the sparse interpolation weights must reproduce griddata
+        np.random.seed(0)
+        x = np.random.rand(500)*20
+        y = np.random.rand(500)*10
+        plugin = ListToProjections()
+        plugin.parameters = {'step_size_x': 0.5, 'step_size_y': 0.5,
+                             'fill_value': 'mean'}
+        plugin.setup_grids(np.array([x, y]))
+        plugin.setup_weights()
+        data = np.random.rand(500)
+        for fill_value in ['mean', 2.5]:
+            plugin.parameters['fill_value'] = fill_value
+            fill = data.mean() if fill_value == 'mean' else fill_value
+            expected = griddata((x, y), data, tuple(plugin.meshgrids),
+                                fill_value=fill)[1:, 1:]
+            np.testing.assert_allclose(plugin.process_frames([data]),
+                                       expected, rtol=1e-10)
+
 if __name__ == "__main__":
     unittest.main()
@@ -22,7 +22,12 @@
 
 """
 
+import os
+import h5py
+import shutil
+import tempfile
 import unittest
+import numpy as np
 
 import savu.test.test_utils as tu
 from savu.test.travis.framework_tests.plugin_runner_test import \
@@ -31,11 +36,44 @@ from savu.test.travis.framework_tests.plugin_runner_test import \
 
 class SinogramAlignmentTest(unittest.TestCase):
 
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
     def test_sinogram_alignment(self):
         data_file = tu.get_test_data_path('24737.nxs')
         process_file = tu.get_test_process_path('sino_alignment_test.nxs')
         run_protected_plugin_runner(tu.set_options(data_file,
                                                    process_file=process_file))
 
+    def test_synthetic_alignment(self):
+        # a blob on a sine path, with each projection displaced at random
+        angles = np.linspace(0, 180, 61)
+        centre = 24 + 10*np.sin(np.deg2rad(angles - 30))
+        jitter = np.random.uniform(-2, 2, len(angles))
+        x = np.arange(48)
+        sino = np.exp(-(x - (centre + jitter)[:, np.newaxis])**2/8.) + 0.01
+        data = np.tile(sino[:, np.newaxis, :], (1, 4, 1)).astype(np.float32)
+
+        path = tu.create_tomo_file(self.tmp, data, angles=angles)
+        options = tu.set_tomo_file_options(path)
+        tu.set_plugin_list(
+            options, 'savu.plugins.alignment.sinogram_alignment', [{}, {}, {}])
+        run_protected_plugin_runner(options)
+
+        fname = os.path.join(options['out_path'],
+                             'tomo_p1_sinogram_alignment.h5')
+        with h5py.File(fname, 'r') as f:
+            result = f['1-SinogramAlignment-tomo/data'][...]
+        # the centres of mass of the aligned rows lie on a sine curve, to
+        # within the accuracy of the interpolation
+        com = np.dot(result, x)/result.sum(axis=-1)
+        theta = np.deg2rad(angles)
+        model = np.array([np.sin(theta), np.cos(theta), np.ones(len(theta))]).T
+        fit = np.dot(model, np.linalg.lstsq(model, com, rcond=-1)[0])
+        np.testing.assert_allclose(com, fit, atol=0.25)
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,126 @@
+# Copyright 2014 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. module:: live_nx_tomo_loader_test
+   :platform: Unix
+   :synopsis: testing the live nxtomo loader against a file that is being \
+       written by another process.
+
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+
+"""
+
+import os
+import sys
+import time
+import h5py
+import tempfile
+import unittest
+import subprocess
+import numpy as np
+
+from savu.test import test_utils as tu
+from savu.data.data_structures.data_types.live_h5 import LiveHdf5
+from savu.test.travis.framework_tests.plugin_runner_test import \
+    run_protected_plugin_runner
+
+DATA = 'entry1/tomo_entry/data/data'
+KEY = 'entry1/tomo_entry/instrument/detector/image_key'
+ANGLES = 'entry1/tomo_entry/data/rotation_angle'
+SHAPE = (6, 8)
+IMAGE_KEY = [2]*2 + [1]*2 + [0]*16
+
+
+def get_frame(i):
+    """ The frame written at position i. """
+    if IMAGE_KEY[i] == 2:
+        return np.ones(SHAPE, dtype=np.float32)
+    if IMAGE_KEY[i] == 1:
+        return np.full(SHAPE, 5, dtype=np.float32)
+    return np.arange(np.prod(SHAPE), dtype=np.float32).reshape(SHAPE) + i
+
+
+def write_frames(path, nInitial, delay):
+    """ Create a file and append the frames in SWMR mode, as a detector
+    would. """
+    nFrames = len(IMAGE_KEY)
+    with h5py.File(path, 'w', libver='latest') as f:
+        f.create_dataset(KEY, data=IMAGE_KEY)
+        f.create_dataset(ANGLES, data=np.linspace(0, 180, nFrames))
+        data = f.create_dataset(DATA, shape=(nInitial,) + SHAPE,
+                                maxshape=(None,) + SHAPE,
+                                chunks=(1,) + SHAPE, dtype=np.float32)
+        for i in range(nInitial):
+            data[i] = get_frame(i)
+        f.swmr_mode = True
+        sys.stdout.write('ready\n')
+        sys.stdout.flush()
+        for i in range(nInitial, nFrames):
+            time.sleep(delay)
+            data.resize(i + 1, axis=0)
+            data[i] = get_frame(i)
+            data.flush()
+
+
+class LiveNxTomoLoaderTest(unittest.TestCase):
+
+    def _start_writer(self, path, nInitial, delay):
+        cmd = "from savu.test.travis.plugin_tests.loader_tests." \
+            "live_nx_tomo_loader_test import write_frames; " \
+            "write_frames(%r, %s, %s)" % (path, nInitial, delay)
+        writer = subprocess.Popen([sys.executable, '-c', cmd],
+                                  stdout=subprocess.PIPE)
+        self.assertEqual(writer.stdout.readline().strip(), 'ready')
+        return writer
+
+    def test_live_nx_tomo(self):
+        path = os.path.join(tempfile.mkdtemp(), 'live.nxs')
+        writer = self._start_writer(path, 6, 0.1)
+
+        options = tu.set_options(path)
+        options['loader'] = \
+            'savu.plugins.loaders.full_field_loaders.live_nxtomo_loader'
+        plugin = 'savu.plugins.corrections.dark_flat_field_correction'
+        loader_params = {'n_frames': len(IMAGE_KEY), 'timeout': 60}
+        tu.set_plugin_list(options, plugin, [loader_params, {}, {}])
+        run_protected_plugin_runner(options)
+        writer.wait()
+        self.assertEqual(writer.returncode, 0)
+
+        fname = os.path.join(options['out_path'],
+                             'tomo_p1_dark_flat_field_correction.h5')
+        with h5py.File(fname, 'r') as f:
+            result = f['1-DarkFlatFieldCorrection-tomo/data'][...]
+        proj = [i for i in range(len(IMAGE_KEY)) if IMAGE_KEY[i] == 0]
+        expected = np.array([(get_frame(i) - 1)/4. for i in proj])
+        np.testing.assert_allclose(result, expected, rtol=1e-6)
+
+    def test_live_timeout(self):
+        path = os.path.join(tempfile.mkdtemp(), 'live.nxs')
+        writer = self._start_writer(path, 6, 0.5)
+        with h5py.File(path, 'r', libver='latest', swmr=True) as f:
+            data = LiveHdf5(f[DATA], 0, len(IMAGE_KEY), timeout=0.2)
+            self.assertEqual(data.shape, (len(IMAGE_KEY),) + SHAPE)
+            np.testing.assert_array_equal(data[5], get_frame(5))
+            self.assertRaises(Exception, data.__getitem__,
+                              (slice(0, 20), slice(None), slice(None)))
+            data.timeout = 60
+            np.testing.assert_array_equal(data[10:12], [get_frame(10),
+                                                        get_frame(11)])
+        writer.wait()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+# Copyright 2014 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. module:: random_3d_tomo_loader_test
+   :platform: Unix
+   :synopsis: testing the generation of random and phantom tomography data
+
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+
+"""
+
+import os
+import h5py
+import unittest
+import numpy as np
+
+from savu.test import test_utils as tu
+from savu.test.travis.framework_tests.plugin_runner_test import \
+    run_protected_plugin_runner
+
+
+class Random3dTomoLoaderTest(unittest.TestCase):
+
+    def _run(self, params):
+        options = tu.set_options(tu.get_test_data_path('24737.nxs'))
+        options['loader'] = \
+            'savu.plugins.loaders.full_field_loaders.random_3d_tomo_loader'
+        tu.set_plugin_list(
+            options, 'savu.plugins.corrections.dark_flat_field_correction',
+            [params, {}, {}])
+        run_protected_plugin_runner(options)
+
+        out_path = options['out_path']
+        with h5py.File(os.path.join(out_path, 'input_array.h5'), 'r') as f:
+            raw = f['test'][...]
+        fname = os.path.join(out_path, 'tomo_p1_dark_flat_field_correction.h5')
+        with h5py.File(fname, 'r') as f:
+            corrected = f['1-DarkFlatFieldCorrection-tomo/data'][...]
+        return raw, corrected
+
+    def test_random(self):
+        params = {'size': (24, 10, 12), 'range': [1, 10]}
+        raw, _ = self._run(params)
+        self.assertEqual(raw.dtype, np.int16)
+        self.assertTrue(raw.min() >= 1 and raw.max() < 10)
+        # the data is reproducible with the same seed
+        np.testing.assert_array_equal(raw, self._run(params)[0])
+        params['seed'] = 1
+        self.assertFalse(np.array_equal(raw, self._run(params)[0]))
+
+    def test_phantom(self):
+        params = {'size': (44, 16, 32), 'phantom': True}
+        raw, corrected = self._run(params)
+        self.assertEqual(corrected.shape, (40, 16, 32))
+        # the darks and flats are in the data, and the phantom attenuates
+        self.assertAlmostEqual(raw[:2].mean()/100., 1, places=1)
+        self.assertAlmostEqual(raw[2:4].mean()/10000., 1, places=2)
+        self.assertTrue(corrected.min() > 0.2 and corrected.max() < 1.1)
+        self.assertTrue(corrected[:, 8, 16].max() < 0.9)
+        np.testing.assert_allclose(corrected[:, :, 0], 1, atol=0.1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -23,7 +23,12 @@
 
 """
 
+import os
+import re
+import h5py
 import unittest
+import numpy as np
+
 import savu.test.test_utils as tu
 from savu.test.travis.framework_tests.plugin_runner_test import \
     run_protected_plugin_runner_no_process_list
@@ -41,5 +46,33 @@ class AstraReconCPUTest(unittest.TestCase):
         plugin = 'savu.plugins.reconstructions.astra_recons.astra_recon_cpu'
         run_protected_plugin_runner_no_process_list(options, plugin)
 
+    def _run_threads(self, nThreads):
+        path = os.path.dirname(os.path.abspath(tu.__file__))
+        sys_file = os.path.join(path, '..', '..', 'system_files', 'dls',
+                                'system_parameters.yml')
+        with open(sys_file, 'r') as f:
+            sys_params = f.read()
+
+        options = tu.set_experiment('tomo')
+        options['system_params'] = os.path.join(options['out_path'],
+                                                'system_parameters.yml')
+        with open(options['system_params'], 'w') as f:
+            f.write(re.sub(r'threads_per_process\s*:\s*\w+',
+                           'threads_per_process : %s' % nThreads,
+                           sys_params))
+
+        plugin = 'savu.plugins.reconstructions.astra_recons.astra_recon_cpu'
+        run_protected_plugin_runner_no_process_list(options, plugin)
+        fname = [f for f in os.listdir(options['out_path'])
+                 if f.endswith('_p1_astra_recon_cpu.h5')][0]
+        with h5py.File(os.path.join(options['out_path'], fname), 'r') as f:
+            return f[f.keys()[0]]['data'][...]
+
+    def test_astra_recon_cpu_threads(self):
+        # each thread has its own data objects, so the frames reconstructed
+        # concurrently match a serial reconstruction
+        np.testing.assert_array_equal(self._run_threads(2),
+                                      self._run_threads(1))
+
 if __name__ == "__main__":
     unittest.main()
@@ -20,7 +20,13 @@
 .. moduleauthor:: Mark Basham <scientificsoftware@diamond.ac.uk>
 
 """
+import os
+import h5py
+import shutil
+import tempfile
 import unittest
+import numpy as np
+
 from savu.test import test_utils as tu
 from savu.test.travis.framework_tests.plugin_runner_test \
     import run_protected_plugin_runner
@@ -28,6 +34,12 @@ from savu.test.travis.framework_tests.plugin_runner_test \
 
 class SimpleTomoTest(unittest.TestCase):
 
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
     def test_process(self):
         data_file = tu.get_test_data_path('24737.nxs')
         process_file = \
@@ -35,5 +47,37 @@ class SimpleTomoTest(unittest.TestCase):
         run_protected_plugin_runner(tu.set_options(data_file,
                                                    process_file=process_file))
 
+    def test_disk(self):
+        """ Reconstruct a disk of unit attenuation, offset from the centre of
+        rotation, in several slices at once. """
+        nDet, nAngles, nSlices, radius, offset = 64, 90, 3, 16, 15
+        angles = np.linspace(0, 180, nAngles, endpoint=False)
+        t = np.arange(nDet) - nDet/2.0 - \
+            offset*np.cos(np.deg2rad(angles))[:, np.newaxis]
+        proj = 2*np.sqrt(np.clip(radius**2 - t**2, 0, None))
+        # SimpleRecon takes log(data + 1)
+        data = np.tile((np.exp(proj) - 1)[:, np.newaxis], (1, nSlices, 1))
+
+        path = tu.create_tomo_file(self.tmp, data, angles=angles)
+        options = tu.set_tomo_file_options(path)
+        params = {'log': False, 'centre_of_rotation': nDet/2.0}
+        plugin = 'savu.plugins.reconstructions.simple_recon'
+        tu.set_plugin_list(options, plugin, [{}, params, {}])
+        run_protected_plugin_runner(options)
+
+        fname = os.path.join(options['out_path'], 'tomo_p1_simple_recon.h5')
+        with h5py.File(fname, 'r') as f:
+            recon = f['1-SimpleRecon-tomo/data'][...]
+        self.assertEqual(recon.shape, (nDet, nSlices, nDet))
+        c = np.arange(nDet) - nDet/2
+        x, y = np.meshgrid(c, c)
+        r = np.sqrt((x - offset)**2 + y**2)
+        fov = np.sqrt(x**2 + y**2) < nDet/2 - 2
+        for i in range(nSlices):
+            np.testing.assert_allclose(
+                recon[:, i][r < radius - 3], 1, atol=0.05)
+            np.testing.assert_allclose(
+                recon[:, i][(r > radius + 3) & fov], 0, atol=0.1)
+
 if __name__ == "__main__":
     unittest.main()
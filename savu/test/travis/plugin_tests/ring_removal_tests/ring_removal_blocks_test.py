@@ -0,0 +1,163 @@
+# Copyright 2014 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. module:: ring_removal_blocks_test
+   :platform: Unix
+   :synopsis: Compare the ring removal plugins, which process blocks of \
+       sinograms, with the original single sinogram implementations.
+.. moduleauthor:: Nghia Vo <scientificsoftware@diamond.ac.uk>
+"""
+
+import os
+import h5py
+import pywt
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from scipy.ndimage import gaussian_filter
+
+from savu.test import test_utils as tu
+from savu.test.travis.framework_tests.plugin_runner_test import \
+    run_protected_plugin_runner
+
+
+def normalization(sinogram, radius, num_chunks):
+    """ RingRemovalNormalization for a single sinogram. """
+    height, width = sinogram.shape
+    sinogram = np.copy(sinogram)
+    radius = np.clip(np.int16(radius), 0, width)
+    num_chunks = np.clip(np.int16(num_chunks), 1, height)
+    for pos in np.array_split(np.arange(height), num_chunks):
+        bindex, eindex = pos[0], pos[-1] + 1
+        list_mean = np.mean(sinogram[bindex:eindex, :], axis=0)
+        list_coe = gaussian_filter(list_mean, radius) - list_mean
+        mat_coe = np.zeros((eindex - bindex, width), dtype=np.float32)
+        mat_coe[:] = list_coe
+        sinogram[bindex:eindex, :] = sinogram[bindex:eindex, :] + mat_coe
+    return sinogram
+
+
+def regularization(sinogram, alpha, num_chunks):
+    """ RingRemovalRegularization for a single sinogram. """
+    height, width = sinogram.shape
+    tau = 2.0 * np.arcsinh(np.sqrt(alpha) * 0.5)
+    matjj, matii = np.meshgrid(np.arange(width), np.arange(width))
+    mat1a = np.cosh((width - 1 - np.abs(matii - matjj)) * tau)
+    mat2a = np.cosh((width - (matii + matjj)) * tau)
+    mat_coe = -(np.tanh(0.5 * tau) /
+                (alpha * np.sinh(width * tau))) * (mat1a + mat2a)
+
+    sinogram = np.copy(sinogram)
+    sinogram[sinogram <= 0.0] = np.mean(sinogram)
+    sinogram = -np.log(sinogram)
+    num_chunks = np.clip(np.int16(num_chunks), 1, height)
+    list_grad = np.zeros(width, dtype=np.float32)
+    mat_grad = np.zeros((width, width), dtype=np.float32)
+    for pos in np.array_split(np.arange(height), num_chunks):
+        bindex, eindex = pos[0], pos[-1] + 1
+        list_mean = np.mean(sinogram[bindex:eindex, :], axis=0)
+        list_grad[1:-1] = - np.diff(list_mean, 2)
+        list_grad[0] = list_mean[0] - list_mean[1]
+        list_grad[-1] = list_mean[-1] - list_mean[-2]
+        mat_grad[:] = list_grad
+        list_corr = np.sum(mat_grad * mat_coe, axis=1)
+        mat_corr = np.zeros((eindex - bindex, width), dtype=np.float32)
+        mat_corr[:] = list_corr
+        sinogram[bindex:eindex, :] = sinogram[bindex:eindex, :] + mat_corr
+    return np.exp(-sinogram)
+
+
+def waveletfft(sinogram, nvalue, sigma, level, pad):
+    """ RingRemovalWaveletfft for a single sinogram, which is padded at the
+    edges as the framework pads the frames. """
+    sino = np.pad(sinogram, pad, mode='edge')
+    height, width = sino.shape
+    waveletname = 'db' + str(nvalue)
+    cH, cV, cD = [], [], []
+    for j in range(level):
+        sino, (cHt, cVt, cDt) = pywt.dwt2(sino, waveletname)
+        cH.append(cHt)
+        cV.append(cVt)
+        cD.append(cDt)
+    for j in range(level):
+        fcV = np.fft.fftshift(np.fft.fft2(cV[j]))
+        my, mx = fcV.shape
+        y_hat = (np.arange(-my, my, 2, dtype='float') + 1) / 2
+        damp = 1 - np.exp(-np.power(y_hat, 2) / (2 * np.power(sigma, 2)))
+        fcV = np.multiply(fcV, np.transpose(np.tile(damp, (mx, 1))))
+        cV[j] = np.real(np.fft.ifft2(np.fft.ifftshift(fcV)))
+    for j in range(level)[::-1]:
+        sino = sino[0:cH[j].shape[0], 0:cH[j].shape[1]]
+        sino = pywt.idwt2((sino, (cH[j], cV[j], cD[j])), waveletname)
+    sino = sino[:height, :width]
+    return sino[pad:height-pad, pad:width-pad]
+
+
+class RingRemovalBlocksTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        # 45 angles, so the chunks of rows are of different sizes, and
+        # stripes (rings) in some columns
+        rng = np.random.RandomState(0)
+        self.data = 1 + 0.5*rng.rand(45, 13, 31)
+        self.data[:, :, [5, 17]] *= 1.3
+        self.data[:20, :, 24] *= 0.8
+        self.data = self.data.astype(np.float32)
+        self.path = tu.create_tomo_file(self.tmp, data=self.data)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def _run_plugin(self, name, params):
+        options = tu.set_tomo_file_options(self.path)
+        plugin = 'savu.plugins.ring_removal.' + name
+        tu.set_plugin_list(options, plugin, [{}, params, {}])
+        run_protected_plugin_runner(options)
+
+        fname = os.path.join(options['out_path'], 'tomo_p1_%s.h5' % name)
+        with h5py.File(fname, 'r') as f:
+            return f[f.keys()[0]]['data'][...]
+
+    def _compare(self, name, params, reference, rtol=1e-5):
+        result = self._run_plugin(name, params)
+        expected = np.stack([reference(self.data[:, i, :])
+                             for i in range(self.data.shape[1])], axis=1)
+        self.assertEqual(result.shape, self.data.shape)
+        np.testing.assert_allclose(result, expected, rtol=rtol, atol=1e-6)
+
+    def test_normalization(self):
+        for chunks in [1, 4]:
+            self._compare('ring_removal_normalization',
+                          {'radius': 3, 'number_of_chunks': chunks},
+                          lambda s: normalization(s, 3, chunks))
+
+    def test_regularization(self):
+        for chunks in [1, 4]:
+            self._compare('ring_removal_regularization',
+                          {'alpha': 0.005, 'number_of_chunks': chunks},
+                          lambda s: regularization(s, 0.005, chunks))
+
+    def test_waveletfft(self):
+        for level in [1, 3]:
+            self._compare('ring_removal_waveletfft',
+                          {'nvalue': 4, 'sigma': 1.5, 'level': level,
+                           'padFT': 5},
+                          lambda s: waveletfft(s, 4, 1.5, level, 5))
+
+
+if __name__ == "__main__":
+    unittest.main()
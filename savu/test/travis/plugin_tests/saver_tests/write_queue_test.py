@@ -0,0 +1,112 @@
+# Copyright 2014 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. module:: write_queue_test
+   :platform: Unix
+   :synopsis: Test the write-behind queue used by the savers.
+
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+
+"""
+
+import time
+import threading
+import unittest
+import numpy as np
+
+from savu.plugins.savers.utils.write_queue import WriteQueue
+
+
+class WriteQueueTest(unittest.TestCase):
+
+    def setUp(self):
+        self.out = np.zeros((20, 4, 5))
+        self.writes = []
+        self.release = threading.Event()
+        self.release.set()
+
+    def write(self, index, data):
+        self.release.wait()
+        self.writes.append(index)
+        self.out[tuple(index)] = data
+
+    def frame(self, i):
+        return [slice(i, i+1), slice(0, 4), slice(0, 5)]
+
+    def test_coalesce(self):
+        # hold the writer so the frames build up in the queue
+        self.release.clear()
+        queue = WriteQueue(self.write, 2**20, coalesce=True)
+        expected = np.random.rand(*self.out.shape)
+        for i in range(10) + range(12, 20) + [10, 11]:
+            queue.put(self.frame(i), expected[i])
+        self.release.set()
+        queue.close()
+        np.testing.assert_array_equal(self.out, expected)
+        self.assertLess(len(self.writes), 20)
+        self.assertIn([slice(12, 20), slice(0, 4), slice(0, 5)],
+                      self.writes)
+
+    def test_coalesce_budget(self):
+        # room for eight frames: a join of more than four frames and its
+        # copy would not fit
+        nbytes = np.zeros((4, 5)).nbytes
+        queue = WriteQueue(self.write, 8*nbytes, coalesce=True)
+        sizes = []
+        write = queue.write
+
+        def record(index, data):
+            # the joined copy is counted while it is written
+            sizes.append((index[0].stop - index[0].start, queue._nbytes))
+            write(index, data)
+        queue.write = record
+
+        # the writer takes all the frames at once
+        expected = np.random.rand(*self.out.shape)
+        with queue._cond:
+            for i in range(8):
+                queue.put(self.frame(i), expected[i])
+        self.release.set()
+        queue.close()
+        np.testing.assert_array_equal(self.out[:8], expected[:8])
+        self.assertEqual(sizes, [(4, 12*nbytes), (4, 8*nbytes)])
+
+    def test_back_pressure(self):
+        self.release.clear()
+        nbytes = np.zeros((4, 5)).nbytes
+        queue = WriteQueue(self.write, 3*nbytes)
+        for i in range(3):
+            queue.put(self.frame(i), np.ones((4, 5)))
+        blocked = threading.Thread(
+            target=queue.put, args=(self.frame(3), np.ones((4, 5))))
+        blocked.start()
+        time.sleep(0.1)
+        self.assertTrue(blocked.is_alive())
+        self.release.set()
+        blocked.join()
+        queue.close()
+        self.assertEqual(self.out[:4].sum(), 4*20)
+
+    def test_error(self):
+        def fail(index, data):
+            raise IOError("disk full")
+        queue = WriteQueue(fail, 2**20)
+        queue.put(0, np.ones(3))
+        self.assertRaises(IOError, queue.flush)
+        queue.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
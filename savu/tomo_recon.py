@@ -33,7 +33,7 @@ from savu.core.basic_plugin_runner import BasicPluginRunner
 from savu.core.plugin_runner import PluginRunner
 
 
-def __option_parser():
+def __option_parser(input_args=None):
     """ Option parser for command line arguments.
     """
     version = "%(prog)s " + __version__
@@ -111,11 +111,28 @@ def __option_parser():
     parser.add_argument("--checkpoint", nargs="?", choices=choices,
                         const='plugin', help=check_help, default=None)
 
-    args = parser.parse_args()
+    cache_help = "Reuse the results of plugins cached in this folder by an "\
+        "earlier run with the same input data and leading plugins."
+    parser.add_argument("--cache", help=cache_help, default=None)
+    cache_size_help = "The maximum size of the cache folder in GB."
+    parser.add_argument("--cache_size", help=cache_size_help, default=100,
+                        type=float)
+    trace_help = "Write a trace of the framework to trace.json in the "\
+        "output folder."
+    parser.add_argument("--trace", action="store_true", help=trace_help,
+                        default=False)
+
+    args = parser.parse_args(input_args)
     __check_conditions(parser, args)
     return args
 
 
+def _parse_args(input_args):
+    """ Parse a list of savu command line arguments, e.g. from a \
+    savu_server client. """
+    return __option_parser(input_args)
+
+
 def __check_conditions(parser, args):
     if args.checkpoint and not args.folder:
         msg = "--checkpoint flag requires '-f folder_name', where folder_name"\
@@ -174,6 +191,9 @@ def _set_options(args):
     options["dosna_connection_options"] = args.dosna_connection_options
 
     options['checkpoint'] = args.checkpoint
+    options['cache'] = os.path.abspath(args.cache) if args.cache else None
+    options['cache_size'] = args.cache_size
+    options['trace'] = args.trace
 
     return options
 
@@ -0,0 +1,103 @@
+# Copyright 2014 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. module:: basic_operations_benchmark
+   :platform: Unix
+   :synopsis: Compares the compiled expression engine of BasicOperations with \
+   evaluating the operations with exec, on blocks of frames from several \
+   datasets.
+
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+
+"""
+
+import time
+import argparse
+import numpy as np
+
+from savu.plugins.basic_operations.expression_engine import ExpressionEngine
+
+OPERATIONS = {
+    'sum': (['tomo1 + tomo2'], ['result']),
+    'normalise': (['(tomo1 - dark)/(flat - dark)'], ['result']),
+    'shared': (['(tomo1 - dark)/(flat - dark)',
+                'np.log((tomo1 - dark)/(flat - dark) + 1)*2',
+                'np.sqrt(abs(tomo1 - tomo2))'], ['norm', 'log', 'diff'])}
+IN_NAMES = ['tomo1', 'tomo2', 'dark', 'flat']
+
+
+def exec_operations(operations, in_names, out_names, data):
+    """ Evaluate the operations as BasicOperations did before the engine, by
+    substituting the dataset names and calling exec. """
+    ops = []
+    for op in operations:
+        for i, name in enumerate(in_names):
+            op = op.replace(name, 'data[%d]' % i)
+        ops.append(op)
+    namespace = {'data': data, 'np': np}
+    for out, op in zip(out_names, ops):
+        exec(out + "=" + op, namespace)
+    return [namespace[out] for out in out_names]
+
+
+def time_func(func, repeats):
+    best = None
+    for i in range(repeats):
+        start = time.time()
+        func()
+        t = time.time() - start
+        best = t if best is None else min(best, t)
+    return best
+
+
+def __option_parser():
+    parser = argparse.ArgumentParser(prog='basic_operations_benchmark')
+    parser.add_argument('-f', '--frames', type=int, default=8,
+                        help='The number of frames in each block.')
+    parser.add_argument('-s', '--shape', type=int, nargs=2,
+                        default=[1024, 1024], help='The shape of a frame.')
+    parser.add_argument('-r', '--repeats', type=int, default=5,
+                        help='The number of times to time each block.')
+    return parser.parse_args()
+
+
+def main():
+    args = __option_parser()
+    shape = (args.frames,) + tuple(args.shape)
+    # projections lie between the dark and flat fields
+    offsets = {'tomo1': 1, 'tomo2': 1, 'dark': 0, 'flat': 2}
+    data = [(np.random.rand(*shape)*0.9 + offsets[n]).astype(np.float32)
+            for n in IN_NAMES]
+
+    print "Blocks of %s float32 frames from %d datasets, best of %d" % \
+        (shape, len(IN_NAMES), args.repeats)
+    print "%-10s %10s %10s %8s %10s" % \
+        ('operation', 'exec (s)', 'engine (s)', 'speedup', 'max diff')
+    for name in sorted(OPERATIONS):
+        operations, out_names = OPERATIONS[name]
+        engine = ExpressionEngine(operations, IN_NAMES, out_names)
+        expected = exec_operations(operations, IN_NAMES, out_names, data)
+        result = engine.evaluate(data)
+        diff = max(np.abs(e - r).max() for e, r in zip(expected, result))
+
+        t_exec = time_func(lambda: exec_operations(
+            operations, IN_NAMES, out_names, data), args.repeats)
+        t_engine = time_func(lambda: engine.evaluate(data), args.repeats)
+        print "%-10s %10.4f %10.4f %7.2fx %10.2g" % \
+            (name, t_exec, t_engine, t_exec/t_engine, diff)
+
+
+if __name__ == '__main__':
+    main()
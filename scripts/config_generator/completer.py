@@ -24,7 +24,7 @@
 import os
 import re
 
-from savu.plugins import utils as pu
+from savu.plugins import plugin_index as pi
 if os.name == 'nt':
     import win_readline as readline
 else:
@@ -121,8 +121,8 @@ class Completer(object):
 
     def complete_params(self, args):
         if not args[0]:
-            return pu.plugins.keys()
-        return [x for x in pu.plugins.keys() if x.startswith(args[0])]
+            return pi.get_plugin_names()
+        return [x for x in pi.get_plugin_names() if x.startswith(args[0])]
 
     def complete(self, text, state):
         "Generic readline completion entry point."
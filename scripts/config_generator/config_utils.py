@@ -31,6 +31,7 @@ import pkgutil
 from functools import wraps
 import arg_parsers as parsers
 import savu.plugins.utils as pu
+import savu.plugins.plugin_index as pi
 import savu.data.data_structures.utils as du
 
 
@@ -165,13 +166,12 @@ def __get_filtered_plugins(pfilter):
     star_search = \
         pfilter.split('*')[0] if pfilter and '*' in pfilter else False
 
-    for key, value in pu.plugins.iteritems():
+    for key, value in pi.get_index().iteritems():
         if star_search:
             search = '(?i)^' + star_search
-            if re.match(search, value.__name__) or \
-                    re.match(search, value.__module__):
+            if re.match(search, key) or re.match(search, value['id']):
                 key_list.append(key)
-        elif pfilter in value.__module__ or pfilter in value.__name__:
+        elif pfilter in value['id'] or pfilter in key:
             key_list.append(key)
 
     key_list.sort()
@@ -23,9 +23,8 @@
 
 import re
 import os
-import inspect
 
-from savu.plugins import utils as pu
+from savu.plugins import plugin_index as pi
 from savu.data.plugin_list import PluginList
 import mutations
 
@@ -81,10 +80,9 @@ class Content(object):
             self.plugin_list.plugin_list = []
 
     def add(self, name, str_pos):
-        if name not in pu.plugins.keys():
+        if name not in pi.get_plugin_names():
             raise Exception("INPUT ERROR: Unknown plugin %s" % name)
-        plugin = pu.plugins[name]()
-        plugin._populate_default_parameters()
+        plugin = pi.get_plugin_info(name)
         pos, str_pos = self.convert_pos(str_pos)
         self.insert(plugin, pos, str_pos)
 
@@ -93,8 +91,7 @@ class Content(object):
         plugin_entry = self.plugin_list.plugin_list[pos]
         name = change if change else plugin_entry['name']
         active = plugin_entry['active']
-        plugin = pu.plugins[name]()
-        plugin._populate_default_parameters()
+        plugin = pi.get_plugin_info(name)
 
         keep = self.get(pos)['data'] if not defaults else None
         self.insert(plugin, pos, str_pos, replace=True)
@@ -107,7 +104,7 @@ class Content(object):
         for param in union_params:
             self.modify(str_pos, param, keep[param], ref=True)
         # add any parameter mutations here
-        classes = [c.__name__ for c in inspect.getmro(plugin.__class__)]
+        classes = plugin.classes
         m_dict = mutations.param_mutations
         keys = [k for k in m_dict.keys() if k in classes]
 
@@ -143,7 +140,7 @@ class Content(object):
                 if name in notices.keys():
                     print notices[name]['desc']
                 # if a plugin is missing then look for mutations
-                search = True if name not in pu.plugins.keys() else False
+                search = True if name not in pi.get_plugin_names() else False
                 found = self._mutate_plugins(name, pos, search=search)
                 if search and not found:
                     str_pos = self.plugin_list.plugin_list[pos]['pos']
@@ -169,7 +166,7 @@ class Content(object):
         """ Perform plugin mutations. """
         # check for case changes in plugin name
         if search:
-            for key in pu.plugins.keys():
+            for key in pi.get_plugin_names():
                 if name.lower() == key.lower():
                     str_pos = self.plugin_list.plugin_list[pos]['pos']
                     self.refresh(str_pos, change=key)
@@ -180,7 +177,7 @@ class Content(object):
         if name in m_dict.keys():
             mutate = m_dict[name]
             if 'replace' in mutate.keys():
-                if mutate['replace'] in pu.plugins.keys():
+                if mutate['replace'] in pi.get_plugin_names():
                     str_pos = self.plugin_list.plugin_list[pos]['pos']
                     self.refresh(str_pos, change=mutate['replace'])
                     print mutate['desc']
@@ -200,7 +197,7 @@ class Content(object):
         self.remove(old_pos)
         new_pos, new = self.convert_pos(new)
         name = entry['name']
-        self.insert(pu.plugins[name](), new_pos, new)
+        self.insert(pi.get_plugin_info(name), new_pos, new)
         self.plugin_list.plugin_list[new_pos] = entry
         self.plugin_list.plugin_list[new_pos]['pos'] = new
 
@@ -340,7 +337,7 @@ class Content(object):
     def create_plugin_dict(self, plugin):
         plugin_dict = {}
         plugin_dict['name'] = plugin.name
-        plugin_dict['id'] = plugin.__module__
+        plugin_dict['id'] = plugin.id
         plugin_dict['data'] = plugin.parameters
         plugin_dict['active'] = True
         plugin_dict['desc'] = plugin.parameters_desc
@@ -27,7 +27,7 @@ from content import Content
 from completer import Completer
 from display_formatter import ListDisplay, DispDisplay
 import arg_parsers as parsers
-from savu.plugins import utils as pu
+from savu.plugins import plugin_index as pi
 import config_utils as utils
 from config_utils import parse_args
 from config_utils import error_catcher
@@ -218,8 +218,8 @@ def main():
 
     print("Starting Savu Config tool (please wait for prompt)")
 
-    utils.populate_plugins()
-    comp = Completer(commands=commands, plugin_list=pu.plugins)
+    # the plugins are listed from the index, without importing them
+    comp = Completer(commands=commands, plugin_list=pi.get_plugin_names())
     utils._set_readline(comp.complete)
 
     content = Content(level="all" if args.disp_all else 'user')
@@ -1,6 +1,7 @@
 import pandas as pd
 import argparse
 import tempfile
+import json
 import os
 
 
@@ -22,6 +23,41 @@ def convert(log_file_list, path, log_level):
     return frame
 
 
+def convert_trace(trace_file, path):
+    """ Create the html profile from a Savu trace (savu --trace). """
+    with open(trace_file, 'r') as f:
+        events = json.load(f)['traceEvents']
+
+    hosts = {}
+    for e in events:
+        if e['ph'] == 'M' and e['name'] == 'process_name':
+            hosts[e['pid']] = e['args']['name']
+
+    spans = sorted([e for e in events if e['ph'] == 'X'],
+                   key=lambda e: (e['pid'], e['tid'], e['ts']))
+    keys = ['P%04i T%02i' % (e['pid'], e['tid']) for e in spans]
+    messages = [('%s: %s' % (e['cat'], e['name'])).replace("'", "")
+                for e in spans]
+    frame = pd.DataFrame({'Key': keys, 'Message': messages,
+                          'Time': [e['ts']*1e-3 for e in spans],
+                          'Time_end': [(e['ts'] + e['dur'])*1e-3
+                                       for e in spans]},
+                         columns=['Key', 'Message', 'Time', 'Time_end'])
+
+    machines = sorted(hosts.keys())
+    machine_names = pd.DataFrame(
+        {'Message': [hosts[p] for p in machines],
+         'Machine': ['P%04i' % p for p in machines]},
+        columns=['Message', 'Machine'])
+
+    html_filename = set_file_name('/'.join([path,
+                                            os.path.basename(trace_file)]))
+    render_template(frame, machine_names, -1, html_filename)
+    print "html file created:", html_filename
+    print "Open the html file in your browser to view the profile."
+    return frame
+
+
 def get_frame(log_file, the_key, log_level):
     import itertools
 
@@ -101,7 +137,7 @@ def __option_parser():
     """
     parser = argparse.ArgumentParser(prog='savu_profile')
 
-    parser.add_argument('file', help='Savu output log file')
+    parser.add_argument('file', help='Savu output log file, or trace.json')
     parser.add_argument('-l', '--loglevel', default='INFO',
                         help='Set the log level.')
     parser.add_argument('-f', '--find', nargs='*', default=[],
@@ -119,6 +155,10 @@ def main():
     if not filename.startswith(os.path.sep):
         filename = os.getcwd() + os.path.sep + filename
 
+    if filename.endswith('.json'):
+        convert_trace(filename, os.path.dirname(filename))
+        return
+
     # create the log file for profiling
     name, ext = os.path.basename(filename).split('.')
     log_filename = '/'.join([tempfile.mkdtemp(), name + '_' + ext + '.log'])
@@ -105,7 +105,10 @@ setup(name='savu',
 
       entry_points={'console_scripts': [
                         'savu_config=scripts.config_generator.savu_config:main',
+                        'savu_plugin_index=savu.plugins.plugin_index:main',
                         'savu=savu.tomo_recon:main',
+                        'savu_server=savu.server:main',
+                        'savu_client=savu.server:client_main',
                         'savu_quick_tests=savu:run_tests',
                         'savu_full_tests=savu:run_full_tests',
                         'savu_citations=scripts.citation_extractor.citation_extractor:main',